@@ -4,16 +4,26 @@ from firecrawl import FirecrawlApp
 import os
 from dotenv import load_dotenv
 import asyncio
-from src.core import process_cover_letter_request
+from src.core import process_cover_letter_batch, stream_cover_letter_request
 import tempfile
+import time
 
 # Load environment variables
 load_dotenv()
 
 # Initialize API clients
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Retries are handled by the rate-limit scheduler in src/ratelimit.py.
+openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 firecrawl_client = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
+STAGE_MESSAGES = {
+    "resume": "📄 Processing your resume...",
+    "analysis": "🔍 Analyzing resume and job posting...",
+    "writing": "✍️ Generating your cover letter...",
+}
+# Seconds between re-renders of the streaming cover letter.
+STREAM_RENDER_INTERVAL = float(os.getenv("STREAM_RENDER_INTERVAL", "0.05"))
+
 
 def main():
     st.set_page_config(
@@ -30,29 +40,68 @@ def main():
     with col1:
         uploaded_file = st.file_uploader("Upload your resume (PDF)", type=["pdf"])
     with col2:
-        job_url = st.text_input("Enter job posting URL")
+        job_urls_text = st.text_area(
+            "Enter job posting URL(s), one per line",
+            help="Several URLs generate one cover letter per posting from the same resume.",
+        )
+    job_urls = [url.strip() for url in job_urls_text.splitlines() if url.strip()]
 
     if st.button("Generate Cover Letter", type="primary"):
-        if uploaded_file is not None and job_url:
+        if uploaded_file is not None and len(job_urls) > 1:
+            with st.spinner(f"✍️ Generating {len(job_urls)} cover letters..."):
+                results = asyncio.run(
+                    process_cover_letter_batch(
+                        uploaded_file, job_urls, openai_client, firecrawl_client
+                    )
+                )
+            generated = sum(result.cover_letter is not None for result in results)
+            st.success(f"✨ Generated {generated} of {len(results)} cover letters!")
+            for index, result in enumerate(results):
+                with st.expander(result.job_url, expanded=index == 0):
+                    if result.cover_letter is None:
+                        st.error(result.error)
+                        continue
+                    st.markdown(result.cover_letter)
+                    st.download_button(
+                        label="📥 Download as TXT",
+                        data=result.cover_letter,
+                        file_name=f"cover_letter_{index + 1}.txt",
+                        mime="text/plain",
+                        key=f"download-{index}",
+                    )
+        elif uploaded_file is not None and job_urls:
+            job_url = job_urls[0]
             try:
-                # Create a placeholder for the progress messages
+                # Placeholders for the progress messages and the letter as it streams in
                 progress_placeholder = st.empty()
+                letter_placeholder = st.empty()
+                error = None
+                timings = {}
 
                 async def process_with_status():
-                    # Step 1: Processing PDF
-                    progress_placeholder.info("📄 Processing your resume...")
-
-                    # Step 2: Parallel Processing
-                    progress_placeholder.info("🔍 Analyzing resume and job posting...")
-
-                    cover_letter = await process_cover_letter_request(
-                        uploaded_file, job_url, openai_client, firecrawl_client
-                    )
-
-                    # Step 3: Final Generation
-                    progress_placeholder.info("✍️ Generating your cover letter...")
-
-                    return cover_letter
+                    nonlocal error
+                    parts = []
+                    rendered_at = 0.0
+                    async for kind, value in stream_cover_letter_request(
+                        uploaded_file, job_url, openai_client, firecrawl_client, timings
+                    ):
+                        if kind == "stage":
+                            # Each message shows when its stage actually starts
+                            progress_placeholder.info(STAGE_MESSAGES[value])
+                        elif kind == "token":
+                            parts.append(value)
+                            # Re-render at most every STREAM_RENDER_INTERVAL seconds
+                            now = time.monotonic()
+                            if now - rendered_at >= STREAM_RENDER_INTERVAL:
+                                letter_placeholder.markdown("".join(parts) + "▌")
+                                rendered_at = now
+                        else:
+                            error = value
+                    letter_placeholder.empty()
+                    if error is not None:
+                        # A letter cut off by a failure is not a result.
+                        return None
+                    return "".join(parts) or None
 
                 # Run the async function
                 cover_letter = asyncio.run(process_with_status())
@@ -84,9 +133,24 @@ def main():
                             mime="text/plain",
                             help="Click to download your cover letter as a text file",
                         )
+
+                    with st.expander("⏱️ Stage timings"):
+                        st.table(
+                            [
+                                {
+                                    "Stage": stage,
+                                    "Started at (s)": round(timing["start"], 2),
+                                    "Took (s)": round(timing.get("duration") or 0.0, 2),
+                                }
+                                for stage, timing in timings.items()
+                            ]
+                        )
                 else:
                     progress_placeholder.empty()
-                    st.error("Failed to generate cover letter. Please try again.")
+                    st.error(
+                        f"Failed to generate cover letter ({error or 'empty response'}). "
+                        "Please try again."
+                    )
 
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
@@ -98,7 +162,8 @@ def main():
         st.write(
             """
         1. Upload your resume in PDF format
-        2. Paste the URL of the job posting you're interested in
+        2. Paste the URL of the job posting you're interested in (or several URLs,
+           one per line, for one cover letter per posting)
         3. Click 'Generate Cover Letter'
         4. View, copy, or download your customized cover letter
         """
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", "3600"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "256"))
+# Scrapes are network-bound, so many can wait at once; the default executor only
+# has a handful of threads and would run a batch of postings a few at a time.
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "32"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_scrape_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool blocking scrapes run in, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, SCRAPE_MAX_WORKERS), thread_name_prefix="scrape"
+        )
+    return _executor
+
+
+class ScrapeCache:
+    """
+    An in-memory, URL-keyed cache for job-posting scrapes.
+
+    Results are kept for `ttl` seconds and the least-recently-used URL is dropped once
+    more than `max_entries` are stored. Concurrent requests for the same URL share a
+    single in-flight scrape instead of each calling the scraper. The scraper is a
+    plain blocking callable (e.g. `FirecrawlApp.scrape_url`) and runs in a dedicated
+    thread pool (SCRAPE_MAX_WORKERS threads) so it never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "scrapes",
+        ttl: float = SCRAPE_CACHE_TTL,
+        max_entries: int = SCRAPE_CACHE_MAX_ENTRIES,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(
+        self, url: str, scrape: Callable[[str], Any], refresh: bool = False
+    ) -> Any:
+        """
+        Returns the scrape result for `url`, fetching it with `scrape` only when needed.
+
+        Parameters:
+            url (str): The URL to scrape.
+            scrape (Callable): Blocking function that takes the URL and returns the result.
+            refresh (bool): Ignore any cached result and re-fetch.
+
+        Returns:
+            Any: Whatever `scrape` returned. Failed scrapes are not cached.
+        """
+        entry = self._entries.get(url)
+        if entry is not None and not refresh and entry[0] > time.monotonic():
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(url)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(url, scrape))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # Shield so one cancelled caller does not cancel the scrape for the others.
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str, scrape: Callable[[str], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(get_scrape_executor(), scrape, url)
+        self._entries[url] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Drops every cached scrape."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/coalescing counters and the number of cached URLs."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+# Job posting scrapes, keyed by URL.
+scrape_cache = ScrapeCache()
@@ -1,17 +1,25 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
-import tempfile
-import os
 import asyncio
 import logging
+import os
+import time
 from openai import AsyncOpenAI
 from firecrawl import FirecrawlApp
-import PyPDF2
+
+from .cache import scrape_cache
+from .graph import StepGraph
+from .pdf import extract_pdf_text
+from .ratelimit import estimate_tokens, llm_scheduler
+from .text import compact_resume_text
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum number of LLM calls in flight at once when writing letters for many postings.
+COVER_LETTER_MAX_CONCURRENCY = int(os.getenv("COVER_LETTER_MAX_CONCURRENCY", "8"))
+
 # --------------------------------------------------------------
 # Data Models with Pydantic
 # --------------------------------------------------------------
@@ -35,33 +43,47 @@ class CoverLetter(BaseModel):
     content: str = Field(description="Generated cover letter text")
 
 
+class CoverLetterResult(BaseModel):
+    job_url: str = Field(description="Job posting URL")
+    cover_letter: Optional[str] = Field(None, description="Generated cover letter text")
+    error: Optional[str] = Field(None, description="Why no cover letter was generated")
+
+
 # --------------------------------------------------------------
 # Step 2. Create 3 functions
 # --------------------------------------------------------------
 
 
+async def create_completion(client: AsyncOpenAI, messages: List[dict], **kwargs):
+    """Sends a chat completion through the shared rate-limit scheduler."""
+    return await llm_scheduler.run(
+        lambda: client.chat.completions.create(
+            model="gpt-4", messages=messages, **kwargs
+        ),
+        estimate_tokens(messages),
+    )
+
+
 async def extract_resume_info(
     client: AsyncOpenAI, pdf_text: str
 ) -> Optional[ResumeExtraction]:
     """First LLM call: Extract structured information from resume"""
     try:
-        completion = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        messages = [
+            {
+                "role": "system",
+                "content": """You are a resume parser. Return ONLY a JSON object with this structure:
                 {
-                    "role": "system",
-                    "content": """You are a resume parser. Return ONLY a JSON object with this structure:
-                    {
-                        "experience": ["list of work experiences"],
-                        "skills": ["list of technical and soft skills"],
-                        "education": ["list of education details"],
-                        "contact_info": "full contact information"
-                    }
-                    IMPORTANT: Return ONLY valid JSON, no other text.""",
-                },
-                {"role": "user", "content": pdf_text},
-            ],
-        )
+                    "experience": ["list of work experiences"],
+                    "skills": ["list of technical and soft skills"],
+                    "education": ["list of education details"],
+                    "contact_info": "full contact information"
+                }
+                IMPORTANT: Return ONLY valid JSON, no other text.""",
+            },
+            {"role": "user", "content": pdf_text},
+        ]
+        completion = await create_completion(client, messages)
         response_text = completion.choices[0].message.content.strip()
         logger.info(f"Resume LLM Response: {response_text}")
         return ResumeExtraction.model_validate_json(response_text)
@@ -82,23 +104,21 @@ async def extract_job_info(
         job_text = str(job_content) if job_content is not None else ""
         logger.info(f"Job content type: {type(job_text)}")
 
-        completion = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        messages = [
+            {
+                "role": "system",
+                "content": """You are a job posting parser. Return ONLY a JSON object with this structure:
                 {
-                    "role": "system",
-                    "content": """You are a job posting parser. Return ONLY a JSON object with this structure:
-                    {
-                        "title": "exact job title",
-                        "company": "company name",
-                        "requirements": ["list of key requirements"],
-                        "description": "brief job description"
-                    }
-                    IMPORTANT: Return ONLY valid JSON, no other text.""",
-                },
-                {"role": "user", "content": job_text},
-            ],
-        )
+                    "title": "exact job title",
+                    "company": "company name",
+                    "requirements": ["list of key requirements"],
+                    "description": "brief job description"
+                }
+                IMPORTANT: Return ONLY valid JSON, no other text.""",
+            },
+            {"role": "user", "content": job_text},
+        ]
+        completion = await create_completion(client, messages)
         response_text = completion.choices[0].message.content.strip()
         logger.info(f"Job LLM Response: {response_text}")
         return JobExtraction.model_validate_json(response_text)
@@ -110,87 +130,272 @@ async def extract_job_info(
         return None
 
 
+def cover_letter_messages(
+    resume_info: ResumeExtraction, job_info: JobExtraction
+) -> List[dict]:
+    """Builds the prompt for the cover letter itself"""
+    return [
+        {
+            "role": "system",
+            "content": """Write a compelling cover letter following these guidelines:
+            1. Start with a strong hook about the company/role
+            2. Focus on relevant achievements matching job requirements
+            3. Use specific metrics from past experience
+            4. Keep it concise (300-400 words)
+            5. End with a confident call to action""",
+        },
+        {
+            "role": "user",
+            "content": f"Resume: {resume_info.model_dump()}\nJob: {job_info.model_dump()}",
+        },
+    ]
+
+
 async def generate_cover_letter(
     client: AsyncOpenAI, resume_info: ResumeExtraction, job_info: JobExtraction
 ) -> Optional[str]:
     """Third LLM call: Generate the cover letter using the results from previous async calls"""
     try:
-        completion = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """Write a compelling cover letter following these guidelines:
-                    1. Start with a strong hook about the company/role
-                    2. Focus on relevant achievements matching job requirements
-                    3. Use specific metrics from past experience
-                    4. Keep it concise (300-400 words)
-                    5. End with a confident call to action""",
-                },
-                {
-                    "role": "user",
-                    "content": f"Resume: {resume_info.model_dump()}\nJob: {job_info.model_dump()}",
-                },
-            ],
-        )
+        messages = cover_letter_messages(resume_info, job_info)
+        completion = await create_completion(client, messages)
         return completion.choices[0].message.content
     except Exception as e:
         logger.error(f"Cover letter generation failed: {str(e)}")
         return None
 
 
+async def stream_cover_letter(
+    client: AsyncOpenAI, resume_info: ResumeExtraction, job_info: JobExtraction
+) -> AsyncIterator[str]:
+    """
+    Third LLM call, streamed: yields the cover letter text piece by piece as the
+    model produces it, so the first words can be shown within the time to first
+    token instead of after the whole completion.
+
+    Rate limiting and retries apply until the stream opens; an error after that
+    is raised to the caller.
+    """
+    messages = cover_letter_messages(resume_info, job_info)
+    stream = await create_completion(client, messages, stream=True)
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def scrape_job_posting(job_url: str, firecrawl_client: FirecrawlApp) -> str:
+    """Scrapes a job posting through the shared cache, off the event loop"""
+    job_content = await scrape_cache.get(job_url, firecrawl_client.scrape_url)
+    if not isinstance(job_content, str):
+        job_content = str(job_content)
+    return job_content
+
+
 # --------------------------------------------------------------
 # Main Processing Function
 # --------------------------------------------------------------
 
 
-async def process_cover_letter_request(
+def cover_letter_graph(
     pdf_file, job_url: str, openai_client: AsyncOpenAI, firecrawl_client: FirecrawlApp
-) -> Optional[str]:
-    """Main async function that chains all the processing steps together"""
+) -> StepGraph:
+    """
+    The steps before writing the letter, as a dependency graph:
+
+        pdf_extract -> resume_parse
+        scrape      -> job_parse
+
+    Both branches start at once and each parse call fires as soon as its own input
+    is ready, so this part takes as long as the slower branch, not the sum.
+    """
+    graph = StepGraph()
+    # Extract text from PDF straight from the upload buffer, without touching disk,
+    # then trim it to the resume token budget before the LLM sees it
+    graph.add(
+        "pdf_extract",
+        lambda: compact_resume_text(extract_pdf_text(pdf_file)).text,
+        blocking=True,
+    )
+    # The blocking Firecrawl call runs in the scrape cache's thread pool
+    graph.add("scrape", lambda: scrape_job_posting(job_url, firecrawl_client))
+    graph.add(
+        "resume_parse",
+        lambda pdf_text: extract_resume_info(openai_client, pdf_text),
+        ["pdf_extract"],
+    )
+    graph.add(
+        "job_parse",
+        lambda job_content: extract_job_info(openai_client, job_content),
+        ["scrape"],
+    )
+    return graph
+
+
+async def stream_cover_letter_request(
+    pdf_file,
+    job_url: str,
+    openai_client: AsyncOpenAI,
+    firecrawl_client: FirecrawlApp,
+    timings: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Streaming version of process_cover_letter_request, for showing progress.
+
+    Yields ("stage", name) as each step actually starts, in order "resume"
+    (reading the PDF while the posting is scraped), "analysis" (parsing the resume
+    and job posting) and "writing", then ("token", text) for each piece of the
+    cover letter as it arrives. A failure yields ("error", message) and ends the
+    stream.
+
+    If `timings` is given it is filled with each stage's start offset and duration
+    in seconds (see StepGraph.timings), plus "generate" (with "first_token") and
+    "total"; they are also logged.
+    """
+    started = time.perf_counter()
+    graph = cover_letter_graph(pdf_file, job_url, openai_client, firecrawl_client)
+    graph.start()
+    generation = None
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(pdf_file.read())
-            temp_path = temp_file.name
-
-        # Extract text from PDF
-        with open(temp_path, "rb") as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            pdf_text = " ".join(page.extract_text() for page in pdf_reader.pages)
-            logger.info(f"Extracted PDF text length: {len(pdf_text)}")
-
-        # Get job content
+        yield "stage", "resume"
+        pdf_text = await graph.result("pdf_extract")
+        logger.info(f"Extracted PDF text length: {len(pdf_text)}")
+
+        yield "stage", "analysis"
         try:
-            job_content = firecrawl_client.scrape_url(job_url)
-            if not isinstance(job_content, str):
-                job_content = str(job_content)
-            logger.info(f"Job content type after conversion: {type(job_content)}")
+            job_content = await graph.result("scrape")
         except Exception as e:
             logger.error(f"Error scraping job URL: {str(e)}")
-            return None
-
-        # Process resume and job info in parallel
-        resume_info, job_info = await asyncio.gather(
-            extract_resume_info(openai_client, pdf_text),
-            extract_job_info(openai_client, job_content),
-        )
+            yield "error", f"Error scraping job URL: {e}"
+            return
+        logger.info(f"Job content type after conversion: {type(job_content)}")
 
+        # Both parse calls are already running; each started when its input was ready
+        resume_info = await graph.result("resume_parse")
+        job_info = await graph.result("job_parse")
         if not resume_info or not job_info:
             logger.error("Failed to extract either resume or job information")
-            return None
+            yield "error", "Failed to extract either resume or job information"
+            return
 
-        # Generate cover letter
-        cover_letter = await generate_cover_letter(openai_client, resume_info, job_info)
+        yield "stage", "writing"
+        generate_started = time.perf_counter()
+        generation = {"start": generate_started - started, "first_token": None}
+        async for text in stream_cover_letter(openai_client, resume_info, job_info):
+            if generation["first_token"] is None:
+                generation["first_token"] = time.perf_counter() - generate_started
+            yield "token", text
+        generation["duration"] = time.perf_counter() - generate_started
 
-        if not cover_letter:
+    except Exception as e:
+        logger.error(f"Error processing cover letter request: {str(e)}")
+        yield "error", f"Error processing cover letter request: {e}"
+    finally:
+        graph.cancel()
+        stage_timings = graph.timings()
+        if generation is not None:
+            stage_timings["generate"] = generation
+        total = time.perf_counter() - started
+        stage_timings["total"] = {"start": 0.0, "duration": total}
+        logger.info(f"Stage timings (s): {stage_timings}")
+        if timings is not None:
+            timings.update(stage_timings)
+
+
+async def process_cover_letter_request(
+    pdf_file,
+    job_url: str,
+    openai_client: AsyncOpenAI,
+    firecrawl_client: FirecrawlApp,
+    timings: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """Main async function that chains all the processing steps together"""
+    parts = []
+    async for kind, value in stream_cover_letter_request(
+        pdf_file, job_url, openai_client, firecrawl_client, timings
+    ):
+        if kind == "error":
             return None
+        if kind == "token":
+            parts.append(value)
+    return "".join(parts) or None
 
-        return cover_letter
 
-    except Exception as e:
-        logger.error(f"Error processing cover letter request: {str(e)}")
-        return None
+async def process_cover_letter_batch(
+    pdf_file,
+    job_urls: List[str],
+    openai_client: AsyncOpenAI,
+    firecrawl_client: FirecrawlApp,
+    max_concurrency: int = COVER_LETTER_MAX_CONCURRENCY,
+) -> List[CoverLetterResult]:
+    """
+    Generates one cover letter per job posting for the same resume.
+
+    The resume is extracted and parsed once, while every posting is scraped and
+    parsed concurrently (scrapes run in worker threads, and repeated URLs share one
+    scrape). Letters are then written with at most `max_concurrency` LLM calls in
+    flight, so the total time tracks the slowest posting rather than the sum.
+
+    Parameters:
+        pdf_file: The resume PDF (bytes or a binary file object).
+        job_urls (List[str]): Job posting URLs.
+        openai_client (AsyncOpenAI): Client for the LLM calls.
+        firecrawl_client (FirecrawlApp): Client for scraping the postings.
+        max_concurrency (int): Maximum number of LLM calls in flight at once.
+
+    Returns:
+        List[CoverLetterResult]: One result per URL, in input order, with either
+        the cover letter or the error that stopped it.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def parse_resume():
+        try:
+            # PDF extraction is CPU-bound; a worker thread lets the scrapes start now.
+            pdf_text = await asyncio.to_thread(
+                lambda: compact_resume_text(extract_pdf_text(pdf_file)).text
+            )
+        except Exception as e:
+            logger.error(f"Error processing resume PDF: {str(e)}")
+            return None, f"Error processing resume PDF: {e}"
+        async with semaphore:
+            resume_info = await extract_resume_info(openai_client, pdf_text)
+        if not resume_info:
+            return None, "Failed to extract resume information"
+        return resume_info, None
+
+    resume_task = asyncio.ensure_future(parse_resume())
+
+    async def process_posting(job_url: str) -> CoverLetterResult:
+        try:
+            job_content = await scrape_job_posting(job_url, firecrawl_client)
+        except Exception as e:
+            logger.error(f"Error scraping job URL {job_url}: {str(e)}")
+            return CoverLetterResult(
+                job_url=job_url, error=f"Error scraping job URL: {e}"
+            )
+
+        async with semaphore:
+            job_info = await extract_job_info(openai_client, job_content)
+        if not job_info:
+            return CoverLetterResult(
+                job_url=job_url, error="Failed to extract job information"
+            )
+
+        resume_info, resume_error = await asyncio.shield(resume_task)
+        if not resume_info:
+            return CoverLetterResult(job_url=job_url, error=resume_error)
+
+        async with semaphore:
+            cover_letter = await generate_cover_letter(
+                openai_client, resume_info, job_info
+            )
+        if not cover_letter:
+            return CoverLetterResult(
+                job_url=job_url, error="Cover letter generation failed"
+            )
+        return CoverLetterResult(job_url=job_url, cover_letter=cover_letter)
+
+    try:
+        # gather() keeps results in input order regardless of completion order.
+        return list(await asyncio.gather(*(process_posting(url) for url in job_urls)))
     finally:
-        if "temp_path" in locals():
-            os.unlink(temp_path)
+        resume_task.cancel()
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class StepGraph:
+    """
+    Runs the steps of a flow as a dependency graph.
+
+    Each step starts as soon as every step it depends on has finished, with their
+    results as its arguments, so independent branches overlap and the flow takes as
+    long as its critical path. Async steps run on the event loop; blocking ones
+    (`blocking=True`) run in a worker thread. A step whose dependency failed fails
+    with the same exception without running.
+
+    Usage:
+
+        graph = StepGraph()
+        graph.add("text", extract_text, blocking=True)
+        graph.add("summary", summarize, ["text"])
+        graph.start()
+        summary = await graph.result("summary")
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, tuple] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._started: Optional[float] = None
+        self._times: Dict[str, list] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends_on: Iterable[str] = (),
+        blocking: bool = False,
+    ) -> None:
+        """
+        Adds a step. Dependencies must already have been added.
+
+        Parameters:
+            name (str): The step's name, used for dependencies, results and timings.
+            func (Callable): Called with the dependencies' results, in order.
+            depends_on (Iterable[str]): Steps whose results `func` needs.
+            blocking (bool): Run `func` in a worker thread instead of awaiting it.
+        """
+        depends_on = list(depends_on)
+        missing = [dep for dep in depends_on if dep not in self._steps]
+        if missing:
+            raise ValueError(f"Step {name!r} depends on unknown steps: {missing}")
+        self._steps[name] = (func, depends_on, blocking)
+
+    def start(self) -> None:
+        """Schedules every step; each one waits only for its own dependencies."""
+        self._started = time.perf_counter()
+        for name in self._steps:
+            self._tasks[name] = asyncio.ensure_future(self._run(name))
+            # Failures are re-raised from result(); nobody else has to retrieve them.
+            self._tasks[name].add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+
+    async def _run(self, name: str) -> Any:
+        func, depends_on, blocking = self._steps[name]
+        args = [await asyncio.shield(self._tasks[dep]) for dep in depends_on]
+        started = time.perf_counter()
+        self._times[name] = [started - self._started, None]
+        try:
+            if blocking:
+                return await asyncio.to_thread(func, *args)
+            return await func(*args)
+        finally:
+            self._times[name][1] = time.perf_counter() - started
+
+    async def result(self, name: str) -> Any:
+        """Waits for a step and returns its result, raising whatever it raised."""
+        return await asyncio.shield(self._tasks[name])
+
+    def cancel(self) -> None:
+        """Cancels every step that has not finished."""
+        for task in self._tasks.values():
+            task.cancel()
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns, per step that has started, when it started relative to start() and
+        how long it ran (None while still running), in seconds.
+        """
+        return {
+            name: {"start": start, "duration": duration}
+            for name, (start, duration) in self._times.items()
+        }
@@ -0,0 +1,62 @@
+import io
+import os
+from itertools import islice
+from typing import Any, Iterator
+
+import PyPDF2
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+
+# Form feed between pages, as pdftotext does, so later stages can tell pages apart.
+PAGE_BREAK = "\f"
+
+
+def iter_pdf_pages(source: Any, max_pages: int = PDF_MAX_PAGES) -> Iterator[str]:
+    """
+    Yields the text of a PDF one page at a time, entirely in memory.
+
+    Parameters:
+        source: The PDF as bytes, a memoryview, or a seekable binary file object
+            (such as a Streamlit upload). File objects are read in place, without
+            copying the upload into a new buffer or writing it to disk.
+        max_pages (int): Stop after this many pages.
+
+    Yields:
+        str: The text of each page (empty for pages without extractable text).
+    """
+    if hasattr(source, "read"):
+        source.seek(0)
+        stream = source
+    else:
+        stream = io.BytesIO(source)
+    pdf_reader = PyPDF2.PdfReader(stream)
+    for page in islice(pdf_reader.pages, max_pages):
+        yield page.extract_text() or ""
+
+
+def extract_pdf_text(
+    source: Any, max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS
+) -> str:
+    """
+    Extracts the text of a PDF held in memory.
+
+    Pages are pulled lazily, so reading stops as soon as `max_chars` characters have
+    been collected instead of materialising the whole document first.
+
+    Parameters:
+        source: The PDF as bytes, a memoryview, or a seekable binary file object.
+        max_pages (int): Only the first `max_pages` pages are read.
+        max_chars (int): Stop reading pages once this many characters are collected.
+
+    Returns:
+        str: The text of each page joined by PAGE_BREAK.
+    """
+    pages = []
+    total = 0
+    for page_text in iter_pdf_pages(source, max_pages):
+        pages.append(page_text)
+        total += len(page_text) + 1
+        if total >= max_chars:
+            break
+    return PAGE_BREAK.join(pages)[:max_chars]
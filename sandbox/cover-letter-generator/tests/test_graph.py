@@ -0,0 +1,114 @@
+# tests/test_graph.py
+import asyncio
+import threading
+
+import pytest
+
+from src.graph import StepGraph
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_steps_run_after_their_dependencies_with_their_results():
+    async def flow():
+        order = []
+
+        def step(name, value):
+            async def func(*args):
+                order.append(name)
+                await asyncio.sleep(0)
+                return value + sum(args)
+
+            return func
+
+        graph = StepGraph()
+        graph.add("a", step("a", 1))
+        graph.add("b", step("b", 10), ["a"])
+        graph.add("c", step("c", 100), ["a"])
+        graph.add("d", step("d", 1000), ["b", "c"])
+        graph.start()
+        result = await graph.result("d")
+        return order, result
+
+    order, result = run(flow())
+    assert result == 1000 + (10 + 1) + (100 + 1)
+    assert order[0] == "a"
+    assert order[-1] == "d"
+    assert set(order[1:3]) == {"b", "c"}
+
+
+def test_independent_steps_overlap():
+    async def flow():
+        started = {"left": asyncio.Event(), "right": asyncio.Event()}
+
+        def step(name, other):
+            async def func():
+                started[name].set()
+                # Deadlocks (and times out) unless both steps run at once.
+                await asyncio.wait_for(started[other].wait(), timeout=1)
+                return name
+
+            return func
+
+        graph = StepGraph()
+        graph.add("left", step("left", "right"))
+        graph.add("right", step("right", "left"))
+        graph.start()
+        return await graph.result("left"), await graph.result("right")
+
+    assert run(flow()) == ("left", "right")
+
+
+def test_blocking_steps_run_in_a_worker_thread():
+    async def flow():
+        graph = StepGraph()
+        graph.add("thread", lambda: threading.get_ident(), blocking=True)
+        graph.start()
+        return await graph.result("thread")
+
+    assert run(flow()) != threading.get_ident()
+
+
+def test_failure_propagates_to_dependents_without_running_them():
+    async def flow():
+        ran = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def dependent(_):
+            ran.append("dependent")
+
+        graph = StepGraph()
+        graph.add("fail", fail)
+        graph.add("dependent", dependent, ["fail"])
+        graph.start()
+        with pytest.raises(RuntimeError, match="boom"):
+            await graph.result("dependent")
+        return ran
+
+    assert run(flow()) == []
+
+
+def test_unknown_dependency_is_rejected():
+    graph = StepGraph()
+    with pytest.raises(ValueError):
+        graph.add("b", lambda: None, ["a"])
+
+
+def test_timings_cover_started_steps():
+    async def flow():
+        async def wait():
+            await asyncio.sleep(0.01)
+
+        graph = StepGraph()
+        graph.add("a", wait)
+        graph.add("b", lambda _: None, ["a"], blocking=True)
+        graph.start()
+        await graph.result("b")
+        return graph.timings()
+
+    timings = run(flow())
+    assert timings["b"]["start"] >= timings["a"]["start"] + timings["a"]["duration"]
@@ -0,0 +1,19 @@
+# tests/test_text.py
+from src.pdf import PAGE_BREAK
+from src.text import compact_resume_text
+
+
+def test_only_page_edges_are_stripped():
+    pages = [f"Jane Doe\nExperience\n2019\nRole {page}\n{page}" for page in range(1, 3)]
+
+    compacted = compact_resume_text(PAGE_BREAK.join(pages)).text.split("\n")
+
+    assert compacted == [
+        "Jane Doe",
+        "Experience",
+        "2019",
+        "Role 1",
+        "Experience",
+        "2019",
+        "Role 2",
+    ]
@@ -6,10 +6,13 @@ from utils.utils import (
     parse_job_description,
     parse_resumes,
     score_candidates,
+    parse_and_score_candidates,
     rank_candidates,
     generate_email_templates,
 )
-import asyncio
+from utils.text import compaction_stats
+from utils.metrics import metrics
+from utils.llm import run_async
 
 
 # Main App Title
@@ -32,6 +35,11 @@ num_candidates = st.slider(
     "Select the number of candidates to invite for an interview", 1, 4, 2
 )
 
+fused_mode = st.checkbox(
+    "Parse and score each resume in a single LLM call (faster, cheaper)",
+    value=False,
+)
+
 
 # Button to trigger the agent
 if st.button("Run Agent"):
@@ -42,20 +50,34 @@ if st.button("Run Agent"):
     else:
         st.markdown("### Your AI Agent is now processing your inputs...")
         status_text = st.empty()  # placeholder for status updates
+        # Per-run stage timings, token usage and cache hits for the summary below.
+        metrics.reset()
 
         # Step 1: processing resumes
         with st.spinner("Step 1: Processing Inputs..."):
             # raw_data = ingest_inputs(job_description, resume_files)
-            raw_data = asyncio.run(ingest_inputs(job_description, resume_files))
+            raw_data = run_async(ingest_inputs(job_description, resume_files))
             status_text.text("Step 1 complete: Inputs processed.")
             with st.expander("View Processed Inputs", expanded=False):
                 st.json(raw_data)
 
         # Step 2: processing Job description
         with st.spinner("Step 2: Processing Job Description & Resume..."):
-            parsed_requirements = asyncio.run(parse_job_description(raw_data))
-            parsed_resumes = asyncio.run(parse_resumes(resume_files))
-            status_text.text("Step 2 complete: Job description & Resume processed.")
+            tokens_saved_before = compaction_stats()["tokens_saved"]
+            parsed_requirements = run_async(parse_job_description(raw_data))
+            if fused_mode:
+                # One LLM call per resume both parses and scores it.
+                evaluations = run_async(
+                    parse_and_score_candidates(parsed_requirements, resume_files)
+                )
+                parsed_resumes = evaluations["parsed_resumes"]
+            else:
+                parsed_resumes = run_async(parse_resumes(resume_files))
+            tokens_saved = compaction_stats()["tokens_saved"] - tokens_saved_before
+            status_text.text(
+                f"Step 2 complete: Job description & Resume processed "
+                f"({tokens_saved} resume tokens trimmed before the LLM)."
+            )
             with st.expander("View Parsed Job Description", expanded=False):
                 st.json(parsed_requirements)
             with st.expander("View processed Resume", expanded=False):
@@ -64,9 +86,12 @@ if st.button("Run Agent"):
         # Step 3: Score candidates based on the parsed data
         with st.spinner("Step 3: Scoring candidates..."):
             status_text.text("Step 3: Scoring candidates...")
-            candidate_scores = asyncio.run(
-                score_candidates(parsed_requirements, parsed_resumes)
-            )
+            if fused_mode:
+                candidate_scores = evaluations["candidate_scores"]
+            else:
+                candidate_scores = run_async(
+                    score_candidates(parsed_requirements, parsed_resumes)
+                )
             status_text.text("Step 3 complete: Candidates scored.")
             with st.expander("View Resume Summaries", expanded=False):
                 st.json(candidate_scores)
@@ -83,7 +108,7 @@ if st.button("Run Agent"):
         with st.spinner("Step 5: Generating email templates..."):
             status_text.text("Step 5: Generating email templates...")
             # 'num_candidates' is assumed to come from the frontend (e.g., top X candidates)
-            email_templates = asyncio.run(
+            email_templates = run_async(
                 generate_email_templates(
                     ranked_candidates, parsed_requirements, num_candidates
                 )
@@ -94,3 +119,18 @@ if st.button("Run Agent"):
 
         # Final update
         status_text.text("Agent processing complete! Your results are ready.")
+
+        with st.expander("View Pipeline Metrics", expanded=False):
+            st.caption(
+                "Per-stage wall time, queue wait (concurrency and rate limits), LLM "
+                "latency, tokens and cache hit rate for this run. Times are in ms."
+            )
+            stage_metrics = metrics.summary()
+            prompt_tokens = sum(s["prompt_tokens"] for s in stage_metrics.values())
+            cached_tokens = sum(s["cached_tokens"] for s in stage_metrics.values())
+            if prompt_tokens:
+                st.caption(
+                    f"{cached_tokens / prompt_tokens:.0%} of {prompt_tokens} prompt "
+                    "tokens were served from the provider's prompt cache."
+                )
+            st.dataframe(pd.DataFrame.from_dict(stage_metrics, orient="index"))
@@ -1,20 +1,82 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, Awaitable, Callable, Optional
+from contextlib import asynccontextmanager
+from pathlib import Path
 from firecrawl import FirecrawlApp
 import asyncio
 import json
 import os
+import sys
 from dotenv import load_dotenv
-from openai import OpenAI
-import PyPDF2
-import io
 import base64
 
 load_dotenv()
 
-app = FastAPI()
+# Shared helpers live in the sibling utils/ package.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.llm import LLM_MODEL, call_llm, close_async_client
+from utils.ratelimit import bulk, llm_scheduler
+from utils.metrics import metrics
+from utils.jobs import JOB_WORKERS, JobContext, job_queue, start_job_workers
+from utils.pdf import (
+    PDF_EXTRACT_TIMEOUT,
+    extract_pdf_text_async,
+    shutdown_pdf_executor,
+)
+from utils.retrieval import SHORTLIST_SIZE, shortlist
+from utils.index import candidate_index, index_resumes, search_candidates
+from utils.sessions import (
+    SESSION_SAVE_ATTEMPTS,
+    SessionConflict,
+    get_session,
+    job_key,
+    merge_ranking,
+    new_session,
+    save_session,
+    session_lock,
+    session_store,
+    session_view,
+)
+from utils.ranking import rank_candidate_scores, weighted_score
+from utils.emails import (
+    EMAIL_MAX_CONCURRENCY,
+    EMAIL_MODE,
+    build_email_messages,
+    generate_emails,
+)
+from utils.prompts import compact_json, shared_prefix
+from utils.text import compact_resume_text, compaction_stats as get_compaction_stats
+from utils.cache import (
+    IdempotencyConflict,
+    cache_stats as get_cache_stats,
+    idempotency_cache,
+    job_description_cache,
+    job_description_cache_key,
+    pdf_text_cache,
+    resume_cache,
+    resume_cache_key,
+    score_cache,
+    score_cache_key,
+    scrape_cache,
+    sha256_hex,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workers = start_job_workers(job_queue, JOB_HANDLERS, JOB_WORKERS)
+    yield
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await close_async_client()
+    shutdown_pdf_executor()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -25,17 +87,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 firecrawl_app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
-
-def call_llm(messages: list, response_format: Any) -> str:
-    params = {"model": "gpt-4o-2024-08-06", "messages": messages}
-    if response_format:
-        params["response_format"] = response_format
-
-    response = openai_client.beta.chat.completions.parse(**params)
-    return response.choices[0].message.content
+# Maximum number of candidate scoring calls allowed in flight at once.
+SCORING_MAX_CONCURRENCY = int(os.getenv("SCORING_MAX_CONCURRENCY", "8"))
 
 
 class JobDescription(BaseModel):
@@ -93,61 +148,100 @@ class JobDescription(BaseModel):
     responsibilities: list[str]
 
 
-@app.post("/ingest_inputs")
-async def ingest_inputs(request: IngestInputsRequest):
-    job_desc_text = request.job_description.text
+class CandidateEvaluation(BaseModel):
+    resume: Resume = Field(..., description="Details extracted from the candidate's resume")
+    score: CandidateScore = Field(
+        ..., description="The candidate's scores against the job description"
+    )
+
+
+class ScreenRequest(IngestInputsRequest):
+    max_concurrency: Optional[int] = None
+    fused: bool = False
+
 
+class SessionUpdate(BaseModel):
+    job_description: Optional[str] = Field(
+        None, description="Job description text or URL; re-scores only if it changed"
+    )
+    resume_files: List[ResumeFile] = []
+    remove: List[str] = Field([], description="Content hashes of candidates to drop")
+    max_concurrency: Optional[int] = None
+
+
+class CandidateSearchRequest(BaseModel):
+    job_description: JobDescription
+    top_k: int = 10
+    exact: bool = False
+
+
+@metrics.timed("ingest")
+async def scrape_job_description(job_desc_text: str) -> str:
     # If the job description is a URL, scrape it for markdown data
-    if job_desc_text.startswith("http"):
-        try:
-            result = firecrawl_app.scrape_url(
-                job_desc_text, params={"formats": ["markdown"]}
-            )
-            if not result or "markdown" not in result:
-                raise ValueError("Scraping did not return markdown data.")
-            job_desc_text = result.get("markdown", "")
-        except Exception as e:
-            raise Exception(f"Failed to scrape the job description URL: {e}")
-
-    resumes = []
-    for file in request.resume_files:
-        # Remove the Base64 prefix if it exists
-        base64_str = file.content
-        if base64_str.startswith("data:"):
-            base64_str = base64_str.split(",")[1]
-        try:
-            pdf_bytes = base64.b64decode(base64_str)
-        except Exception as e:
-            resumes.append(
-                {
-                    "filename": file.filename,
-                    "error": f"Base64 decoding error: {e}",
-                }
-            )
-            continue
+    if not job_desc_text.startswith("http"):
+        return job_desc_text
+    try:
+        result = await scrape_cache.get(
+            job_desc_text, firecrawl_app.scrape_url, params={"formats": ["markdown"]}
+        )
+        if not result or "markdown" not in result:
+            raise ValueError("Scraping did not return markdown data.")
+        return result.get("markdown", "")
+    except Exception as e:
+        raise Exception(f"Failed to scrape the job description URL: {e}")
 
-        # Use a BytesIO stream instead of writing to disk
-        pdf_io = io.BytesIO(pdf_bytes)
+
+@metrics.timed("ingest")
+async def ingest_resume_file(file: ResumeFile) -> dict:
+    # Remove the Base64 prefix if it exists
+    base64_str = file.content
+    if base64_str.startswith("data:"):
+        base64_str = base64_str.split(",")[1]
+    try:
+        pdf_bytes = base64.b64decode(base64_str)
+    except Exception as e:
+        return {
+            "filename": file.filename,
+            "error": f"Base64 decoding error: {e}",
+        }
+
+    # Previously seen PDFs skip text extraction entirely.
+    content_hash = sha256_hex(pdf_bytes)
+    pdf_text = await pdf_text_cache.aget(content_hash)
+    if pdf_text is None:
+        # CPU-bound extraction runs in the process pool, off the event loop.
         try:
-            pdf_reader = PyPDF2.PdfReader(pdf_io)
-            pdf_text = " ".join(page.extract_text() or "" for page in pdf_reader.pages)
+            with metrics.stage("pdf_extract"):
+                pdf_text = await extract_pdf_text_async(pdf_bytes)
+        except asyncio.TimeoutError:
+            return {
+                "filename": file.filename,
+                "error": f"PDF extraction timed out after {PDF_EXTRACT_TIMEOUT}s",
+            }
         except Exception as e:
-            pdf_text = f"Error processing PDF: {e}"
-        resumes.append(
-            {
+            return {
                 "filename": file.filename,
-                "text": pdf_text,
+                "error": f"Error processing PDF: {e}",
             }
-        )
-    return {"job_description": job_desc_text, "resumes": resumes}
+        await pdf_text_cache.aset(content_hash, pdf_text)
+    return {
+        "filename": file.filename,
+        "text": pdf_text,
+        "content_hash": content_hash,
+    }
 
 
-@app.post("/parse_job_description")
-async def parse_job_description(data: dict):
-    job_text = data.get("job_description", "")
+@metrics.timed("jd_parse")
+async def extract_job_description(job_text: str) -> dict:
     if not job_text:
         raise ValueError("No job description text provided.")
 
+    # Re-screening the same posting reuses the structured result without an LLM call.
+    cache_key = job_description_cache_key(job_text, JobDescription, LLM_MODEL)
+    cached_jd = await job_description_cache.aget(cache_key)
+    if cached_jd is not None:
+        return cached_jd
+
     prompt = (
         "Extract the key job information from the text below. Return only valid JSON "
         "with the following keys: title, company, location, requirements, responsibilities, benefits, experience. "
@@ -168,112 +262,642 @@ async def parse_job_description(data: dict):
     ]
 
     try:
-        llm_output = call_llm(messages, response_format=JobDescription)
+        llm_output = await call_llm(messages, response_format=JobDescription)
         structured_jd = json.loads(llm_output)
     except Exception as e:
         raise Exception(f"Error parsing job description: {e}")
 
+    await job_description_cache.aset(cache_key, structured_jd)
+
     return structured_jd
 
 
+@metrics.timed("resume_parse")
+async def parse_resume_text(resume: dict) -> dict:
+    # Files that failed ingestion carry an error instead of text.
+    if "text" not in resume:
+        return {"error": f"Failed to ingest resume: {resume.get('error', 'no text')}"}
+
+    pdf_text = resume["text"]
+
+    # Resumes parsed before under the same schema and model skip the LLM call.
+    content_hash = resume.get("content_hash") or sha256_hex(pdf_text.encode("utf-8"))
+    cache_key = resume_cache_key(content_hash, Resume, LLM_MODEL)
+    cached_resume = await resume_cache.aget(cache_key)
+    if cached_resume is not None:
+        return cached_resume
+
+    # Trim headers, footers and low-value sections to the resume token budget.
+    pdf_text = compact_resume_text(pdf_text).text
+
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are an assistant that extracts candidate resume details. "
+                "Extract only the information following this JSON schema: "
+                "{ name: string, work_experiences: string[], location: string, "
+                "skills: string[], education: string[], summary?: string, "
+                "certifications?: string[], languages?: string[] }"
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"Extract resume details from the following resume text:\n\n{pdf_text}",
+        },
+    ]
+
+    try:
+        llm_response = await call_llm(messages, response_format=Resume)
+        parsed_resume = json.loads(llm_response)
+        await resume_cache.aset(cache_key, parsed_resume)
+    except Exception as e:
+        metrics.mark_error()
+        parsed_resume = {"error": f"Failed to parse resume using LLM: {e}"}
+
+    return parsed_resume
+
+
+@metrics.timed("score")
+async def score_resume(job_description_text: str, candidate: dict) -> dict:
+    # The same resume against the same job description keeps its earlier score.
+    cache_key = score_cache_key(job_description_text, candidate, CandidateScore, LLM_MODEL)
+    cached_score = await score_cache.aget(cache_key)
+    if cached_score is not None:
+        return {**cached_score, "resume": candidate}
+
+    # Shared system + job description prefix (cacheable), then this candidate.
+    messages = shared_prefix(
+        "You are an unbiased hiring manager. Compare the following job description with the candidate's resume and provide "
+        "scores (0-100) for relevance, experience, and skills. Also compute an overall score that reflects the candidate's fit "
+        "and provide a comment explaining your evaluation. Return only valid JSON using the following schema: "
+        "{ name: string, relevance: number, experience: number, skills: number, overall: number, comment: string }",
+        job_description_text,
+    ) + [
+        {"role": "user", "content": f"Candidate Resume:\n{compact_json(candidate)}"},
+    ]
+
+    try:
+        llm_response = await call_llm(messages, response_format=CandidateScore)
+        score_data = json.loads(llm_response)
+        await score_cache.aset(cache_key, score_data)
+        score_data["resume"] = candidate
+    except Exception as e:
+        metrics.mark_error()
+        score_data = failed_score(candidate, e)
+    return score_data
+
+
+FAILED_SCORE_COMMENT = "Error during evaluation: "
+
+
+def failed_score(candidate: dict, error: Any) -> dict:
+    return {
+        "name": candidate.get("name", "Unknown"),
+        "relevance": 0,
+        "experience": 0,
+        "skills": 0,
+        "overall": 0,
+        "comment": f"{FAILED_SCORE_COMMENT}{error}",
+    }
+
+
+def is_failed_score(score_data: dict) -> bool:
+    return str(score_data.get("comment", "")).startswith(FAILED_SCORE_COMMENT)
+
+
+@metrics.timed("parse_and_score")
+async def parse_and_score_resume(job_description_text: str, resume: dict) -> tuple:
+    """
+    Parses and scores one ingested resume with a single structured-output LLM call.
+
+    Returns a (parsed_resume, score_data) pair in the same shapes that
+    parse_resume_text and score_resume produce. A resume already in the parse cache
+    only needs the scoring call.
+    """
+    if "text" not in resume:
+        parsed_resume = await parse_resume_text(resume)
+        return parsed_resume, failed_score(parsed_resume, parsed_resume["error"])
+
+    pdf_text = resume["text"]
+    content_hash = resume.get("content_hash") or sha256_hex(pdf_text.encode("utf-8"))
+    cache_key = resume_cache_key(content_hash, Resume, LLM_MODEL)
+    cached_resume = await resume_cache.aget(cache_key)
+    if cached_resume is not None:
+        return cached_resume, await score_resume(job_description_text, cached_resume)
+
+    pdf_text = compact_resume_text(pdf_text).text
+
+    # Shared system + job description prefix (cacheable), then this candidate.
+    messages = shared_prefix(
+        "You are an unbiased hiring manager. First extract the candidate's resume details "
+        "following this JSON schema: { name: string, work_experiences: string[], location: string, "
+        "skills: string[], education: string[], summary?: string, certifications?: string[], "
+        "languages?: string[] }. Then compare the resume with the job description and provide "
+        "scores (0-100) for relevance, experience, and skills, an overall score that reflects the "
+        "candidate's fit, and a comment explaining your evaluation, following this JSON schema: "
+        "{ name: string, relevance: number, experience: number, skills: number, overall: number, comment: string }. "
+        "Return only valid JSON of the form { resume: ..., score: ... }.",
+        job_description_text,
+    ) + [
+        {"role": "user", "content": f"Candidate Resume Text:\n{pdf_text}"},
+    ]
+
+    try:
+        llm_response = await call_llm(messages, response_format=CandidateEvaluation)
+        evaluation = json.loads(llm_response)
+    except Exception as e:
+        metrics.mark_error()
+        parsed_resume = {"error": f"Failed to parse resume using LLM: {e}"}
+        return parsed_resume, failed_score(parsed_resume, e)
+
+    parsed_resume = evaluation["resume"]
+    await resume_cache.aset(cache_key, parsed_resume)
+    score_data = evaluation["score"]
+    score_data["resume"] = parsed_resume
+    return parsed_resume, score_data
+
+
+@app.post("/ingest_inputs")
+async def ingest_inputs(request: IngestInputsRequest):
+    job_desc_text = await scrape_job_description(request.job_description.text)
+    resumes = await asyncio.gather(
+        *(ingest_resume_file(file) for file in request.resume_files)
+    )
+    return {"job_description": job_desc_text, "resumes": list(resumes)}
+
+
+@app.post("/parse_job_description")
+async def parse_job_description(data: dict):
+    return await extract_job_description(data.get("job_description", ""))
+
+
+async def run_idempotent(
+    path: str,
+    data: Any,
+    compute: Callable[[], Awaitable[Any]],
+    idempotency_key: Optional[str],
+) -> Any:
+    """
+    Runs an endpoint's work once per distinct request.
+
+    Duplicate submissions (a double click, or a client retrying after a timeout)
+    attach to the request already in flight or get its stored response, matched by
+    the Idempotency-Key header or, without one, by the request body.
+    """
+    try:
+        return await idempotency_cache.run(path, data, compute, idempotency_key)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 @app.post("/parse_resumes")
-async def parse_resumes(data: dict):
+@bulk
+async def parse_resumes(data: dict, idempotency_key: Optional[str] = Header(None)):
+    return await run_idempotent(
+        "/parse_resumes", data, lambda: parse_resume_batch(data), idempotency_key
+    )
+
+
+async def parse_resume_batch(
+    data: dict, on_result: Optional[Callable[[int, Any], Awaitable[None]]] = None
+) -> dict:
     resume_files = data.get("resume_files", [])
-    parsed_resumes = []
-
-    for resume in resume_files:
-
-        pdf_text = resume["text"]
-        print(pdf_text)
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are an assistant that extracts candidate resume details. "
-                    "Extract only the information following this JSON schema: "
-                    "{ name: string, work_experiences: string[], location: string, "
-                    "skills: string[], education: string[], summary?: string, "
-                    "certifications?: string[], languages?: string[] }"
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"Extract resume details from the following resume text:\n\n{pdf_text}",
-            },
-        ]
+    max_concurrency = int(data.get("max_concurrency", SCORING_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-        try:
-            llm_response = call_llm(messages, response_format=Resume)
-            parsed_resume = json.loads(llm_response)
-        except Exception as e:
-            parsed_resume = {"error": f"Failed to parse resume using LLM: {e}"}
+    async def parse(index: int, resume: dict) -> dict:
+        async with metrics.queued(semaphore):
+            parsed = await parse_resume_text(resume)
+        if on_result:
+            await on_result(index, parsed)
+        return parsed
 
-        parsed_resumes.append(parsed_resume)
+    parsed_resumes = await asyncio.gather(
+        *(parse(index, resume) for index, resume in enumerate(resume_files))
+    )
 
+    # Keep every parsed resume searchable for future postings.
+    await index_resumes(
+        [
+            (resume.get("content_hash") or sha256_hex(resume["text"].encode("utf-8")), parsed)
+            for resume, parsed in zip(resume_files, parsed_resumes)
+            if "text" in resume
+        ]
+    )
     return {"parsed_resumes": parsed_resumes}
 
 
 @app.post("/score_candidates")
-async def score_candidates(data: dict):
+@bulk
+async def score_candidates(data: dict, idempotency_key: Optional[str] = Header(None)):
+    return await run_idempotent(
+        "/score_candidates", data, lambda: score_candidate_batch(data), idempotency_key
+    )
+
+
+async def score_candidate_batch(
+    data: dict, on_result: Optional[Callable[[int, Any], Awaitable[None]]] = None
+) -> list:
     parsed_requirements = data.get("parsed_requirements", {})
     parsed_resumes = data.get("parsed_resumes", {})
-    candidate_scores = []
+    max_concurrency = int(data.get("max_concurrency", SCORING_MAX_CONCURRENCY))
+    shortlist_size = int(data.get("shortlist_size", SHORTLIST_SIZE))
 
-    job_description_text = json.dumps(parsed_requirements)
+    job_description_text = compact_json(parsed_requirements)
     resume_list = parsed_resumes.get("parsed_resumes", [])
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-    for candidate in resume_list:
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are an unbiased hiring manager. Compare the following job description with the candidate's resume and provide "
-                    "scores (0-100) for relevance, experience, and skills. Also compute an overall score that reflects the candidate's fit "
-                    "and provide a comment explaining your evaluation. Return only valid JSON using the following schema: "
-                    "{ name: string, relevance: number, experience: number, skills: number, overall: number, comment: string }"
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Job Description:\n{job_description_text}\n\n"
-                    f"Candidate Resume:\n{json.dumps(candidate)}"
-                ),
-            },
-        ]
+    # Optionally send only the embedding shortlist to the LLM.
+    shortlisted = set(range(len(resume_list)))
+    similarities = None
+    if shortlist_size and len(resume_list) > shortlist_size:
+        indices, similarities = await shortlist(
+            parsed_requirements, resume_list, shortlist_size
+        )
+        shortlisted = set(indices.tolist())
 
-        try:
-            llm_response = call_llm(messages, response_format=CandidateScore)
-            score_data = json.loads(llm_response)
+    async def score_candidate(index: int, candidate: dict) -> dict:
+        if index not in shortlisted:
+            score_data = failed_score(candidate, None)
+            score_data["comment"] = (
+                "Not shortlisted for detailed evaluation "
+                f"(similarity {similarities[index]:.2f} to the job description)."
+            )
             score_data["resume"] = candidate
-        except Exception as e:
-            score_data = {
-                "name": candidate.get("name", "Unknown"),
-                "relevance": 0,
-                "experience": 0,
-                "skills": 0,
-                "overall": 0,
-                "comment": f"Error during evaluation: {e}",
-            }
+        else:
+            async with metrics.queued(semaphore):
+                score_data = await score_resume(job_description_text, candidate)
+        if on_result:
+            await on_result(index, score_data)
+        return score_data
+
+    # gather() keeps results in input order regardless of completion order.
+    candidate_scores = await asyncio.gather(
+        *(score_candidate(index, candidate) for index, candidate in enumerate(resume_list))
+    )
+    return list(candidate_scores)
+
+
+@app.post("/parse_and_score")
+@bulk
+async def parse_and_score(data: dict, idempotency_key: Optional[str] = Header(None)):
+    """
+    Fused alternative to /parse_resumes followed by /score_candidates.
+
+    Takes {"parsed_requirements", "resume_files", "max_concurrency"?} and returns
+    {"parsed_resumes": <the /parse_resumes response>, "candidate_scores": <the
+    /score_candidates response>}, using one LLM call per candidate instead of two.
+    """
+    return await run_idempotent(
+        "/parse_and_score", data, lambda: parse_and_score_batch(data), idempotency_key
+    )
+
+
+async def parse_and_score_batch(
+    data: dict, on_result: Optional[Callable[[int, Any], Awaitable[None]]] = None
+) -> dict:
+    parsed_requirements = data.get("parsed_requirements", {})
+    resume_files = data.get("resume_files", [])
+    max_concurrency = int(data.get("max_concurrency", SCORING_MAX_CONCURRENCY))
 
-        candidate_scores.append(score_data)
+    job_description_text = compact_json(parsed_requirements)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-    return candidate_scores
+    async def evaluate(index: int, resume: dict) -> tuple:
+        async with metrics.queued(semaphore):
+            evaluation = await parse_and_score_resume(job_description_text, resume)
+        if on_result:
+            await on_result(index, {"resume": evaluation[0], "score": evaluation[1]})
+        return evaluation
+
+    evaluations = await asyncio.gather(
+        *(evaluate(index, resume) for index, resume in enumerate(resume_files))
+    )
+    return {
+        "parsed_resumes": {"parsed_resumes": [parsed for parsed, _ in evaluations]},
+        "candidate_scores": [score for _, score in evaluations],
+    }
 
 
 @app.post("/rank_candidates")
 async def rank_candidates(data: dict):
-    candidate_scores = data.get("candidate_scores", [])
-    for candidate in candidate_scores:
-        relevance = candidate.get("relevance", 0)
-        experience = candidate.get("experience", 0)
-        skills = candidate.get("skills", 0)
-        overall = candidate.get("overall", 0)
-        candidate["avg_score"] = (relevance + experience + skills + overall) / 4.0
-
-    return sorted(
-        candidate_scores, key=lambda candidate: candidate["avg_score"], reverse=True
+    """
+    Ranks scored candidates by weighted score.
+
+    Optional body keys: "weights" ({dimension: weight}), "offset" and "limit" for
+    pagination. Returns the requested page, best first.
+    """
+    limit = data.get("limit")
+    try:
+        with metrics.stage("rank"):
+            return rank_candidate_scores(
+                data.get("candidate_scores", []),
+                data.get("weights"),
+                int(data.get("offset", 0)),
+                None if limit is None else int(limit),
+            )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/screen")
+async def screen(request: ScreenRequest):
+    """
+    Runs the whole screening pipeline and streams progress as NDJSON.
+
+    Each resume moves through ingest -> parse -> score on its own, so the first
+    candidate is reported as soon as it is scored rather than after the whole batch.
+    Events, one JSON object per line:
+
+        {"event": "job_description", "job_description": {...}}
+        {"event": "parsed", "index": int, "filename": str, "resume": {...}}
+        {"event": "scored", "index": int, "filename": str, "score": {...}, "rank": int}
+        {"event": "ranking", "candidates": [...]}
+        {"event": "error", "stage": str, "error": str}
+
+    "rank" on a scored event is the candidate's provisional position among those
+    scored so far; the final "ranking" event carries the complete ordering.
+    """
+    max_concurrency = request.max_concurrency or SCORING_MAX_CONCURRENCY
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def prepare_job_description() -> dict:
+        job_desc_text = await scrape_job_description(request.job_description.text)
+        return await extract_job_description(job_desc_text)
+
+    async def events():
+        queue: asyncio.Queue = asyncio.Queue()
+        scored: list = []
+        jd_task = asyncio.create_task(prepare_job_description())
+
+        async def process(index: int, file: ResumeFile):
+            try:
+                resume = await ingest_resume_file(file)
+                if request.fused:
+                    # One call parses and scores, so it must wait for the JD.
+                    job_description_text = compact_json(await jd_task)
+                    async with metrics.queued(semaphore):
+                        parsed_resume, score = await parse_and_score_resume(
+                            job_description_text, resume
+                        )
+                else:
+                    async with metrics.queued(semaphore):
+                        parsed_resume = await parse_resume_text(resume)
+                await queue.put(
+                    {
+                        "event": "parsed",
+                        "index": index,
+                        "filename": file.filename,
+                        "resume": parsed_resume,
+                    }
+                )
+                if "error" in parsed_resume:
+                    return
+                if not request.fused:
+                    job_description_text = compact_json(await jd_task)
+                    async with metrics.queued(semaphore):
+                        score = await score_resume(
+                            job_description_text, parsed_resume
+                        )
+                score["avg_score"] = weighted_score(score)
+                scored.append(score)
+                rank = 1 + sum(1 for s in scored if s["avg_score"] > score["avg_score"])
+                await queue.put(
+                    {
+                        "event": "scored",
+                        "index": index,
+                        "filename": file.filename,
+                        "score": score,
+                        "rank": rank,
+                    }
+                )
+            except Exception as e:
+                await queue.put(
+                    {"event": "error", "stage": "candidate", "index": index, "error": str(e)}
+                )
+            finally:
+                # Sentinel: this candidate has no more events.
+                await queue.put(None)
+
+        tasks = [jd_task] + [
+            asyncio.create_task(process(index, file))
+            for index, file in enumerate(request.resume_files)
+        ]
+
+        try:
+            try:
+                parsed_requirements = await jd_task
+            except Exception as e:
+                yield json.dumps(
+                    {"event": "error", "stage": "job_description", "error": str(e)}
+                ) + "\n"
+                return
+            yield json.dumps(
+                {"event": "job_description", "job_description": parsed_requirements}
+            ) + "\n"
+
+            remaining = len(request.resume_files)
+            while remaining:
+                event = await queue.get()
+                if event is None:
+                    remaining -= 1
+                    continue
+                yield json.dumps(event) + "\n"
+
+            yield json.dumps(
+                {"event": "ranking", "candidates": rank_candidate_scores(scored)}
+            ) + "\n"
+        finally:
+            # Stop outstanding work, the job description included, if the client
+            # disconnects mid-stream.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def update_session(session: dict, update: SessionUpdate) -> dict:
+    """
+    Applies an update to a screening session, recomputing only what changed.
+
+    Resumes already in the session (same content hash) are skipped outright; a new
+    file with the name of an existing one replaces it. New resumes are parsed and
+    scored; a changed job description re-scores every candidate but re-uses their
+    parsed resumes. Rankings are merged rather than rebuilt when the job
+    description is unchanged. A candidate whose scoring call fails is not ranked
+    with a zero score: it is kept in "unscored", reported under "errors", and
+    scored again on every later update until it succeeds.
+
+    Returns:
+        dict: Counts of added, replaced, removed, unchanged, rescored and failed
+              candidates, and whether the job description changed.
+    """
+    candidates = session["candidates"]
+    # Sessions saved before "unscored" existed do not have it.
+    unscored = session.setdefault("unscored", {})
+    delta = {
+        "added": 0,
+        "replaced": 0,
+        "removed": 0,
+        "unchanged": 0,
+        "rescored": 0,
+        "failed": 0,
+        "job_description_changed": False,
+    }
+    semaphore = asyncio.Semaphore(
+        max(1, update.max_concurrency or SCORING_MAX_CONCURRENCY)
+    )
+
+    if update.job_description is not None:
+        job_desc_text = await scrape_job_description(update.job_description)
+        parsed_requirements = await extract_job_description(job_desc_text)
+        key = job_key(parsed_requirements)
+        if key != session["job_key"]:
+            session["job_description"], session["job_key"] = parsed_requirements, key
+            delta["job_description_changed"] = True
+    if session["job_description"] is None:
+        raise ValueError("The session has no job description yet.")
+
+    for content_hash in update.remove:
+        removed = candidates.pop(content_hash, None) or unscored.pop(content_hash, None)
+        if removed is not None:
+            delta["removed"] += 1
+
+    ingested = await asyncio.gather(
+        *(ingest_resume_file(file) for file in update.resume_files)
+    )
+    hash_by_filename = {
+        record["filename"]: key
+        for records in (candidates, unscored)
+        for key, record in records.items()
+    }
+    new_resumes = []
+    for file, resume in zip(update.resume_files, ingested):
+        if "error" in resume:
+            session["errors"][file.filename] = resume["error"]
+            continue
+        session["errors"].pop(file.filename, None)
+        content_hash = resume["content_hash"]
+        if content_hash in candidates or content_hash in unscored:
+            delta["unchanged"] += 1
+            continue
+        previous = hash_by_filename.get(file.filename)
+        if previous is not None and (
+            candidates.pop(previous, None) or unscored.pop(previous, None)
+        ):
+            delta["replaced"] += 1
+        else:
+            delta["added"] += 1
+        new_resumes.append(resume)
+
+    async def parse(resume: dict) -> dict:
+        async with metrics.queued(semaphore):
+            return await parse_resume_text(resume)
+
+    parsed_resumes = await asyncio.gather(*(parse(resume) for resume in new_resumes))
+    to_score = {}
+    for resume, parsed_resume in zip(new_resumes, parsed_resumes):
+        if "error" in parsed_resume:
+            session["errors"][resume["filename"]] = parsed_resume["error"]
+        else:
+            to_score[resume["content_hash"]] = (resume["filename"], parsed_resume)
+    await index_resumes(
+        [(content_hash, parsed) for content_hash, (_, parsed) in to_score.items()]
+    )
+    if delta["job_description_changed"]:
+        # Parses stay valid; only the scores belong to the old job description.
+        for content_hash, record in candidates.items():
+            to_score.setdefault(content_hash, (record["filename"], record["resume"]))
+    for content_hash, record in unscored.items():
+        to_score.setdefault(content_hash, (record["filename"], record["resume"]))
+
+    job_description_text = compact_json(session["job_description"])
+
+    async def score(content_hash: str, filename: str, parsed_resume: dict) -> None:
+        async with metrics.queued(semaphore):
+            score_data = await score_resume(job_description_text, parsed_resume)
+        if is_failed_score(score_data):
+            # An old score belongs to the old job description; drop it too.
+            candidates.pop(content_hash, None)
+            unscored[content_hash] = {"filename": filename, "resume": parsed_resume}
+            session["errors"][filename] = score_data["comment"]
+            delta["failed"] += 1
+            return
+        unscored.pop(content_hash, None)
+        session["errors"].pop(filename, None)
+        score_data["resume"] = parsed_resume
+        score_data["avg_score"] = weighted_score(score_data)
+        score_data["filename"] = filename
+        score_data["content_hash"] = content_hash
+        candidates[content_hash] = score_data
+
+    await asyncio.gather(
+        *(score(key, filename, parsed) for key, (filename, parsed) in to_score.items())
+    )
+    delta["rescored"] = len(to_score) - delta["failed"]
+    session["ranking"] = merge_ranking(
+        [] if delta["job_description_changed"] else session["ranking"],
+        candidates,
+        list(to_score),
     )
+    return delta
+
+
+@app.post("/sessions")
+async def create_session(update: SessionUpdate):
+    """
+    Starts a screening session from a job description and any initial resumes.
+
+    The response holds the session_id, the ranked candidates (each with its
+    "content_hash" and "filename") and a "delta" of what was computed.
+    """
+    if update.job_description is None:
+        raise HTTPException(status_code=422, detail="job_description is required")
+    session = new_session()
+    delta = await update_session(session, update)
+    await asyncio.to_thread(save_session, session)
+    await asyncio.to_thread(session_store.prune)
+    return {**session_view(session), "delta": delta}
+
+
+@app.patch("/sessions/{session_id}")
+async def patch_session(session_id: str, update: SessionUpdate):
+    """
+    Adds, replaces or removes resumes, or edits the job description, of a session.
+
+    Only the changed inputs are recomputed, so adding 20 resumes to a 500-candidate
+    session costs 20 parse and score calls. If another server process saves the
+    session in the meantime, the update is re-applied on top of its version (the
+    parse and score caches make that cheap); 409 once SESSION_SAVE_ATTEMPTS run out.
+    """
+    async with session_lock(session_id):
+        for attempt in range(1, SESSION_SAVE_ATTEMPTS + 1):
+            session = await asyncio.to_thread(get_session, session_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+            try:
+                delta = await update_session(session, update)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            try:
+                await asyncio.to_thread(save_session, session)
+            except SessionConflict as e:
+                if attempt == SESSION_SAVE_ATTEMPTS:
+                    raise HTTPException(status_code=409, detail=str(e))
+                continue
+            return {**session_view(session), "delta": delta}
+
+
+@app.get("/sessions/{session_id}")
+async def read_session(
+    session_id: str, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)
+):
+    """Returns one page of a session's ranking."""
+    session = await asyncio.to_thread(get_session, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session_view(session, offset, limit)
 
 
 @app.post("/generate_email_templates")
@@ -288,61 +912,263 @@ async def generate_email_templates(data: dict):
             detail="Missing one or more required fields: candidate, job_description, email_type",
         )
 
-    candidate_name = candidate.get("name", "Candidate")
-
-    # Build the messages for the LLM based on the email type
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are an unbiased HR professional. Your task is to craft a clear, concise, and "
-                "professional email response based on the provided job description and candidate evaluation. "
-                "Return only the email body as plain text."
-            ),
-        },
-        {
-            "role": "user",
-            "content": (
-                f"Job Description (structured):\n{json.dumps(job_description, indent=2)}\n\n"
-                f"Candidate Evaluation (structured):\n{json.dumps(candidate, indent=2)}\n\n"
-            ),
-        },
-    ]
-
-    if email_type == "accept":
-        messages.append(
-            {
-                "role": "assistant",
-                "content": (
-                    "Please create an invitation email inviting the candidate for a quick call. "
-                    "The email should be friendly, professional, and include a scheduling request."
-                ),
-            }
-        )
-    elif email_type == "reject":
-        messages.append(
-            {
-                "role": "assistant",
-                "content": (
-                    "Please create a polite rejection email. Include constructive feedback and key "
-                    "suggestions for improvement based on the candidate's evaluation."
-                ),
-            }
-        )
-    else:
+    if email_type not in ("accept", "reject"):
         raise HTTPException(
             status_code=400,
             detail="Invalid email_type. Must be either 'accept' or 'reject'.",
         )
+    messages = build_email_messages(job_description, candidate, email_type)
 
     try:
-        email_body = call_llm(messages, response_format=None)
+        with metrics.stage("email"):
+            email_body = await call_llm(messages)
     except Exception as e:
         raise Exception(f"Error generating email: {e}")
 
     return {"email_body": email_body}
 
 
+@app.post("/generate_email_batch")
+@bulk
+async def generate_email_batch(
+    data: dict, idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Writes invitation and rejection emails for a whole ranked list at once.
+
+    Body: "ranked_candidates", "job_description", "top_x" (how many to invite), and
+    optionally "mode" ("skeleton" or "bespoke") and "max_concurrency". Skeleton mode
+    writes one shared email per accept/reject and personalizes it in batches.
+    """
+    return await run_idempotent(
+        "/generate_email_batch", data, lambda: write_email_batch(data), idempotency_key
+    )
+
+
+async def write_email_batch(data: dict) -> dict:
+    ranked_candidates = data.get("ranked_candidates", [])
+    job_description = data.get("job_description")
+    if not job_description:
+        raise HTTPException(status_code=400, detail="Missing job_description")
+    mode = data.get("mode", EMAIL_MODE)
+    if mode not in ("skeleton", "bespoke"):
+        raise HTTPException(
+            status_code=400, detail="Invalid mode. Must be 'skeleton' or 'bespoke'."
+        )
+    top_x = int(data.get("top_x", 0))
+    semaphore = asyncio.Semaphore(
+        max(1, int(data.get("max_concurrency", EMAIL_MAX_CONCURRENCY)))
+    )
+    invited, rejected = ranked_candidates[:top_x], ranked_candidates[top_x:]
+    invitation_bodies, rejection_bodies = await asyncio.gather(
+        generate_emails(job_description, invited, "accept", mode, semaphore),
+        generate_emails(job_description, rejected, "reject", mode, semaphore),
+    )
+    return {
+        "invitations": [
+            {"name": candidate.get("name", "Candidate"), "email_body": body}
+            for candidate, body in zip(invited, invitation_bodies)
+        ],
+        "rejections": [
+            {"name": candidate.get("name", "Candidate"), "email_body": body}
+            for candidate, body in zip(rejected, rejection_bodies)
+        ],
+    }
+
+
+@app.post("/search_candidates")
+async def search_candidates_endpoint(request: CandidateSearchRequest):
+    """Ranks previously parsed candidates against a structured job description."""
+    try:
+        candidates = await search_candidates(
+            request.job_description.model_dump(), request.top_k, request.exact
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"candidates": candidates}
+
+
+@app.delete("/candidates/{content_hash}")
+async def delete_candidate(content_hash: str):
+    """Removes a candidate from the search index."""
+    deleted = await asyncio.to_thread(candidate_index.delete, content_hash)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Candidate not indexed")
+    return {"deleted": content_hash}
+
+
+@app.get("/candidate_index_stats")
+async def candidate_index_stats():
+    return await asyncio.to_thread(candidate_index.stats)
+
+
+async def parse_resumes_job(payload: dict, job: JobContext) -> dict:
+    await job.set_total("parsed", len(payload.get("resume_files", [])))
+    return await parse_resume_batch(
+        payload, lambda index, parsed: job.add_result("parsed", index, parsed)
+    )
+
+
+async def score_candidates_job(payload: dict, job: JobContext) -> list:
+    resume_list = payload.get("parsed_resumes", {}).get("parsed_resumes", [])
+    await job.set_total("scored", len(resume_list))
+    return await score_candidate_batch(
+        payload, lambda index, score: job.add_result("scored", index, score)
+    )
+
+
+async def parse_and_score_job(payload: dict, job: JobContext) -> dict:
+    await job.set_total("evaluated", len(payload.get("resume_files", [])))
+    return await parse_and_score_batch(
+        payload, lambda index, evaluation: job.add_result("evaluated", index, evaluation)
+    )
+
+
+async def screen_job(payload: dict, job: JobContext) -> dict:
+    """
+    The /screen pipeline as a background job.
+
+    Stages: "job_description" (one item), then "parsed" and "scored" per resume.
+    Resumes that fail to parse are counted as skipped in the "scored" stage. The
+    result is {"job_description", "candidates" (ranked), "errors"}.
+    """
+    request = ScreenRequest.model_validate(payload)
+    await job.set_total("job_description", 1)
+    await job.set_total("parsed", len(request.resume_files))
+    await job.set_total("scored", len(request.resume_files))
+    semaphore = asyncio.Semaphore(
+        max(1, request.max_concurrency or SCORING_MAX_CONCURRENCY)
+    )
+
+    job_desc_text = await scrape_job_description(request.job_description.text)
+    parsed_requirements = await extract_job_description(job_desc_text)
+    await job.add_result("job_description", 0, parsed_requirements)
+    job_description_text = compact_json(parsed_requirements)
+    errors = []
+
+    async def process(index: int, file: ResumeFile) -> Optional[dict]:
+        resume = await ingest_resume_file(file)
+        async with metrics.queued(semaphore):
+            if request.fused:
+                parsed_resume, score = await parse_and_score_resume(
+                    job_description_text, resume
+                )
+            else:
+                parsed_resume = await parse_resume_text(resume)
+        await job.add_result("parsed", index, parsed_resume)
+        if "error" in parsed_resume:
+            errors.append(
+                {"index": index, "filename": file.filename, "error": parsed_resume["error"]}
+            )
+            await job.skip("scored")
+            return None
+        if not request.fused:
+            async with metrics.queued(semaphore):
+                score = await score_resume(job_description_text, parsed_resume)
+        score["avg_score"] = weighted_score(score)
+        await job.add_result("scored", index, score)
+        return score
+
+    scores = await asyncio.gather(
+        *(process(index, file) for index, file in enumerate(request.resume_files))
+    )
+    return {
+        "job_description": parsed_requirements,
+        "candidates": rank_candidate_scores([score for score in scores if score]),
+        "errors": errors,
+    }
+
+
+# Job kinds accepted by POST /jobs/{kind}; each takes the matching endpoint's body.
+JOB_HANDLERS = {
+    "parse_resumes": parse_resumes_job,
+    "score_candidates": score_candidates_job,
+    "parse_and_score": parse_and_score_job,
+    "screen": screen_job,
+}
+
+
+@app.post("/jobs/{kind}", status_code=202)
+async def submit_job(kind: str, data: dict):
+    """
+    Queues a long-running request and returns immediately with its job id.
+
+    `kind` is one of JOB_HANDLERS and the body is what the synchronous endpoint of
+    the same name takes. Poll GET /jobs/{job_id} for progress and the result.
+    """
+    if kind not in JOB_HANDLERS:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown job kind. Use one of {sorted(JOB_HANDLERS)}"
+        )
+    if kind == "screen":
+        try:
+            ScreenRequest.model_validate(data)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors())
+    job_id = await asyncio.to_thread(job_queue.submit, kind, data)
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_result: bool = True):
+    """Returns a job's status, per-stage progress and, once completed, its result."""
+    job = await asyncio.to_thread(job_queue.get, job_id, include_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(
+    job_id: str, stage: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1)
+):
+    """Pages through the partial results a job has reported for one stage so far."""
+    items = await asyncio.to_thread(job_queue.results, job_id, stage, offset, limit)
+    return {"job_id": job_id, "stage": stage, "offset": offset, "items": items}
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancels a queued or running job; its worker stops at the next heartbeat."""
+    if not await asyncio.to_thread(job_queue.cancel, job_id):
+        raise HTTPException(status_code=409, detail="Job not found or already finished")
+    return {"job_id": job_id, "status": "cancelled"}
+
+
+@app.get("/job_stats")
+async def job_stats():
+    return await asyncio.to_thread(job_queue.stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency, queue wait, token, cache and error metrics for Prometheus."""
+    return PlainTextResponse(
+        metrics.prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/metrics/summary")
+async def metrics_summary():
+    """The same metrics as JSON, with p50/p95/p99 in milliseconds per stage."""
+    return metrics.summary()
+
+
+@app.get("/llm_stats")
+async def llm_stats():
+    return llm_scheduler.stats()
+
+
+@app.get("/cache_stats")
+async def cache_stats():
+    return get_cache_stats()
+
+
+@app.get("/compaction_stats")
+async def compaction_stats():
+    return get_compaction_stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,87 @@
+# benchmarks/bench_emails.py
+"""
+Compares bespoke and skeleton email generation for a large rejection batch, using a
+simulated LLM so no API calls are made.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_emails --candidates 500 --invite 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before anything from utils or backend: keeps the run off the real caches.
+import benchmarks.isolation  # noqa: F401
+
+import utils.emails as emails
+import utils.utils as screening
+from utils.cache import email_skeleton_cache
+from benchmarks.bench_fused import JOB_DESCRIPTION, report
+from benchmarks.synthetic import SimulatedLLM, Stopwatch, make_parsed_resumes, sentence
+
+
+class EmailLLM(SimulatedLLM):
+    """Answers a batched personalization call with one paragraph per candidate."""
+
+    def fake_response(self, messages, response_format=None):
+        if response_format is not emails.EmailPersonalizations:
+            return super().fake_response(messages, response_format)
+        candidates = messages[-1]["content"].split("Candidates (index: evaluation):\n")[1]
+        items = [
+            {"candidate": index, "personalization": sentence(self.rng, 30)}
+            for index in range(len(candidates.splitlines()))
+        ]
+        return json.dumps({"items": items})
+
+
+def make_ranked_candidates(count):
+    return [
+        {
+            "name": resume["name"],
+            "relevance": 90 - index % 90,
+            "experience": 80 - index % 80,
+            "skills": 85 - index % 85,
+            "overall": 88 - index % 88,
+            "comment": "Solid background but limited experience with the core stack.",
+            "resume": resume,
+        }
+        for index, resume in enumerate(make_parsed_resumes(count))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--invite", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--time-scale", type=float, default=0.02)
+    args = parser.parse_args()
+
+    candidates = make_ranked_candidates(args.candidates)
+    llm = EmailLLM(time_scale=args.time_scale)
+    emails.call_llm = llm
+
+    print(
+        f"{args.candidates} candidates ({args.invite} invited), concurrency "
+        f"{args.concurrency}; per-candidate figures, wall_s is real time with LLM "
+        f"sleeps scaled by {args.time_scale}"
+    )
+    for mode in ("bespoke", "skeleton"):
+        email_skeleton_cache.clear()
+        start = len(llm.calls)
+        with Stopwatch() as watch:
+            asyncio.run(
+                screening.generate_email_templates(
+                    candidates, JOB_DESCRIPTION, args.invite, mode, args.concurrency
+                )
+            )
+        report(mode, llm.summary(start), watch.elapsed, args.candidates)
+
+
+if __name__ == "__main__":
+    main()
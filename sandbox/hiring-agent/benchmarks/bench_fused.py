@@ -0,0 +1,93 @@
+# benchmarks/bench_fused.py
+"""
+Compares the two-step (parse_resumes + score_candidates) flow with the fused
+parse_and_score_candidates mode, using a simulated LLM so no API calls are made.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_fused --candidates 50 --concurrency 8
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before anything from utils or backend: keeps the run off the real caches.
+import benchmarks.isolation  # noqa: F401
+
+import utils.utils as screening
+from utils.cache import resume_cache
+from benchmarks.synthetic import SimulatedLLM, Stopwatch, make_resume_corpus
+
+# gpt-4o list prices, USD per million tokens.
+INPUT_PRICE = 2.50
+OUTPUT_PRICE = 10.00
+
+JOB_DESCRIPTION = {
+    "title": "Senior Data Engineer",
+    "company": "Acme",
+    "location": "Remote",
+    "requirements": ["5+ years Python", "SQL", "Airflow", "AWS", "Spark"],
+    "responsibilities": ["Build data pipelines", "Own data quality", "Mentor"],
+}
+
+
+async def run_two_step(pdfs, concurrency):
+    uploads = [io.BytesIO(pdf) for pdf in pdfs]
+    parsed = await screening.parse_resumes(uploads)
+    return await screening.score_candidates(JOB_DESCRIPTION, parsed, concurrency)
+
+
+async def run_fused(pdfs, concurrency):
+    uploads = [io.BytesIO(pdf) for pdf in pdfs]
+    result = await screening.parse_and_score_candidates(
+        JOB_DESCRIPTION, uploads, concurrency
+    )
+    return result["candidate_scores"]
+
+
+def report(name, summary, elapsed, candidates):
+    cost = (
+        summary["prompt_tokens"] * INPUT_PRICE
+        + summary["completion_tokens"] * OUTPUT_PRICE
+    ) / 1_000_000
+    print(
+        f"{name:<10} calls={summary['calls']:<5} "
+        f"llm_s/cand={summary['llm_seconds'] / candidates:6.2f} "
+        f"prompt_tok/cand={summary['prompt_tokens'] / candidates:7.0f} "
+        f"completion_tok/cand={summary['completion_tokens'] / candidates:6.0f} "
+        f"cost/cand=${cost / candidates:.4f} "
+        f"wall_s={elapsed:6.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--time-scale", type=float, default=0.02)
+    args = parser.parse_args()
+
+    pdfs = make_resume_corpus(args.candidates, 1, args.pages)
+    llm = SimulatedLLM(time_scale=args.time_scale)
+    screening.call_llm = llm
+
+    print(
+        f"{args.candidates} candidates, up to {args.pages} pages, "
+        f"concurrency {args.concurrency}; llm_s is simulated provider time, "
+        f"wall_s is real time with LLM sleeps scaled by {args.time_scale}"
+    )
+    for name, runner in (("two-step", run_two_step), ("fused", run_fused)):
+        resume_cache.clear()
+        start = len(llm.calls)
+        with Stopwatch() as watch:
+            asyncio.run(runner(pdfs, args.concurrency))
+        report(name, llm.summary(start), watch.elapsed, args.candidates)
+
+
+if __name__ == "__main__":
+    main()
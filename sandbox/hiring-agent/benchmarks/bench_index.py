@@ -0,0 +1,103 @@
+# benchmarks/bench_index.py
+"""
+Measures insert throughput and search latency of the persistent candidate index.
+
+Synthetic parsed resumes are embedded with the offline HashingEmbedder and appended
+to a fresh index in a temporary directory. The benchmark then times exact and IVF
+searches for a set of job descriptions and reports IVF recall against exact search.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_index --candidates 100000 --queries 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.index import CandidateIndex
+from utils.retrieval import HashingEmbedder, job_description_text, resume_text
+from benchmarks.synthetic import SKILLS, Stopwatch, make_parsed_resumes
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 32, 64])
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder(args.dim)
+    index = CandidateIndex(tempfile.mkdtemp(prefix="hiring-agent-index-"), ivf_min_rows=0)
+    resumes = make_parsed_resumes(args.candidates)
+
+    with Stopwatch() as watch:
+        for start in range(0, len(resumes), args.batch):
+            batch = resumes[start : start + args.batch]
+            vectors = asyncio.run(embedder.embed([resume_text(r) for r in batch]))
+            keys = [f"{start + i:064x}" for i in range(len(batch))]
+            index.add(keys, batch, vectors, embedder.name)
+    print(
+        f"inserted {args.candidates} resumes in {watch.elapsed:.1f}s "
+        f"({args.candidates / watch.elapsed:.0f}/s, embedding included)"
+    )
+
+    with Stopwatch() as watch:
+        index.train()
+    print(f"trained IVF ({index.stats()['ivf_lists']} lists) in {watch.elapsed:.1f}s")
+
+    rng = random.Random(1)
+    queries = [
+        asyncio.run(
+            embedder.embed(
+                [
+                    job_description_text(
+                        {"title": "Engineer", "requirements": rng.sample(SKILLS, 5)}
+                    )
+                ]
+            )
+        )[0]
+        for _ in range(args.queries)
+    ]
+    timings = {"exact": []}
+    recalls = {}
+    exact_results = []
+    for query in queries:
+        with Stopwatch() as watch:
+            exact_results.append(index.search(query, args.top, exact=True))
+        timings["exact"].append(watch.elapsed)
+    for nprobe in args.nprobe:
+        name = f"ivf/{nprobe}"
+        timings[name], recalls[name] = [], []
+        for query, exact in zip(queries, exact_results):
+            with Stopwatch() as watch:
+                approximate = index.search(query, args.top, nprobe=nprobe)
+            timings[name].append(watch.elapsed)
+            # Results tied with the exact k-th best score count as hits.
+            threshold = exact[-1][1] - 1e-6
+            hits = sum(score >= threshold for _, score, _ in approximate)
+            recalls[name].append(hits / args.top)
+
+    for name, values in timings.items():
+        recall = f" recall@{args.top}={np.mean(recalls[name]):.3f}" if name in recalls else ""
+        print(
+            f"{name:<8} p50={percentile(values, 50):7.2f}ms "
+            f"p95={percentile(values, 95):7.2f}ms{recall}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_ranking.py
+"""
+Compares the NumPy ranking engine with a full Python sort of candidate dicts.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_ranking --candidates 1000000 --top 10
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ranking import SCORE_DIMENSIONS, rank_candidate_scores, rank_scores, score_matrix
+from benchmarks.synthetic import Stopwatch
+
+
+def sort_ranking(candidate_scores):
+    """The original approach: average every candidate, then sort the whole list."""
+    for candidate in candidate_scores:
+        candidate["avg_score"] = sum(candidate.get(d, 0) for d in SCORE_DIMENSIONS) / 4.0
+    return sorted(candidate_scores, key=lambda c: c["avg_score"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=1000000)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    candidates = [
+        {"name": f"Candidate {i}", **{d: rng.randint(0, 100) for d in SCORE_DIMENSIONS}}
+        for i in range(args.candidates)
+    ]
+
+    with Stopwatch() as watch:
+        expected = sort_ranking(candidates)[: args.top]
+    print(f"python sort, all rows        {watch.elapsed * 1000:9.1f}ms")
+
+    with Stopwatch() as watch:
+        page = rank_candidate_scores(candidates, limit=args.top)
+    print(f"engine, top {args.top:<6} from dicts {watch.elapsed * 1000:9.1f}ms")
+    assert [c["name"] for c in page] == [c["name"] for c in expected]
+
+    matrix = score_matrix(candidates)
+    with Stopwatch() as watch:
+        rank_scores(matrix, limit=args.top)
+    print(f"engine, top {args.top:<6} from array {watch.elapsed * 1000:9.1f}ms")
+
+    with Stopwatch() as watch:
+        rank_scores(matrix)
+    print(f"engine, all rows from array  {watch.elapsed * 1000:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
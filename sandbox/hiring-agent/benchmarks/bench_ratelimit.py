@@ -0,0 +1,115 @@
+# benchmarks/bench_ratelimit.py
+"""
+Drives the LLMScheduler against a fake provider that enforces its own rate limits
+and answers 429 with Retry-After, to compare failure counts and throughput.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_ratelimit --requests 200 --rpm 1200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import openai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ratelimit import PRIORITY_BULK, PRIORITY_INTERACTIVE, LLMScheduler, TokenBucket
+from benchmarks.synthetic import Stopwatch
+
+
+class FakeProvider:
+    """Rejects requests over `rpm`/`tpm`, enforced per second, with a 429."""
+
+    def __init__(self, rpm, tpm, latency=0.2):
+        self.requests = TokenBucket(rpm, burst_seconds=1)
+        self.tokens = TokenBucket(tpm, burst_seconds=1)
+        self.latency = latency
+        self.served = 0
+        self.rejected = 0
+
+    async def complete(self, tokens):
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        if self.requests.level < 1 or self.tokens.level < tokens:
+            self.rejected += 1
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            response = httpx.Response(
+                429,
+                headers={"retry-after-ms": str(int(wait * 1000) + 1)},
+                request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+            )
+            raise openai.RateLimitError("Rate limit reached", response=response, body=None)
+        self.requests.level -= 1
+        self.tokens.level -= tokens
+        await asyncio.sleep(self.latency)
+        self.served += 1
+        return None
+
+
+async def run(provider, scheduler, count, tokens, interactive_every):
+    latencies = {PRIORITY_INTERACTIVE: [], PRIORITY_BULK: []}
+    failures = 0
+
+    async def one(index):
+        nonlocal failures
+        priority = PRIORITY_INTERACTIVE if index % interactive_every == 0 else PRIORITY_BULK
+        start = time.monotonic()
+        try:
+            await scheduler.run(lambda: provider.complete(tokens), tokens, priority)
+        except openai.RateLimitError:
+            failures += 1
+            return
+        latencies[priority].append(time.monotonic() - start)
+
+    await asyncio.gather(*(one(index) for index in range(count)))
+    return failures, latencies
+
+
+def mean(values):
+    return sum(values) / len(values) if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rpm", type=float, default=1200)
+    parser.add_argument("--tpm", type=float, default=600000)
+    parser.add_argument("--interactive-every", type=int, default=10)
+    args = parser.parse_args()
+
+    configs = {
+        "no-retry": dict(max_retries=0),
+        "retry-only": dict(max_retries=8, backoff_base=0.5),
+        "buckets+retry": dict(
+            rpm=args.rpm, tpm=args.tpm, max_retries=8, backoff_base=0.5, burst_seconds=1
+        ),
+    }
+    limit_per_s = min(args.rpm, args.tpm / args.tokens) / 60
+    print(
+        f"{args.requests} requests of {args.tokens} tokens, provider limit "
+        f"{limit_per_s:.1f} req/s (enforced per second)"
+    )
+    for name, kwargs in configs.items():
+        provider = FakeProvider(args.rpm, args.tpm)
+        scheduler = LLMScheduler(**kwargs)
+        with Stopwatch() as watch:
+            failures, latencies = asyncio.run(
+                run(provider, scheduler, args.requests, args.tokens, args.interactive_every)
+            )
+        print(
+            f"{name:<14} failed={failures:<4} 429s={provider.rejected:<5} "
+            f"throughput={provider.served / watch.elapsed:5.1f} req/s "
+            f"latency interactive={mean(latencies[PRIORITY_INTERACTIVE]):5.2f}s "
+            f"bulk={mean(latencies[PRIORITY_BULK]):5.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_sessions.py
+"""
+Measures how much an incremental screening session saves on re-runs.
+
+A session is created with a batch of resumes, then grown by a few more, then
+re-scored against an edited job description. Each step reports the LLM calls it
+made next to what a from-scratch /screen run of the same inputs would need.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_sessions --candidates 500 --added 20
+"""
+import argparse
+import asyncio
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before anything from utils or backend: keeps the run off the real caches.
+import benchmarks.isolation  # noqa: F401
+
+import backend.main as api
+from benchmarks.synthetic import SimulatedLLM, Stopwatch, make_resume_corpus
+
+JOB_TEXT = (
+    "Senior Data Engineer at Acme, remote. Requirements: 5+ years Python, SQL, "
+    "Airflow, AWS, Spark. Responsibilities: build data pipelines, own data quality."
+)
+
+
+def resume_files(pdfs, start):
+    return [
+        api.ResumeFile(
+            filename=f"resume-{start + index}.pdf",
+            content=base64.b64encode(pdf).decode("ascii"),
+        )
+        for index, pdf in enumerate(pdfs)
+    ]
+
+
+async def run(args):
+    llm = SimulatedLLM(time_scale=args.time_scale)
+    api.call_llm = llm
+    pdfs = make_resume_corpus(args.candidates + args.added, seed=1)
+    initial = resume_files(pdfs[: args.candidates], 0)
+    added = resume_files(pdfs[args.candidates :], args.candidates)
+    session = api.new_session()
+
+    everyone = args.candidates + args.added
+    steps = [
+        (
+            "create",
+            args.candidates,
+            api.SessionUpdate(job_description=JOB_TEXT, resume_files=initial),
+        ),
+        ("add", everyone, api.SessionUpdate(resume_files=added)),
+        ("resubmit", everyone, api.SessionUpdate(resume_files=initial + added)),
+        ("edit_jd", everyone, api.SessionUpdate(job_description=JOB_TEXT + " Kafka.")),
+    ]
+    for name, total, update in steps:
+        since = len(llm.calls)
+        with Stopwatch() as watch:
+            delta = await api.update_session(session, update)
+        calls = llm.summary(since)["calls"]
+        # From scratch: one JD parse plus a parse and a score call per resume.
+        print(
+            f"{name:<9} candidates={total:<5} llm_calls={calls:<5} "
+            f"from_scratch={1 + 2 * total:<5} rescored={delta['rescored']:<5} "
+            f"wall_s={watch.elapsed:6.2f}"
+        )
+    assert len(session["ranking"]) == everyone
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--added", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
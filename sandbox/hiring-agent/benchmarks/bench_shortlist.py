@@ -0,0 +1,129 @@
+# benchmarks/bench_shortlist.py
+"""
+Measures how well the embedding shortlist preserves the LLM's top candidates.
+
+A deterministic stand-in scorer plays the role of full LLM scoring: it rates each
+candidate by how many of the job's required skills their resume lists. The benchmark
+scores every candidate (no shortlist), then re-runs with shortlists of several sizes
+using the offline HashingEmbedder, and reports recall of the full-scoring top-N plus
+the LLM calls saved.
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_shortlist --candidates 2000 --top 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before anything from utils or backend: keeps the run off the real caches.
+import benchmarks.isolation  # noqa: F401
+
+import utils.utils as screening
+from utils.retrieval import HashingEmbedder
+from benchmarks.synthetic import Stopwatch, make_parsed_resumes
+
+JOB_DESCRIPTION = {
+    "title": "Senior Data Engineer",
+    "company": "Acme",
+    "location": "Remote",
+    "requirements": ["Python", "SQL", "Airflow", "Spark", "AWS"],
+    "responsibilities": ["Build data pipelines with Python and Spark"],
+}
+
+
+class SkillOverlapScorer:
+    """Stands in for the LLM: scores by overlap with the job's required skills."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, messages, response_format=None):
+        self.calls += 1
+        content = messages[-1]["content"]
+        job_json, resume_json = content.split("Candidate Resume:\n")
+        job = json.loads(job_json.split("Job Description:\n")[1])
+        resume = json.loads(resume_json)
+        required = {skill.lower() for skill in job["requirements"]}
+        skills = {skill.lower() for skill in resume.get("skills", [])}
+        # Fewer unrelated skills reads as a more focused profile.
+        score = 20 * len(required & skills) - len(skills - required)
+        return json.dumps(
+            {
+                "name": resume["name"],
+                "relevance": score,
+                "experience": score,
+                "skills": score,
+                "overall": score,
+                "comment": "",
+            }
+        )
+
+
+def top_n(scores, n):
+    ranked = sorted(scores, key=lambda score: -score["overall"])
+    return ranked[:n]
+
+
+def recall(full, shortlisted, n):
+    """
+    Share of the shortlisted run's top-n that also belongs in the full run's top-n.
+
+    Candidates tied with the full run's n-th best score count as hits, so ties at the
+    boundary do not penalize either ordering.
+    """
+    full_by_name = {score["name"]: score["overall"] for score in full}
+    threshold = top_n(full, n)[-1]["overall"]
+    hits = sum(
+        1 for score in top_n(shortlisted, n) if full_by_name[score["name"]] >= threshold
+    )
+    return hits / n
+
+
+async def run(resumes, shortlist_size, embedder):
+    return await screening.score_candidates(
+        JOB_DESCRIPTION,
+        {"parsed_resumes": resumes},
+        max_concurrency=64,
+        shortlist_size=shortlist_size,
+        embedder=embedder,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--shortlists", type=int, nargs="+", default=[25, 50, 100, 200, 400]
+    )
+    args = parser.parse_args()
+
+    resumes = make_parsed_resumes(args.candidates)
+    embedder = HashingEmbedder()
+    scorer = SkillOverlapScorer()
+    screening.call_llm = scorer
+
+    full = asyncio.run(run(resumes, 0, embedder))
+    full_calls = scorer.calls
+    print(
+        f"{args.candidates} candidates; recall of the full-scoring top {args.top} "
+        f"({full_calls} LLM calls without a shortlist)"
+    )
+    for size in args.shortlists:
+        scorer.calls = 0
+        with Stopwatch() as watch:
+            scores = asyncio.run(run(resumes, size, embedder))
+        print(
+            f"shortlist={size:<5} recall@{args.top}={recall(full, scores, args.top):5.2f} "
+            f"llm_calls={scorer.calls:<5} saved={1 - scorer.calls / full_calls:6.1%} "
+            f"wall_s={watch.elapsed:6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+# benchmarks/bench_suite.py
+"""
+Runs the whole pipeline offline against fake OpenAI and Firecrawl services.
+
+Three scenarios are driven at each batch size: the Streamlit pipeline in
+utils/utils.py, the FastAPI endpoints in backend/main.py (in-process, over
+ASGI), and the cover-letter flow in cover-letter-generator/src/core.py. The real
+SDK clients talk to a local FakeOpenAI server over HTTP, so connection pooling,
+the rate-limit scheduler and retries are all exercised. Resumes are synthetic
+PDFs of --min-pages to --max-pages pages, fresh for every run so caches start
+cold.
+
+Each stage reports throughput, p50/p95/p99 latency per unit of work (from
+utils.metrics for the hiring agent, timed per request for the cover letters,
+where the first_token stage streams the letters and times the first token) and
+the peak Python heap it allocated (tracemalloc; PDF extraction done in the
+process pool is not included).
+
+Usage (from the hiring-agent directory):
+
+    python -m benchmarks.bench_suite --batch-sizes 1 10 50 --save baseline.json
+    python -m benchmarks.bench_suite --batch-sizes 1 10 50 --baseline baseline.json
+
+With --baseline, any stage whose throughput dropped by more than --tolerance
+is listed and the exit status is 1. Stages that took under 10 ms in the baseline
+are too noisy to compare and are skipped.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+HIRING_AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COVER_LETTER_DIR = os.path.join(os.path.dirname(HIRING_AGENT_DIR), "cover-letter-generator")
+sys.path.insert(0, HIRING_AGENT_DIR)
+sys.path.append(COVER_LETTER_DIR)
+
+# Before anything from utils or backend: keeps the run off the real caches.
+import benchmarks.isolation  # noqa: F401
+
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+
+import backend.main as api
+import utils.utils as screening
+from utils.llm import close_async_client
+from utils.metrics import metrics
+from benchmarks.fake_services import FakeFirecrawl, FakeOpenAI, LatencyProfile
+from benchmarks.synthetic import Stopwatch, make_resume_corpus
+from src import core as cover_letters
+from src.cache import scrape_cache as cover_letter_scrape_cache
+from src.pdf import extract_pdf_text
+from src.text import compact_resume_text
+
+# The cover-letter flow turns on INFO logging and logs every HTTP request and reply.
+logging.getLogger().setLevel(logging.WARNING)
+
+SCENARIOS = ("utils", "backend", "cover_letter")
+MB = 1024 * 1024
+
+
+class Run:
+    """Measures the stages of one scenario at one batch size."""
+
+    def __init__(self, fake, scenario, batch):
+        self.fake = fake
+        self.scenario = scenario
+        self.batch = batch
+        self.rows = []
+
+    async def stage(self, name, items, work, metric=None):
+        """
+        Awaits `work()` as one stage and records its row.
+
+        Latency percentiles come from utils.metrics stage `metric` when given;
+        otherwise `work` must return the per-item latencies in seconds.
+        """
+        metrics.reset()
+        since = len(self.fake.calls)
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        with Stopwatch() as watch:
+            result = await work()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+
+        if metric is not None:
+            stats = metrics.summary().get(metric, {})
+            quantiles = [stats.get(k, 0.0) for k in ("p50_ms", "p95_ms", "p99_ms")]
+            errors = stats.get("errors", 0)
+        else:
+            latencies, errors = result
+            quantiles = (
+                (np.quantile(latencies, (0.5, 0.95, 0.99)) * 1000).round(1).tolist()
+                if latencies
+                else [0.0] * 3
+            )
+        llm = self.fake.summary(since)
+        self.rows.append(
+            {
+                "scenario": self.scenario,
+                "batch": self.batch,
+                "stage": name,
+                "items": items,
+                "wall_s": round(watch.elapsed, 4),
+                "items_per_s": round(items / watch.elapsed, 2) if watch.elapsed else 0.0,
+                "p50_ms": quantiles[0],
+                "p95_ms": quantiles[1],
+                "p99_ms": quantiles[2],
+                "peak_mb": round(max(peak, 0) / MB, 2),
+                "llm_calls": llm["calls"],
+                "llm_429s": llm["rate_limited"],
+                "llm_500s": llm["errors"],
+                # Share of prompt tokens the fake server served from its prompt cache.
+                "cached": (
+                    round(llm["cached_tokens"] / llm["prompt_tokens"], 2)
+                    if llm["prompt_tokens"]
+                    else 0.0
+                ),
+                "errors": errors,
+            }
+        )
+        return result
+
+
+def uploads(pdfs):
+    files = []
+    for index, pdf in enumerate(pdfs):
+        upload = io.BytesIO(pdf)
+        upload.name = f"resume-{index}.pdf"
+        files.append(upload)
+    return files
+
+
+async def run_utils(run, pdfs, job_url):
+    """The Streamlit pipeline, step by step, as app.py calls it."""
+    files = uploads(pdfs)
+    raw = await run.stage(
+        "ingest", 1, lambda: screening.ingest_inputs(job_url, files), "ingest"
+    )
+    job = await run.stage(
+        "jd_parse", 1, lambda: screening.parse_job_description(raw), "jd_parse"
+    )
+    parsed = await run.stage(
+        "resume_parse", len(files), lambda: screening.parse_resumes(files), "resume_parse"
+    )
+    scores = await run.stage(
+        "score", len(files), lambda: screening.score_candidates(job, parsed), "score"
+    )
+
+    async def rank():
+        return screening.rank_candidates(scores)
+
+    ranked = await run.stage("rank", len(scores), rank, "rank")
+    await run.stage(
+        "email",
+        len(ranked),
+        lambda: screening.generate_email_templates(ranked, job, max(1, len(ranked) // 10)),
+        "email",
+    )
+
+
+async def run_backend(run, pdfs, job_url):
+    """The backend endpoints, chained like a client would call them."""
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://backend", timeout=None
+    ) as client:
+
+        async def post(path, body):
+            response = await client.post(path, json=body)
+            response.raise_for_status()
+            return response.json()
+
+        files = [
+            {"filename": f"resume-{i}.pdf", "content": base64.b64encode(pdf).decode("ascii")}
+            for i, pdf in enumerate(pdfs)
+        ]
+        ingested = await run.stage(
+            "ingest",
+            len(files),
+            lambda: post(
+                "/ingest_inputs",
+                {"job_description": {"text": job_url}, "resume_files": files},
+            ),
+            "ingest",
+        )
+        job = await run.stage(
+            "jd_parse",
+            1,
+            lambda: post(
+                "/parse_job_description",
+                {"job_description": ingested["job_description"]},
+            ),
+            "jd_parse",
+        )
+        parsed = await run.stage(
+            "resume_parse",
+            len(files),
+            lambda: post("/parse_resumes", {"resume_files": ingested["resumes"]}),
+            "resume_parse",
+        )
+        scores = await run.stage(
+            "score",
+            len(files),
+            lambda: post(
+                "/score_candidates", {"parsed_requirements": job, "parsed_resumes": parsed}
+            ),
+            "score",
+        )
+        ranked = await run.stage(
+            "rank",
+            len(scores),
+            lambda: post("/rank_candidates", {"candidate_scores": scores}),
+            "rank",
+        )
+        await run.stage(
+            "email",
+            len(ranked),
+            lambda: post(
+                "/generate_email_batch",
+                {
+                    "ranked_candidates": ranked,
+                    "job_description": job,
+                    "top_x": max(1, len(ranked) // 10),
+                },
+            ),
+            "email",
+        )
+
+
+async def timed_gather(coroutines):
+    """Runs coroutines concurrently; returns (results, per-item latencies, failures)."""
+    latencies = []
+
+    async def timed(coroutine):
+        started = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    results = await asyncio.gather(*(timed(c) for c in coroutines))
+    return results, latencies, sum(result is None for result in results)
+
+
+async def run_cover_letter(run, pdfs, job_url, client, firecrawl):
+    """One cover letter per resume, all in flight at once, stage by stage."""
+    urls = [f"{job_url}/{index}" for index in range(len(pdfs))]
+    texts = []
+
+    async def extract():
+        latencies = []
+        for pdf in pdfs:
+            started = time.perf_counter()
+            texts.append(compact_resume_text(extract_pdf_text(io.BytesIO(pdf))).text)
+            latencies.append(time.perf_counter() - started)
+        return latencies, 0
+
+    await run.stage("pdf_extract", len(pdfs), extract)
+
+    postings = []
+
+    async def scrape():
+        async def one(url):
+            content = await cover_letter_scrape_cache.get(url, firecrawl.scrape_url)
+            return str(content)
+
+        results, latencies, failed = await timed_gather(one(url) for url in urls)
+        postings.extend(results)
+        return latencies, failed
+
+    await run.stage("scrape", len(urls), scrape)
+
+    extracted = []
+
+    async def extract_info():
+        async def one(text, posting):
+            resume, job = await asyncio.gather(
+                cover_letters.extract_resume_info(client, text),
+                cover_letters.extract_job_info(client, posting),
+            )
+            return (resume, job) if resume and job else None
+
+        results, latencies, failed = await timed_gather(
+            one(text, posting) for text, posting in zip(texts, postings)
+        )
+        extracted.extend(result for result in results if result)
+        return latencies, failed
+
+    await run.stage("extract", len(texts), extract_info)
+
+    async def letters():
+        _, latencies, failed = await timed_gather(
+            cover_letters.generate_cover_letter(client, resume, job)
+            for resume, job in extracted
+        )
+        return latencies, failed
+
+    await run.stage("letter", len(extracted), letters)
+
+    async def first_tokens():
+        # The streamed letters; latency here is time to first token.
+        latencies = []
+
+        async def one(resume, job):
+            started = time.perf_counter()
+            try:
+                async for _ in cover_letters.stream_cover_letter(client, resume, job):
+                    if started is not None:
+                        latencies.append(time.perf_counter() - started)
+                        started = None
+            except Exception:
+                pass
+
+        await asyncio.gather(*(one(resume, job) for resume, job in extracted))
+        return latencies, len(extracted) - len(latencies)
+
+    await run.stage("first_token", len(extracted), first_tokens)
+
+    async def end_to_end():
+        # Fresh URLs, so the scrape cache does not serve the postings from above.
+        _, latencies, failed = await timed_gather(
+            cover_letters.process_cover_letter_request(
+                io.BytesIO(pdf), f"{url}/again", client, firecrawl
+            )
+            for pdf, url in zip(pdfs, urls)
+        )
+        return latencies, failed
+
+    await run.stage("end_to_end", len(pdfs), end_to_end)
+
+
+async def run_suite(args, fake, base_url):
+    firecrawl = FakeFirecrawl(
+        latency=args.scrape_latency,
+        error_rate=args.scrape_error_rate,
+        time_scale=args.time_scale,
+    )
+    screening.app = firecrawl
+    api.firecrawl_app = firecrawl
+    client = AsyncOpenAI(base_url=base_url, api_key="benchmark", max_retries=0)
+
+    rows = []
+    seed = 0
+    # A first, unreported pass at batch size 1 pays for lazy imports, client
+    # construction and schema building, which would otherwise land in batch 1.
+    for batch, reported in [(1, False)] + [(size, True) for size in args.batch_sizes]:
+        for scenario in args.scenarios:
+            seed += 1
+            pdfs = make_resume_corpus(batch, args.min_pages, args.max_pages, seed=seed)
+            job_url = f"https://jobs.example.com/{scenario}/{batch}/{seed}"
+            run = Run(fake, scenario, batch)
+            if scenario == "utils":
+                await run_utils(run, pdfs, job_url)
+            elif scenario == "backend":
+                await run_backend(run, pdfs, job_url)
+            else:
+                await run_cover_letter(run, pdfs, job_url, client, firecrawl)
+            if not reported:
+                continue
+            for row in run.rows:
+                print_row(row)
+            rows.extend(run.rows)
+    await client.close()
+    await close_async_client()
+    return rows
+
+
+COLUMNS = (
+    ("scenario", 12), ("batch", 5), ("stage", 12), ("items", 5), ("wall_s", 8),
+    ("items_per_s", 11), ("p50_ms", 8), ("p95_ms", 8), ("p99_ms", 8),
+    ("peak_mb", 8), ("llm_calls", 9), ("llm_429s", 8), ("llm_500s", 8),
+    ("cached", 6), ("errors", 6),
+)
+
+
+def print_row(row):
+    print(" ".join(f"{str(row[name]):>{width}}" for name, width in COLUMNS))
+
+
+def regressions(rows, baseline, tolerance):
+    """Stages whose throughput fell more than `tolerance` below the baseline."""
+    previous = {(r["scenario"], r["batch"], r["stage"]): r for r in baseline}
+    found = []
+    for row in rows:
+        before = previous.get((row["scenario"], row["batch"], row["stage"]))
+        if not before or before["wall_s"] < 0.01 or not before["items_per_s"]:
+            continue
+        change = row["items_per_s"] / before["items_per_s"] - 1
+        if change < -tolerance:
+            found.append((row, before, change))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    parser.add_argument("--first-token-median", type=float, default=0.4)
+    parser.add_argument("--first-token-sigma", type=float, default=0.5)
+    parser.add_argument("--prefill-tokens-per-s", type=float, default=20000.0)
+    parser.add_argument("--decode-tokens-per-s", type=float, default=70.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, default=0)
+    parser.add_argument("--tpm", type=float, default=0)
+    parser.add_argument("--scrape-latency", type=float, default=1.5)
+    parser.add_argument("--scrape-error-rate", type=float, default=0.0)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare throughput with a saved run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(
+        LatencyProfile(
+            args.first_token_median,
+            args.first_token_sigma,
+            args.prefill_tokens_per_s,
+            args.decode_tokens_per_s,
+            args.time_scale,
+        ),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        tpm=args.tpm,
+    )
+    print(" ".join(f"{name:>{width}}" for name, width in COLUMNS))
+    tracemalloc.start()
+    with fake.serve() as base_url:
+        # Every client built from here on (utils.llm creates its own) uses the fake.
+        os.environ["OPENAI_BASE_URL"] = base_url
+        rows = asyncio.run(run_suite(args, fake, base_url))
+    tracemalloc.stop()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(rows, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(rows, json.load(f), args.tolerance)
+        for row, before, change in found:
+            print(
+                f"REGRESSION {row['scenario']}/{row['batch']}/{row['stage']}: "
+                f"{before['items_per_s']} -> {row['items_per_s']} items/s ({change:+.0%})"
+            )
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
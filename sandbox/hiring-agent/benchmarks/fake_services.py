@@ -0,0 +1,565 @@
+# benchmarks/fake_services.py
+"""
+Local stand-ins for the OpenAI and Firecrawl APIs, so benchmarks run offline.
+
+FakeOpenAI is a real OpenAI-compatible HTTP server (chat completions and
+embeddings) that the unmodified SDK clients talk to through OPENAI_BASE_URL or
+`base_url=`. Structured outputs are generated from the request's JSON schema;
+prompts that spell out a JSON example get that example filled in. Latency, token
+rates, server errors and 429s are configurable, and `"stream": true` requests are
+answered with server-sent events paced like a real decode. Repeated prompt prefixes
+are cached the way OpenAI does it, and reported as usage.prompt_tokens_details.
+
+FakeFirecrawl duck-types FirecrawlApp.scrape_url and returns a synthetic posting.
+
+To point the Streamlit apps at a fake server (from the hiring-agent directory):
+
+    python -m benchmarks.fake_services --port 8100
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 streamlit run app.py
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ratelimit import TokenBucket
+from benchmarks.synthetic import SKILLS, sentence
+
+
+class LatencyProfile:
+    """
+    Latency of one completion: a lognormal time to first token plus prefill and
+    decode time proportional to the prompt and completion token counts.
+
+    Every sleep is multiplied by `time_scale`, as in SimulatedLLM.
+    """
+
+    def __init__(
+        self,
+        first_token_median: float = 0.4,
+        first_token_sigma: float = 0.5,
+        prefill_tokens_per_s: float = 20000.0,
+        decode_tokens_per_s: float = 70.0,
+        time_scale: float = 1.0,
+    ):
+        self.first_token_median = first_token_median
+        self.first_token_sigma = first_token_sigma
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.decode_tokens_per_s = decode_tokens_per_s
+        self.time_scale = time_scale
+
+    def time_to_first_token(self, rng: random.Random, prompt_tokens: int) -> float:
+        """Returns the unscaled time, in seconds, until the first token."""
+        first_token = rng.lognormvariate(
+            math.log(self.first_token_median), self.first_token_sigma
+        )
+        return first_token + prompt_tokens / self.prefill_tokens_per_s
+
+    def sample(
+        self, rng: random.Random, prompt_tokens: int, completion_tokens: int
+    ) -> float:
+        """Returns the unscaled latency, in seconds, of one completion."""
+        return (
+            self.time_to_first_token(rng, prompt_tokens)
+            + completion_tokens / self.decode_tokens_per_s
+        )
+
+
+def schema_value(schema: Dict[str, Any], rng: random.Random, defs: Dict[str, Any]) -> Any:
+    """Returns a value that validates against a (strict) JSON schema."""
+    if "$ref" in schema:
+        return schema_value(defs[schema["$ref"].rsplit("/", 1)[-1]], rng, defs)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return schema_value(options[0], rng, defs) if options else None
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: schema_value(field, rng, defs)
+            for name, field in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [schema_value(schema.get("items", {}), rng, defs) for _ in range(4)]
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if kind == "number":
+        return rng.random()
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return sentence(rng)
+
+
+def fill_example(example: Any, rng: random.Random) -> Any:
+    """Replaces every leaf of a prompt's JSON example with generated content."""
+    if isinstance(example, dict):
+        return {key: fill_example(value, rng) for key, value in example.items()}
+    if isinstance(example, list):
+        return [fill_example(example[0], rng) for _ in range(3)] if example else []
+    if isinstance(example, bool):
+        return rng.random() < 0.5
+    if isinstance(example, (int, float)):
+        return rng.randint(0, 100)
+    return sentence(rng)
+
+
+def prompt_example(messages: List[Dict[str, Any]]) -> Optional[Any]:
+    """
+    Returns the JSON example a system prompt asks the model to follow, if any
+    (e.g. "Return ONLY a JSON object with this structure: {...}").
+    """
+    for message in messages:
+        content = message.get("content")
+        if message.get("role") != "system" or not isinstance(content, str):
+            continue
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end < start:
+            continue
+        try:
+            return json.loads(content[start : end + 1])
+        except ValueError:
+            continue
+    return None
+
+
+def count_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Approximates prompt tokens as characters / 4."""
+    return sum(len(str(m.get("content") or "")) for m in messages) // 4
+
+
+class PromptCache:
+    """
+    Models OpenAI's automatic prompt caching: once a prompt is at least
+    `min_tokens` long, its prefix is cached in `block_tokens` steps, and a later
+    prompt starting with a cached prefix skips prefilling it.
+
+    Tokens are approximated as characters / 4, as in count_tokens.
+    """
+
+    def __init__(self, min_tokens: int = 1024, block_tokens: int = 128):
+        self.min_chars = min_tokens * 4
+        self.block_chars = block_tokens * 4
+        self.prefixes: set = set()
+
+    def lookup(self, messages: List[Dict[str, Any]]) -> int:
+        """Returns the cached prefix length of a prompt in tokens, then caches it."""
+        text = "".join(f"{m.get('role')}\n{m.get('content') or ''}\n" for m in messages)
+        cached = 0
+        # Each key hashes the whole prefix up to `end`, so a hit means every earlier
+        # block matched too.
+        digest = hashlib.sha256()
+        for end in range(self.block_chars, len(text) + 1, self.block_chars):
+            digest.update(text[end - self.block_chars : end].encode("utf-8"))
+            if end < self.min_chars:
+                continue
+            key = digest.hexdigest()
+            if key in self.prefixes:
+                cached = end
+            self.prefixes.add(key)
+        return cached // 4
+
+
+def error_body(message: str, kind: str, code: Optional[str] = None) -> Dict[str, Any]:
+    return {"error": {"message": message, "type": kind, "param": None, "code": code}}
+
+
+class FakeOpenAI:
+    """
+    An OpenAI-compatible server for /v1/chat/completions and /v1/embeddings.
+
+    Failure injection, checked in this order before a request is served:
+
+        rpm / tpm         per-minute request and token limits, enforced per second
+                          like the real API: over-limit requests get a 429 with
+                          retry-after-ms set to when they would be admitted
+        rate_limit_rate   fraction of requests answered with a 429 regardless
+        error_rate        fraction of requests answered with a 500
+
+    With `prompt_cache` on, the cached part of a prompt (see PromptCache) is not
+    prefilled again. Every request is recorded in `.calls`; see `summary`.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyProfile] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        rpm: float = 0,
+        tpm: float = 0,
+        text_sentences: int = 25,
+        embedding_dim: int = 256,
+        seed: int = 0,
+        prompt_cache: bool = True,
+    ):
+        self.latency = latency or LatencyProfile()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests = TokenBucket(rpm, burst_seconds=1) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds=1) if tpm else None
+        self.text_sentences = text_sentences
+        self.embedding_dim = embedding_dim
+        self.rng = random.Random(seed)
+        self.prompt_cache = PromptCache() if prompt_cache else None
+        self.calls: List[Dict[str, Any]] = []
+
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.chat_completions)
+        self.app.post("/v1/embeddings")(self.embeddings)
+
+    def reject(self, prompt_tokens: int) -> Optional[JSONResponse]:
+        """Returns the injected failure for a request, or None to serve it."""
+        now = time.monotonic()
+        wait = 0.0
+        for bucket, amount in ((self.requests, 1), (self.tokens, prompt_tokens)):
+            if bucket is None:
+                continue
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_time(amount))
+        if wait > 0 or self.rng.random() < self.rate_limit_rate:
+            wait = wait or self.latency.time_scale
+            return JSONResponse(
+                error_body("Rate limit reached", "requests", "rate_limit_exceeded"),
+                status_code=429,
+                headers={"retry-after-ms": str(int(wait * 1000) + 1)},
+            )
+        if self.rng.random() < self.error_rate:
+            return JSONResponse(
+                error_body("The server had an error", "server_error"), status_code=500
+            )
+        if self.requests:
+            self.requests.level -= 1
+        if self.tokens:
+            self.tokens.level -= prompt_tokens
+        return None
+
+    def completion_text(self, body: Dict[str, Any]) -> str:
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(schema_value(schema, self.rng, schema.get("$defs", {})))
+        example = prompt_example(body.get("messages", []))
+        if example is not None:
+            return json.dumps(fill_example(example, self.rng))
+        return "\n\n".join(
+            " ".join(sentence(self.rng) for _ in range(5))
+            for _ in range(max(1, self.text_sentences // 5))
+        )
+
+    async def chat_completions(self, request: Request) -> JSONResponse:
+        body = await request.json()
+        prompt_tokens = count_tokens(body.get("messages", []))
+        rejected = self.reject(prompt_tokens)
+        if rejected is not None:
+            self.calls.append({"kind": "chat", "status": rejected.status_code})
+            return rejected
+
+        cached_tokens = 0
+        if self.prompt_cache is not None:
+            cached_tokens = min(
+                prompt_tokens, self.prompt_cache.lookup(body.get("messages", []))
+            )
+        content = self.completion_text(body)
+        completion_tokens = len(content) // 4
+        if body.get("stream"):
+            return StreamingResponse(
+                self.stream_chunks(
+                    body, content, prompt_tokens, completion_tokens, cached_tokens
+                ),
+                media_type="text/event-stream",
+            )
+        latency = self.latency.sample(
+            self.rng, prompt_tokens - cached_tokens, completion_tokens
+        )
+        await asyncio.sleep(latency * self.latency.time_scale)
+        self.calls.append(
+            {
+                "kind": "chat",
+                "status": 200,
+                "prompt_tokens": prompt_tokens,
+                "cached_tokens": cached_tokens,
+                "completion_tokens": completion_tokens,
+                "latency": latency,
+            }
+        )
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{len(self.calls)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": content,
+                            "refusal": None,
+                        },
+                        "logprobs": None,
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                },
+            }
+        )
+
+    async def stream_chunks(
+        self,
+        body: Dict[str, Any],
+        content: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+    ) -> AsyncIterator[str]:
+        """Yields a completion as chat.completion.chunk events, one word at a time."""
+        first_token = self.latency.time_to_first_token(
+            self.rng, prompt_tokens - cached_tokens
+        )
+        decode_time = completion_tokens / self.latency.decode_tokens_per_s
+        await asyncio.sleep(first_token * self.latency.time_scale)
+        chunk = {
+            "id": f"chatcmpl-{len(self.calls)}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+        }
+
+        def event(choices: List[Dict[str, Any]], **extra: Any) -> str:
+            return f"data: {json.dumps({**chunk, 'choices': choices, **extra})}\n\n"
+
+        # Decode time is slept in steps of at least 5 ms; with a small time_scale,
+        # one sleep per word would mostly measure event loop overhead.
+        owed = 0.0
+        for index, piece in enumerate(re.findall(r"\s*\S+", content) or [content]):
+            if index:
+                decode = len(piece) / 4 / self.latency.decode_tokens_per_s
+                owed += decode * self.latency.time_scale
+                if owed >= 0.005:
+                    await asyncio.sleep(owed)
+                    owed = 0.0
+            delta = {"content": piece}
+            if index == 0:
+                delta["role"] = "assistant"
+            yield event([{"index": 0, "delta": delta, "finish_reason": None}])
+        yield event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            }
+            yield event([], usage=usage)
+        yield "data: [DONE]\n\n"
+        self.calls.append(
+            {
+                "kind": "chat",
+                "status": 200,
+                "prompt_tokens": prompt_tokens,
+                "cached_tokens": cached_tokens,
+                "completion_tokens": completion_tokens,
+                "latency": first_token + decode_time,
+                "first_token": first_token,
+            }
+        )
+
+    def embed(self, text: str) -> List[float]:
+        # Deterministic per text, so similarity searches are repeatable.
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(self.embedding_dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    async def embeddings(self, request: Request) -> JSONResponse:
+        body = await request.json()
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        prompt_tokens = sum(len(str(text)) for text in inputs) // 4
+        rejected = self.reject(prompt_tokens)
+        if rejected is not None:
+            self.calls.append({"kind": "embeddings", "status": rejected.status_code})
+            return rejected
+
+        latency = self.latency.sample(self.rng, prompt_tokens, 0)
+        await asyncio.sleep(latency * self.latency.time_scale)
+        self.calls.append(
+            {
+                "kind": "embeddings",
+                "status": 200,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 0,
+                "latency": latency,
+            }
+        )
+        return JSONResponse(
+            {
+                "object": "list",
+                "model": body.get("model", "fake"),
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": index,
+                        "embedding": self.embed(str(text)),
+                    }
+                    for index, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+            }
+        )
+
+    @contextlib.contextmanager
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+        """
+        Runs the server on a background thread and yields its base URL.
+
+        Port 0 picks a free port. The server has its own event loop, so its
+        latency sleeps never compete with the code under test.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        # Idle connections are left for the client to close. Process pools forked
+        # later (PDF extraction) inherit the server's sockets, so a server-side
+        # close never reaches the client, which would then hang on a dead socket.
+        server = uvicorn.Server(
+            uvicorn.Config(
+                self.app, log_level="warning", lifespan="off", timeout_keep_alive=3600
+            )
+        )
+        thread = threading.Thread(
+            target=server.run, kwargs={"sockets": [sock]}, daemon=True
+        )
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("Fake OpenAI server failed to start")
+            time.sleep(0.01)
+        try:
+            yield f"http://{host}:{sock.getsockname()[1]}/v1"
+        finally:
+            server.should_exit = True
+            thread.join()
+            sock.close()
+
+    def summary(self, since: int = 0) -> Dict[str, Any]:
+        """Totals for the requests recorded after index `since`."""
+        calls = self.calls[since:]
+        served = [c for c in calls if c["status"] == 200]
+        return {
+            "calls": len(served),
+            "rate_limited": sum(c["status"] == 429 for c in calls),
+            "errors": sum(c["status"] >= 500 for c in calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in served),
+            "cached_tokens": sum(c.get("cached_tokens", 0) for c in served),
+            "completion_tokens": sum(c["completion_tokens"] for c in served),
+            "llm_seconds": sum(c["latency"] for c in served),
+        }
+
+
+def job_posting(rng: random.Random, url: str) -> str:
+    """Returns a synthetic job posting as scraped markdown."""
+    skills = rng.sample(SKILLS, 6)
+    lines = [
+        f"# Senior {skills[0]} Engineer",
+        "",
+        f"Source: {url}",
+        "",
+        "**Company:** Acme  ",
+        "**Location:** Remote",
+        "",
+        "## About the role",
+        " ".join(sentence(rng) for _ in range(6)),
+        "",
+        "## Requirements",
+    ]
+    lines += [f"- 3+ years of {skill}" for skill in skills]
+    lines += ["", "## Responsibilities"]
+    lines += [f"- {sentence(rng, 8)}" for _ in range(5)]
+    lines += ["", "## Benefits", " ".join(sentence(rng) for _ in range(4))]
+    return "\n".join(lines)
+
+
+class FakeFirecrawl:
+    """
+    Duck-types FirecrawlApp.scrape_url with a fixed, scaled latency and an
+    optional failure rate. Like the real client it blocks, so callers run it in a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        latency: float = 1.5,
+        error_rate: float = 0.0,
+        time_scale: float = 1.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def scrape_url(
+        self, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        with self.lock:
+            self.calls += 1
+            failed = self.rng.random() < self.error_rate
+            markdown = job_posting(self.rng, url)
+        time.sleep(self.latency * self.time_scale)
+        if failed:
+            raise Exception(f"Failed to scrape URL. Status code: 500. Error: {url}")
+        return {"markdown": markdown, "metadata": {"sourceURL": url, "statusCode": 200}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, default=0)
+    parser.add_argument("--tpm", type=float, default=0)
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(
+        LatencyProfile(time_scale=args.time_scale),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        tpm=args.tpm,
+    )
+    with fake.serve(port=args.port) as base_url:
+        print(f"Fake OpenAI API listening on {base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
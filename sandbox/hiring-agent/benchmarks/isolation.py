@@ -0,0 +1,19 @@
+# benchmarks/isolation.py
+"""
+Keeps a benchmark away from the real caches, job queue and credentials.
+
+The utils and backend modules read these settings when they are imported, so a
+benchmark imports this module before any of them.
+"""
+import os
+import tempfile
+
+# Scratch directory for this run's caches, job queue and batch files.
+WORKDIR = tempfile.mkdtemp(prefix="hiring-agent-bench-")
+
+os.environ["HIRING_AGENT_CACHE_PATH"] = os.path.join(WORKDIR, "cache.sqlite3")
+os.environ["JOB_QUEUE_PATH"] = os.path.join(WORKDIR, "jobs.sqlite3")
+os.environ["CANDIDATE_INDEX_ENABLED"] = "0"
+os.environ["JOB_WORKERS"] = "0"
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("FIRECRAWL_API_KEY", "benchmark")
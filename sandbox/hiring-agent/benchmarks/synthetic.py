@@ -0,0 +1,221 @@
+# benchmarks/synthetic.py
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+WORDS = (
+    "led team built scalable service platform customer growth product "
+    "stakeholder optimized latency reduced cost designed architecture mentored "
+    "developers delivered roadmap improved reliability launched features owned"
+).split()
+
+SKILLS = [
+    "Python", "SQL", "AWS", "Kubernetes", "React", "TypeScript", "PyTorch",
+    "Docker", "Airflow", "Spark", "FastAPI", "Go", "Terraform", "GCP", "Java",
+]
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    """Returns a pseudo-random sentence of resume-like vocabulary."""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def resume_pages(rng: random.Random, index: int, pages: int = 1) -> List[str]:
+    """Returns the text of a synthetic resume, one string per page."""
+    result = []
+    for page in range(pages):
+        lines = [f"Candidate {index} - Page {page + 1}"]
+        if page == 0:
+            lines += [
+                f"Name: Candidate {index}",
+                "Location: Remote",
+                "Skills: " + ", ".join(rng.sample(SKILLS, 6)),
+                "Education: BSc Computer Science",
+            ]
+        lines += [sentence(rng) for _ in range(25)]
+        result.append("\n".join(lines))
+    return result
+
+
+def make_parsed_resumes(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Returns `count` synthetic parsed resumes in the Resume schema."""
+    rng = random.Random(seed)
+    resumes = []
+    for index in range(count):
+        skills = rng.sample(SKILLS, rng.randint(3, 8))
+        resumes.append(
+            {
+                "name": f"Candidate {index}",
+                "work_experiences": [
+                    f"Used {rng.choice(skills)} to {sentence(rng, 8).lower()}"
+                    for _ in range(rng.randint(2, 5))
+                ],
+                "location": "Remote",
+                "skills": skills,
+                "education": ["BSc Computer Science"],
+                "summary": sentence(rng),
+            }
+        )
+    return resumes
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """
+    Builds a minimal, valid PDF with one text page per entry in `pages`.
+
+    Only the standard Helvetica font is referenced, so no font files are embedded
+    and PyPDF2 can extract the text back out.
+    """
+    count = len(pages)
+    font_id = 3 + 2 * count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(count)), count
+        ),
+    ]
+    for i, text in enumerate(pages):
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        lines = text.split("\n")
+        ops = ["BT", "/F1 9 Tf", "11 TL", "50 760 Td"]
+        ops += [f"({_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def make_resume_corpus(
+    count: int, min_pages: int = 1, max_pages: int = 1, seed: int = 0
+) -> List[bytes]:
+    """Returns `count` synthetic resume PDFs with between min_pages and max_pages pages."""
+    rng = random.Random(seed)
+    return [
+        make_pdf(resume_pages(rng, index, rng.randint(min_pages, max_pages)))
+        for index in range(count)
+    ]
+
+
+def fake_value(annotation: Any, rng: random.Random) -> Any:
+    """Returns a plausible value for a Pydantic field annotation."""
+    origin = get_origin(annotation)
+    if origin is Union:
+        options = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return fake_value(options[0], rng)
+    if origin in (list, List):
+        return [fake_value(get_args(annotation)[0], rng) for _ in range(4)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_instance(annotation, rng)
+    if annotation is int:
+        return rng.randint(0, 100)
+    if annotation is float:
+        return rng.random()
+    return sentence(rng)
+
+
+def fake_instance(model: type, rng: random.Random) -> Dict[str, Any]:
+    """Returns a dict that validates against `model`, with every field filled in."""
+    return {
+        name: fake_value(field.annotation, rng)
+        for name, field in model.model_fields.items()
+    }
+
+
+class SimulatedLLM:
+    """
+    A drop-in replacement for utils.llm.call_llm that never leaves the process.
+
+    Latency follows a simple model of a hosted chat completion: a fixed time to first
+    token plus prefill and decode time proportional to the prompt and completion
+    token counts (approximated as characters / 4). All sleeps are multiplied by
+    `time_scale`, so benchmarks can run quickly while reporting unscaled numbers.
+    """
+
+    def __init__(
+        self,
+        first_token_latency: float = 0.4,
+        prefill_tokens_per_s: float = 20000.0,
+        decode_tokens_per_s: float = 70.0,
+        time_scale: float = 0.02,
+        seed: int = 0,
+    ):
+        self.first_token_latency = first_token_latency
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.decode_tokens_per_s = decode_tokens_per_s
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.calls: List[Dict[str, Any]] = []
+
+    def fake_response(self, messages: list, response_format: Any = None) -> str:
+        """Returns the completion text; override to shape responses for a benchmark."""
+        if response_format is None:
+            return " ".join(sentence(self.rng) for _ in range(12))
+        return json.dumps(fake_instance(response_format, self.rng))
+
+    async def __call__(self, messages: list, response_format: Any = None) -> str:
+        prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        body = self.fake_response(messages, response_format)
+        completion_tokens = len(body) // 4
+        latency = (
+            self.first_token_latency
+            + prompt_tokens / self.prefill_tokens_per_s
+            + completion_tokens / self.decode_tokens_per_s
+        )
+        await asyncio.sleep(latency * self.time_scale)
+        self.calls.append(
+            {
+                "schema": getattr(response_format, "__name__", None),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency": latency,
+            }
+        )
+        return body
+
+    def summary(self, since: int = 0) -> Dict[str, Any]:
+        """Totals for the calls recorded after index `since`."""
+        calls = self.calls[since:]
+        return {
+            "calls": len(calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "llm_seconds": sum(c["latency"] for c in calls),
+        }
+
+
+class Stopwatch:
+    """Context manager that records elapsed wall-clock seconds in `.elapsed`."""
+
+    def __enter__(self) -> "Stopwatch":
+        self.start = time.perf_counter()
+        self.elapsed: Optional[float] = None
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.elapsed = time.perf_counter() - self.start
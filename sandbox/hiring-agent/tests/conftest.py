@@ -0,0 +1,14 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# The utils modules read these settings when imported; keep tests off the real caches.
+os.environ["HIRING_AGENT_CACHE_PATH"] = os.path.join(
+    tempfile.mkdtemp(prefix="hiring-agent-tests-"), "cache.sqlite3"
+)
+os.environ["CANDIDATE_INDEX_ENABLED"] = "0"
+os.environ["JOB_WORKERS"] = "0"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("FIRECRAWL_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,89 @@
+# tests/test_batch.py
+import asyncio
+import json
+
+import pytest
+from openai.lib._pydantic import to_strict_json_schema
+
+from utils.batch import (
+    BatchError,
+    BatchRequest,
+    LocalBatchBackend,
+    batch_content,
+    complete_batch,
+    response_format_param,
+    run_batch,
+    to_jsonl,
+)
+from utils.emails import EmailPersonalizations
+
+
+class StuckBackend:
+    """A backend whose job never leaves one status."""
+
+    def __init__(self, status):
+        self._status = status
+
+    async def submit(self, payload):
+        return "batch_stuck"
+
+    async def status(self, batch_id):
+        return self._status
+
+    async def results(self, batch_id):
+        raise AssertionError("results of an unfinished batch were read")
+
+
+def requests(count):
+    return [
+        BatchRequest(str(index), [{"role": "user", "content": f"say {index}"}])
+        for index in range(count)
+    ]
+
+
+def test_response_format_matches_the_realtime_structured_output_request():
+    param = response_format_param(EmailPersonalizations)
+
+    assert param["json_schema"]["name"] == "EmailPersonalizations"
+    assert param["json_schema"]["strict"] is True
+    assert param["json_schema"]["schema"] == to_strict_json_schema(EmailPersonalizations)
+
+
+def test_jsonl_holds_one_chat_completion_request_per_line():
+    lines = to_jsonl(requests(2), model="test-model").decode().splitlines()
+
+    records = [json.loads(line) for line in lines]
+    assert [record["custom_id"] for record in records] == ["0", "1"]
+    assert records[0]["url"] == "/v1/chat/completions"
+    assert records[0]["body"]["model"] == "test-model"
+    assert "response_format" not in records[0]["body"]
+
+
+def test_local_backend_returns_content_and_per_request_errors(tmp_path):
+    async def responder(body):
+        content = body["messages"][-1]["content"]
+        if content == "say 1":
+            raise RuntimeError("content filtered")
+        return content.upper()
+
+    backend = LocalBatchBackend(str(tmp_path), responder)
+    results = asyncio.run(run_batch(requests(3), backend, poll_interval=0))
+
+    assert batch_content(results, "0") == "SAY 0"
+    assert batch_content(results, "2") == "SAY 2"
+    with pytest.raises(BatchError, match="content filtered"):
+        batch_content(results, "1")
+
+
+@pytest.mark.parametrize(
+    "status, message", [("failed", "ended with status failed"), ("in_progress", "within")]
+)
+def test_a_job_that_does_not_complete_fails_every_request(status, message):
+    with pytest.raises(BatchError, match=message):
+        asyncio.run(
+            run_batch(requests(2), StuckBackend(status), poll_interval=0, timeout=0)
+        )
+
+    results = asyncio.run(complete_batch(requests(2), StuckBackend("expired")))
+    assert set(results) == {"0", "1"}
+    assert all(isinstance(error, BatchError) for error in results.values())
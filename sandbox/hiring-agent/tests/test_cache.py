@@ -0,0 +1,176 @@
+# tests/test_cache.py
+import asyncio
+import itertools
+import threading
+import types
+
+import pytest
+
+import utils.cache as cache
+from utils.cache import DiskCache, IdempotencyConflict, IdempotencyCache, ScrapeCache
+from utils.metrics import metrics
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Makes every time.time() call in utils.cache one second later than the last."""
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=lambda: next(ticks)))
+
+
+def make_cache(tmp_path, **limits):
+    return DiskCache("test", path=str(tmp_path / "cache.sqlite3"), **limits)
+
+
+def test_disk_cache_evicts_least_recently_used_entry(tmp_path, clock):
+    store = make_cache(tmp_path, max_entries=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1  # "b" is now the least recently used
+    store.set("c", 3)
+
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+    assert store.stats()["entries"] == 2
+
+
+def test_disk_cache_evicts_until_under_byte_budget(tmp_path, clock):
+    store = make_cache(tmp_path, max_bytes=25)
+    for key in "abc":
+        store.set(key, "x" * 8)  # 10 bytes of JSON each
+
+    assert store.get("a") is None
+    assert store.get("b") == "x" * 8
+    assert store.stats()["bytes"] <= 25
+
+
+def test_disk_cache_treats_expired_entries_as_misses(tmp_path, clock):
+    store = make_cache(tmp_path, ttl=5)
+    store.set("a", 1)
+    for _ in range(10):
+        cache.time.time()
+
+    assert store.get("a") is None
+    assert store.stats()["entries"] == 0
+
+
+def test_disk_cache_namespaces_share_a_file_without_evicting_each_other(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    small = DiskCache("small", path=path, max_entries=1)
+    other = DiskCache("other", path=path)
+    other.set("a", "kept")
+    small.set("a", 1)
+    small.set("b", 2)
+
+    assert other.get("a") == "kept"
+    assert small.get("a") is None
+
+
+def test_disk_cache_async_lookups_run_off_the_loop_and_count_once(tmp_path):
+    store = make_cache(tmp_path)
+    metrics.reset()
+
+    async def run():
+        loop_thread = threading.get_ident()
+        threads = []
+        original_get = store.get
+
+        def get(key, stage=None):
+            threads.append(threading.get_ident())
+            return original_get(key, stage)
+
+        store.get = get
+        await store.aset("a", {"x": 1})
+        hit = await store.aget("a", "resume_parse")
+        return hit, await store.aget("b"), threads, loop_thread
+
+    hit, miss, threads, loop_thread = asyncio.run(run())
+    assert hit == {"x": 1} and miss is None
+    assert loop_thread not in threads
+    stage = metrics._stages["resume_parse"]
+    assert (stage.cache_hits, stage.cache_misses) == (1, 0)
+
+
+def test_idempotency_key_reused_with_another_body_conflicts():
+    async def run():
+        idempotency = IdempotencyCache()
+
+        async def compute():
+            return {"ok": True}
+
+        await idempotency.run("/score", {"n": 1}, compute, idempotency_key="k")
+        with pytest.raises(IdempotencyConflict):
+            await idempotency.run("/score", {"n": 2}, compute, idempotency_key="k")
+        # The same key on another endpoint is a different request.
+        await idempotency.run("/parse", {"n": 2}, compute, idempotency_key="k")
+
+    asyncio.run(run())
+
+
+def test_idempotency_key_conflicts_while_first_request_is_running():
+    async def run():
+        idempotency = IdempotencyCache()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return {"ok": True}
+
+        first = asyncio.ensure_future(
+            idempotency.run("/score", {"n": 1}, compute, idempotency_key="k")
+        )
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyConflict):
+            await idempotency.run("/score", {"n": 2}, compute, idempotency_key="k")
+        release.set()
+        assert await first == {"ok": True}
+
+    asyncio.run(run())
+
+
+def test_idempotency_replays_and_coalesces_copies_of_one_response():
+    async def run():
+        idempotency = IdempotencyCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return {"items": [1]}
+
+        first, second = await asyncio.gather(
+            idempotency.run("/score", {"n": 1}, compute),
+            idempotency.run("/score", {"n": 1}, compute),
+        )
+        first["items"].append(2)
+        replay = await idempotency.run("/score", {"n": 1}, compute)
+
+        assert calls == 1
+        assert second == replay == {"items": [1]}
+        assert idempotency.stats()["coalesced"] == 1
+        assert idempotency.stats()["hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_scrape_cache_keys_results_by_url_and_params():
+    calls = []
+
+    def scrape(url, params=None):
+        calls.append((url, params))
+        return {"url": url, "params": params}
+
+    async def run():
+        scrapes = ScrapeCache(max_workers=2)
+        markdown = {"formats": ["markdown"]}
+        plain = await scrapes.get("https://x", scrape)
+        first = await scrapes.get("https://x", scrape, params=markdown)
+        again = await scrapes.get("https://x", scrape, params={"formats": ["markdown"]})
+        return plain, first, again
+
+    plain, first, again = asyncio.run(run())
+    assert plain["params"] is None
+    assert first["params"] == again["params"] == {"formats": ["markdown"]}
+    assert calls == [("https://x", None), ("https://x", {"formats": ["markdown"]})]
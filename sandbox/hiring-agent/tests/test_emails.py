@@ -0,0 +1,73 @@
+# tests/test_emails.py
+import asyncio
+import json
+
+import pytest
+
+import utils.emails as emails
+from utils.cache import email_skeleton_cache
+
+JOB = {"title": "Backend Engineer"}
+CANDIDATES = [{"name": "Ada", "overall": 8}, {"name": "Linus", "overall": 4}]
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake model: records each call's kind and answers it, or fails personalization."""
+    calls = []
+    state = {"fail_personalization": False}
+
+    async def call_llm(messages, response_format=None, **kwargs):
+        if response_format is emails.EmailPersonalizations:
+            calls.append("personalize")
+            if state["fail_personalization"]:
+                raise RuntimeError("rate limited")
+            return json.dumps(
+                {"items": [{"candidate": 0, "personalization": "Great systems work."}]}
+            )
+        if "reusable email template" in messages[0]["content"]:
+            calls.append("skeleton")
+            return f"Hi {emails.NAME_PLACEHOLDER},\n\nThanks.\n\nBest"
+        calls.append("bespoke")
+        return "A bespoke email"
+
+    email_skeleton_cache.clear()
+    monkeypatch.setattr(emails, "call_llm", call_llm)
+    return calls, state
+
+
+def test_bespoke_is_the_default_mode(llm):
+    calls, _ = llm
+    assert emails.EMAIL_MODE == "bespoke"
+
+    result = asyncio.run(emails.generate_emails(JOB, CANDIDATES, "reject"))
+
+    assert result == ["A bespoke email"] * 2
+    assert calls == ["bespoke", "bespoke"]
+
+
+def test_skeleton_mode_fills_name_and_personalization(llm):
+    calls, _ = llm
+
+    result = asyncio.run(
+        emails.generate_emails(JOB, CANDIDATES, "accept", mode="skeleton")
+    )
+
+    assert result == [
+        "Hi Ada,\n\nThanks.\n\nGreat systems work.\n\nBest",
+        "Hi Linus,\n\nThanks.\n\nBest",
+    ]
+    assert calls == ["skeleton", "personalize"]
+
+
+def test_failed_personalization_falls_back_to_bespoke_emails(llm):
+    calls, state = llm
+    state["fail_personalization"] = True
+
+    result = asyncio.run(
+        emails.generate_emails(JOB, CANDIDATES, "reject", mode="skeleton", batch_size=1)
+    )
+
+    assert result == ["A bespoke email"] * 2
+    assert calls.count("personalize") == 2
+    assert calls.count("bespoke") == 2
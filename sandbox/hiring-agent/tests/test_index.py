@@ -0,0 +1,71 @@
+# tests/test_index.py
+import numpy as np
+import pytest
+
+from utils.index import CandidateIndex
+
+
+def unit_vectors(count, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fill(index, vectors, prefix="k"):
+    keys = [f"{prefix}{row}" for row in range(len(vectors))]
+    resumes = [{"name": key} for key in keys]
+    return index.add(keys, resumes, vectors, "test-embedder")
+
+
+def test_search_returns_nearest_resumes_and_skips_known_keys(tmp_path):
+    index = CandidateIndex(str(tmp_path))
+    vectors = unit_vectors(20)
+
+    assert fill(index, vectors) == 20
+    assert fill(index, vectors) == 0
+
+    results = index.search(vectors[7], k=3, exact=True)
+    assert results[0][0] == "k7"
+    assert results[0][2] == {"name": "k7"}
+    assert results[0][1] == pytest.approx(1.0)
+    assert [score for _, score, _ in results] == sorted(
+        (score for _, score, _ in results), reverse=True
+    )
+
+
+def test_deletes_and_appends_are_shared_between_instances(tmp_path):
+    writer, reader = CandidateIndex(str(tmp_path)), CandidateIndex(str(tmp_path))
+    vectors = unit_vectors(10)
+    fill(writer, vectors[:5])
+    assert len(reader) == 5
+
+    # Each instance appends after the other's rows instead of over them.
+    fill(reader, vectors[5:], prefix="r")
+    assert writer.delete("k2")
+    assert not reader.delete("k2")
+
+    assert len(writer) == len(reader) == 9
+    assert "k2" not in reader and "r4" in writer
+    assert reader.search(vectors[2], k=9, exact=True)[0][0] != "k2"
+    assert writer.search(vectors[9], k=1, exact=True)[0][0] == "r4"
+
+
+def test_ivf_search_probing_every_list_matches_exact_search(tmp_path):
+    index = CandidateIndex(str(tmp_path), ivf_min_rows=1)
+    vectors = unit_vectors(200, seed=1)
+    fill(index, vectors)
+    index.train(clusters=8)
+
+    query = unit_vectors(1, seed=2)[0]
+    approximate = index.search(query, k=5, nprobe=8)
+    exact = index.search(query, k=5, exact=True)
+
+    assert [key for key, _, _ in approximate] == [key for key, _, _ in exact]
+    assert index.stats()["ivf_lists"] == 8
+
+
+def test_vectors_from_another_embedder_are_rejected(tmp_path):
+    index = CandidateIndex(str(tmp_path))
+    fill(index, unit_vectors(2))
+
+    with pytest.raises(ValueError, match="test-embedder"):
+        index.add(["x"], [{}], unit_vectors(1, dim=4), "other-embedder")
@@ -0,0 +1,84 @@
+# tests/test_jobs.py
+import asyncio
+import sqlite3
+
+from utils.jobs import JobQueue, job_worker, run_job
+
+
+def make_queue(tmp_path, **options):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), **options)
+
+
+def test_run_job_records_progress_partial_results_and_result(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("double", {"items": [1, 2, 3]})
+
+    async def double(payload, ctx):
+        await ctx.set_total("double", len(payload["items"]))
+        for index, item in enumerate(payload["items"]):
+            await ctx.add_result("double", index, item * 2)
+        return sum(payload["items"]) * 2
+
+    job = queue.claim("worker", ["double"])
+    asyncio.run(run_job(queue, job, double, "worker"))
+
+    finished = queue.get(job_id)
+    assert finished["status"] == "completed"
+    assert finished["result"] == 12
+    assert finished["progress"] == {"double": {"done": 3, "skipped": 0, "total": 3}}
+    assert [r["value"] for r in queue.results(job_id, "double", offset=1)] == [4, 6]
+
+
+def test_failed_handler_marks_the_job_failed(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("boom", {})
+
+    async def boom(payload, ctx):
+        raise ValueError("bad payload")
+
+    asyncio.run(run_job(queue, queue.claim("worker", ["boom"]), boom, "worker"))
+
+    assert queue.get(job_id)["status"] == "failed"
+    assert queue.get(job_id)["error"] == "bad payload"
+
+
+def test_stale_job_is_requeued_then_failed_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, stale_after=-1, max_attempts=2)
+    job_id = queue.submit("slow", {})
+
+    assert queue.claim("first", ["slow"])["id"] == job_id
+    assert queue.claim("second", ["slow"])["id"] == job_id  # first went stale
+    assert queue.claim("third", ["slow"]) is None
+    assert queue.get(job_id)["status"] == "failed"
+    assert queue.get(job_id)["error"] == "Worker lost"
+
+
+def test_worker_survives_a_queue_error_while_finishing_a_job(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    first, second = queue.submit("echo", 1), queue.submit("echo", 2)
+    complete = queue.complete
+    calls = []
+
+    def flaky_complete(job_id, worker, result):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        complete(job_id, worker, result)
+
+    monkeypatch.setattr(queue, "complete", flaky_complete)
+
+    async def echo(payload, ctx):
+        return payload
+
+    async def scenario():
+        worker = asyncio.create_task(job_worker(queue, {"echo": echo}, "w", 0.01))
+        while queue.get(second)["status"] != "completed":
+            assert not worker.done()
+            await asyncio.sleep(0.01)
+        worker.cancel()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+    assert calls == [first, second]
+    assert queue.get(first)["status"] == "running"  # re-queued once it goes stale
+    assert queue.get(second)["result"] == 2
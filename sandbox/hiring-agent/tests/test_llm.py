@@ -0,0 +1,35 @@
+# tests/test_llm.py
+import asyncio
+
+from utils import llm
+
+
+def test_each_loop_gets_its_own_client_and_run_async_closes_it():
+    async def step():
+        client = llm.get_async_client()
+        assert llm.get_async_client() is client
+        return client
+
+    first = llm.run_async(step())
+    second = llm.run_async(step())
+
+    assert first is not second
+    assert first.is_closed() and second.is_closed()
+    assert len(llm._clients) == 0
+
+
+def test_close_async_client_only_closes_the_running_loops_client():
+    async def run():
+        client = llm.get_async_client()
+        other = await asyncio.to_thread(asyncio.run, _client_of_new_loop())
+        await llm.close_async_client()
+        return client, other
+
+    client, other = asyncio.run(run())
+    assert client.is_closed()
+    assert not other.is_closed()
+    asyncio.run(other.close())
+
+
+async def _client_of_new_loop():
+    return llm.get_async_client()
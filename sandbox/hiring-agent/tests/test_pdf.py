@@ -0,0 +1,81 @@
+# tests/test_pdf.py
+import asyncio
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import backend.main as api
+import utils.pdf as pdf
+from benchmarks.synthetic import make_resume_corpus
+
+
+@pytest.fixture
+def slow_pool(monkeypatch):
+    """One worker whose "extraction" sleeps for the number of seconds in the file."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(pdf, "PDF_WORKERS", 1)
+    monkeypatch.setattr(pdf, "get_pdf_executor", lambda: executor)
+
+    def extract(pdf_bytes, max_pages):
+        time.sleep(float(pdf_bytes))
+        return pdf_bytes.decode()
+
+    monkeypatch.setattr(pdf, "extract_pdf_text", extract)
+    yield
+    executor.shutdown(wait=True)
+
+
+def test_process_pool_matches_in_process_extraction():
+    corpus = make_resume_corpus(3, seed=41)
+
+    async def run():
+        return await asyncio.gather(*(pdf.extract_pdf_text_async(f) for f in corpus))
+
+    try:
+        texts = asyncio.run(run())
+    finally:
+        pdf.shutdown_pdf_executor()
+
+    assert texts == [pdf.extract_pdf_text(f) for f in corpus]
+    assert all(texts)
+
+
+def test_timeout_starts_when_a_worker_picks_the_file_up(slow_pool):
+    async def run():
+        # Together they take longer than the timeout, each on its own does not.
+        return await asyncio.gather(
+            *(pdf.extract_pdf_text_async(b"0.15", timeout=0.25) for _ in range(2))
+        )
+
+    assert asyncio.run(run()) == ["0.15", "0.15"]
+
+
+def test_timed_out_file_keeps_its_worker_until_it_finishes(slow_pool):
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pdf.extract_pdf_text_async(b"0.2", timeout=0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        text = await pdf.extract_pdf_text_async(b"0", timeout=1)
+        return text, loop.time() - started
+
+    text, waited = asyncio.run(run())
+
+    assert text == "0"
+    assert waited >= 0.1
+
+
+def test_ingest_reports_unreadable_and_slow_pdfs_per_file(slow_pool, monkeypatch):
+    async def ingest(content):
+        return await api.ingest_resume_file(
+            api.ResumeFile(filename="r.pdf", content=base64.b64encode(content).decode())
+        )
+
+    async def slow(pdf_bytes, *args, **kwargs):
+        raise asyncio.TimeoutError
+
+    assert "Error processing PDF" in asyncio.run(ingest(b"not a number"))["error"]
+    monkeypatch.setattr(api, "extract_pdf_text_async", slow)
+    assert "timed out" in asyncio.run(ingest(b"0.5"))["error"]
@@ -0,0 +1,46 @@
+# tests/test_pipeline.py
+import asyncio
+import io
+
+import utils.utils as screening
+from benchmarks.synthetic import SimulatedLLM, make_resume_corpus
+
+
+def uploads(count, seed):
+    return [io.BytesIO(pdf) for pdf in make_resume_corpus(count, seed=seed)]
+
+
+def test_resumes_are_extracted_concurrently_off_the_loop(monkeypatch):
+    in_flight, peak = 0, 0
+
+    async def extract(pdf_bytes, *args, **kwargs):
+        nonlocal in_flight, peak
+        assert isinstance(pdf_bytes, bytes)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "Jane Doe\nExperience\nAcme Corp"
+
+    monkeypatch.setattr(screening, "extract_pdf_text_async", extract)
+    monkeypatch.setattr(screening, "call_llm", SimulatedLLM(time_scale=0.001))
+    monkeypatch.setattr(screening, "index_resumes", lambda resumes: asyncio.sleep(0))
+
+    result = asyncio.run(screening.parse_resumes(uploads(4, seed=21)))
+
+    assert peak == 4
+    assert all("error" not in parsed for parsed in result["parsed_resumes"])
+
+
+def test_extraction_timeout_is_reported_per_resume(monkeypatch):
+    async def extract(pdf_bytes, *args, **kwargs):
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(screening, "extract_pdf_text_async", extract)
+    monkeypatch.setattr(screening, "index_resumes", lambda resumes: asyncio.sleep(0))
+
+    result = asyncio.run(screening.parse_resumes(uploads(2, seed=22)))
+
+    errors = [parsed["error"] for parsed in result["parsed_resumes"]]
+    assert len(errors) == 2
+    assert all("timed out" in error for error in errors)
@@ -0,0 +1,31 @@
+# tests/test_ranking.py
+import numpy as np
+import pytest
+
+from utils.ranking import rank_scores
+
+
+def test_rank_scores_pages_join_up_to_the_full_ranking():
+    matrix = np.random.default_rng(0).integers(0, 10, size=(50, 4)).astype(float)
+    full, weighted = rank_scores(matrix)
+    pages = [rank_scores(matrix, offset=offset, limit=7)[0] for offset in range(0, 50, 7)]
+
+    assert list(np.concatenate(pages)) == list(full)
+    assert list(full) == sorted(range(50), key=lambda row: (-weighted[row], row))
+
+
+def test_rank_scores_keeps_input_order_for_ties():
+    matrix = np.ones((5, 4))
+    assert list(rank_scores(matrix, offset=1, limit=3)[0]) == [1, 2, 3]
+
+
+def test_rank_scores_page_past_the_end_is_empty():
+    matrix = np.ones((3, 4))
+    assert len(rank_scores(matrix, offset=2, limit=5)[0]) == 1
+    assert len(rank_scores(matrix, offset=10)[0]) == 0
+
+
+@pytest.mark.parametrize("offset, limit", [(-1, None), (0, 0), (0, -3)])
+def test_rank_scores_rejects_bad_paging(offset, limit):
+    with pytest.raises(ValueError):
+        rank_scores(np.ones((3, 4)), offset=offset, limit=limit)
@@ -0,0 +1,94 @@
+# tests/test_ratelimit.py
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from utils.ratelimit import PRIORITY_BULK, PRIORITY_INTERACTIVE, LLMScheduler
+
+
+def rate_limit_error(retry_after_ms=None):
+    headers = {} if retry_after_ms is None else {"retry-after-ms": str(retry_after_ms)}
+    response = httpx.Response(
+        429, headers=headers, request=httpx.Request("POST", "https://api.test/v1")
+    )
+    return openai.RateLimitError("Too many requests", response=response, body=None)
+
+
+def flaky(failures, error_factory):
+    """A request that raises error_factory() for its first `failures` calls."""
+    calls = []
+
+    async def request():
+        calls.append(len(calls))
+        if len(calls) <= failures:
+            raise error_factory()
+        return "ok"
+
+    return request, calls
+
+
+def test_rate_limited_request_is_retried_no_sooner_than_retry_after():
+    scheduler = LLMScheduler(max_retries=3, backoff_base=0.001)
+    request, calls = flaky(2, lambda: rate_limit_error(retry_after_ms=20))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await scheduler.run(request)
+        return result, loop.time() - started
+
+    result, elapsed = asyncio.run(run())
+
+    assert result == "ok"
+    assert len(calls) == 3
+    assert elapsed >= 0.04
+    assert scheduler.counters == {
+        "requests": 3,
+        "retries": 2,
+        "rate_limited": 2,
+        "failed": 0,
+    }
+
+
+def test_retries_are_bounded():
+    scheduler = LLMScheduler(max_retries=2, backoff_base=0.001)
+    request, calls = flaky(10, rate_limit_error)
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(scheduler.run(request))
+    assert len(calls) == 3
+    assert scheduler.counters["failed"] == 1
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    scheduler = LLMScheduler(max_retries=5, backoff_base=0.001)
+    request, calls = flaky(1, lambda: ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(request))
+    assert len(calls) == 1
+    assert scheduler.counters["retries"] == 0
+
+
+def test_interactive_requests_are_admitted_before_waiting_bulk_requests():
+    # 100 requests per second with room for a single request at a time.
+    scheduler = LLMScheduler(rpm=6000, burst_seconds=0)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire(0, priority)
+        order.append(name)
+
+    async def run():
+        await scheduler.acquire(0)  # drain the bucket so everyone else queues
+        await asyncio.gather(
+            call("bulk-1", PRIORITY_BULK),
+            call("bulk-2", PRIORITY_BULK),
+            call("interactive", PRIORITY_INTERACTIVE),
+        )
+
+    asyncio.run(run())
+
+    assert order == ["interactive", "bulk-1", "bulk-2"]
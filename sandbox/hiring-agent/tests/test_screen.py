@@ -0,0 +1,93 @@
+# tests/test_screen.py
+import asyncio
+import base64
+import json
+
+import backend.main as api
+from benchmarks.synthetic import SimulatedLLM, make_resume_corpus
+
+JOB_TEXT = "Data Engineer. Requirements: Python, SQL, Airflow."
+
+
+def screen_request(count, seed=0):
+    return api.ScreenRequest(
+        job_description={"text": JOB_TEXT},
+        resume_files=[
+            {"filename": f"r{index}.pdf", "content": base64.b64encode(pdf).decode()}
+            for index, pdf in enumerate(make_resume_corpus(count, seed=seed))
+        ],
+    )
+
+
+async def read_events(body):
+    return [json.loads(line) async for line in body]
+
+
+def test_screen_streams_job_description_candidates_then_ranking(monkeypatch):
+    monkeypatch.setattr(api, "call_llm", SimulatedLLM(time_scale=0.001))
+
+    async def run():
+        response = await api.screen(screen_request(3, seed=11))
+        return await read_events(response.body_iterator)
+
+    events = asyncio.run(run())
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "job_description"
+    assert kinds[-1] == "ranking"
+    assert sorted(e["index"] for e in events if e["event"] == "scored") == [0, 1, 2]
+    # Each candidate is parsed before it is scored.
+    for index in range(3):
+        order = [e["event"] for e in events if e.get("index") == index]
+        assert order == ["parsed", "scored"]
+    assert len(events[-1]["candidates"]) == 3
+
+
+def test_screen_disconnect_cancels_outstanding_candidates(monkeypatch):
+    monkeypatch.setattr(api, "call_llm", SimulatedLLM(time_scale=0.001))
+    cancelled = []
+
+    async def score_forever(job_description_text, parsed_resume):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(parsed_resume.get("name"))
+            raise
+
+    monkeypatch.setattr(api, "score_resume", score_forever)
+
+    async def run():
+        response = await api.screen(screen_request(2, seed=12))
+        body = response.body_iterator
+        seen = [json.loads(await body.__anext__()) for _ in range(3)]
+        await body.aclose()  # the client went away
+        await asyncio.sleep(0)
+        return seen
+
+    seen = asyncio.run(run())
+    assert seen[0]["event"] == "job_description"
+    assert len(cancelled) == 2
+
+
+def test_screen_disconnect_cancels_the_job_description(monkeypatch):
+    cancelled = []
+
+    async def extract_forever(job_text):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(job_text)
+            raise
+
+    monkeypatch.setattr(api, "extract_job_description", extract_forever)
+    monkeypatch.setattr(api, "call_llm", SimulatedLLM(time_scale=0.001))
+
+    async def run():
+        response = await api.screen(screen_request(1, seed=13))
+        reader = asyncio.ensure_future(response.body_iterator.__anext__())
+        await asyncio.sleep(0.05)
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled == [JOB_TEXT]
@@ -0,0 +1,129 @@
+# tests/test_sessions.py
+import asyncio
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+import backend.main as api
+from benchmarks.synthetic import SimulatedLLM, make_resume_corpus
+from utils.sessions import SessionConflict
+
+JOB_TEXT = "Data Engineer. Requirements: Python, SQL, Airflow."
+
+
+def resume_files(count, seed, prefix="r"):
+    return [
+        {"filename": f"{prefix}{index}.pdf", "content": base64.b64encode(pdf).decode()}
+        for index, pdf in enumerate(make_resume_corpus(count, seed=seed))
+    ]
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(api, "call_llm", SimulatedLLM(time_scale=0.001))
+
+
+def test_patch_only_screens_new_resumes(llm):
+    files = resume_files(3, seed=31)
+
+    async def run():
+        created = await api.create_session(
+            api.SessionUpdate(job_description=JOB_TEXT, resume_files=files)
+        )
+        patched = await api.patch_session(
+            created["session_id"],
+            api.SessionUpdate(resume_files=files + resume_files(1, seed=32, prefix="n")),
+        )
+        return created, patched
+
+    created, patched = asyncio.run(run())
+
+    assert created["delta"]["added"] == 3
+    assert patched["delta"]["unchanged"] == 3
+    assert patched["delta"]["added"] == 1 and patched["delta"]["rescored"] == 1
+    assert patched["total"] == 4
+    scores = [candidate["avg_score"] for candidate in patched["candidates"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_failed_score_is_not_ranked_and_is_retried_on_the_next_update(
+    llm, monkeypatch
+):
+    score_resume = api.score_resume
+    calls = []
+
+    async def fail_first(job_description_text, candidate):
+        calls.append(candidate["name"])
+        if len(calls) == 1:
+            return api.failed_score(candidate, "rate limited")
+        return await score_resume(job_description_text, candidate)
+
+    monkeypatch.setattr(api, "score_resume", fail_first)
+
+    async def run():
+        created = await api.create_session(
+            api.SessionUpdate(job_description=JOB_TEXT, resume_files=resume_files(2, 33))
+        )
+        patched = await api.patch_session(created["session_id"], api.SessionUpdate())
+        return created, patched
+
+    created, patched = asyncio.run(run())
+
+    assert created["delta"]["failed"] == 1
+    assert created["total"] == 1
+    assert created["errors"][0]["error"] == "Error during evaluation: rate limited"
+    assert patched["delta"] == {
+        "added": 0,
+        "replaced": 0,
+        "removed": 0,
+        "unchanged": 0,
+        "rescored": 1,
+        "failed": 0,
+        "job_description_changed": False,
+    }
+    assert patched["total"] == 2
+    assert patched["errors"] == []
+    assert calls[-1] == calls[0]
+
+
+def test_patch_reapplies_the_update_after_a_conflicting_save(llm, monkeypatch):
+    save_session = api.save_session
+    conflicts = []
+
+    def conflict_once(session):
+        if not conflicts:
+            conflicts.append(session["session_id"])
+            raise SessionConflict("changed by another request")
+        save_session(session)
+
+    async def run():
+        created = await api.create_session(
+            api.SessionUpdate(job_description=JOB_TEXT, resume_files=resume_files(1, 34))
+        )
+        monkeypatch.setattr(api, "save_session", conflict_once)
+        return await api.patch_session(
+            created["session_id"],
+            api.SessionUpdate(resume_files=resume_files(1, 35, prefix="n")),
+        )
+
+    patched = asyncio.run(run())
+
+    assert len(conflicts) == 1
+    assert patched["total"] == 2
+
+
+def test_patch_gives_up_with_409_when_saves_keep_conflicting(llm, monkeypatch):
+    def always_conflict(session):
+        raise SessionConflict("changed by another request")
+
+    async def run():
+        created = await api.create_session(
+            api.SessionUpdate(job_description=JOB_TEXT, resume_files=resume_files(1, 36))
+        )
+        monkeypatch.setattr(api, "save_session", always_conflict)
+        await api.patch_session(created["session_id"], api.SessionUpdate())
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 409
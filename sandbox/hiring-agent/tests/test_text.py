@@ -0,0 +1,49 @@
+# tests/test_text.py
+from utils.pdf import PAGE_BREAK
+from utils.text import compact_resume_text
+
+
+def test_years_and_repeated_headings_are_content():
+    text = (
+        "Jane Doe\nExperience\nAcme Corp\n2019\n..."
+        + PAGE_BREAK
+        + "Experience\nMore\n2020\nstuff"
+    )
+
+    compacted = compact_resume_text(text).text
+
+    assert compacted.split("\n") == [
+        "Jane Doe",
+        "Experience",
+        "Acme Corp",
+        "2019",
+        "Experience",
+        "More",
+        "2020",
+        "stuff",
+    ]
+
+
+def test_page_numbers_and_running_headers_are_dropped():
+    pages = [
+        f"Jane Doe - Page {page} of 3\nRole {page}\nShipped in 05/2020\n"
+        f"Detail {page}\n{page}"
+        for page in range(1, 4)
+    ]
+
+    compacted = compact_resume_text(PAGE_BREAK.join(pages)).text.split("\n")
+
+    assert compacted.count("Jane Doe - Page 1 of 3") == 1
+    assert not any(line.startswith("Jane Doe - Page 2") for line in compacted)
+    assert "1" not in compacted and "3" not in compacted
+    assert "Role 2" in compacted and "Detail 3" in compacted
+
+
+def test_numbers_inside_a_page_are_kept():
+    pages = [f"Header\nIntro {page}\n2\n2019\nOutro {page}\nFooter" for page in range(3)]
+
+    compacted = compact_resume_text(PAGE_BREAK.join(pages)).text.split("\n")
+
+    assert compacted.count("2019") == 3
+    assert compacted.count("2") == 3
+    assert compacted.count("Header") == 1 and compacted.count("Footer") == 1
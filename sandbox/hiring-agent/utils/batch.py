@@ -0,0 +1,334 @@
+# utils/batch.py
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Type
+
+from pydantic import BaseModel
+
+from utils.llm import LLM_MODEL, get_async_client, run_request
+from utils.ratelimit import PRIORITY_BULK, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# "realtime" calls the chat completions API directly; "batch" submits one Batch API
+# job per pipeline step and waits for it.
+LLM_EXECUTION = os.getenv("LLM_EXECUTION", "realtime")
+BATCH_BACKEND = os.getenv("BATCH_BACKEND", "openai")
+BATCH_DIR = os.getenv(
+    "BATCH_DIR", os.path.join(os.path.expanduser("~"), ".cache", "hiring-agent", "batches")
+)
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", str(24 * 60 * 60)))
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchRequest(NamedTuple):
+    custom_id: str
+    messages: List[Dict[str, str]]
+    response_format: Any = None
+
+
+class BatchError(Exception):
+    """Raised when a batch job ends without results."""
+
+
+def _strict_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in schema and len(schema) > 1:
+        # Strict mode does not allow keywords next to $ref; inline the definition.
+        ref = schema["$ref"].rsplit("/", 1)[-1]
+        schema = {**defs[ref], **{k: v for k, v in schema.items() if k != "$ref"}}
+    schema = {k: v for k, v in schema.items() if not (k == "default" and v is None)}
+    if schema.get("type") == "object" and "properties" in schema:
+        schema["properties"] = {
+            name: _strict_schema(field, defs)
+            for name, field in schema["properties"].items()
+        }
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    if "items" in schema:
+        schema["items"] = _strict_schema(schema["items"], defs)
+    if "anyOf" in schema:
+        schema["anyOf"] = [_strict_schema(option, defs) for option in schema["anyOf"]]
+    if "$defs" in schema:
+        schema["$defs"] = {
+            name: _strict_schema(definition, defs)
+            for name, definition in schema["$defs"].items()
+        }
+    return schema
+
+
+def response_format_param(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Returns the strict JSON-schema response_format for a Pydantic model.
+
+    This is the request that beta.chat.completions.parse sends for `model`, so batch
+    and real-time calls ask for the same output: every object lists all of its
+    properties as required and forbids additional ones.
+    """
+    schema = model.model_json_schema()
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "schema": _strict_schema(schema, schema.get("$defs", {})),
+            "name": model.__name__,
+            "strict": True,
+        },
+    }
+
+
+def to_jsonl(requests: List[BatchRequest], model: str = LLM_MODEL) -> bytes:
+    """Serializes chat completion requests in the Batch API's JSONL input format."""
+    lines = []
+    for request in requests:
+        body = {"model": model, "messages": request.messages}
+        if request.response_format is not None:
+            body["response_format"] = response_format_param(request.response_format)
+        lines.append(
+            json.dumps(
+                {
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": CHAT_COMPLETIONS_URL,
+                    "body": body,
+                }
+            )
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def parse_results(output: bytes) -> Dict[str, Any]:
+    """
+    Reads a Batch API output (or error) file.
+
+    Returns:
+        dict: custom_id -> the message content (str), or a BatchError describing
+              why that request failed.
+    """
+    results: Dict[str, Any] = {}
+    for line in output.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code", 200) != 200:
+            error = record.get("error") or body.get("error") or body
+            results[record["custom_id"]] = BatchError(f"Batch request failed: {error}")
+        else:
+            results[record["custom_id"]] = body["choices"][0]["message"]["content"]
+    return results
+
+
+class OpenAIBatchBackend:
+    """
+    Runs batch jobs through the OpenAI Batch API (24 hour completion window).
+
+    File and job requests go through the shared LLM scheduler at bulk priority. They
+    reserve no tokens: batch usage does not count against the realtime limits.
+    """
+
+    @staticmethod
+    async def _request(request: Callable[[], Awaitable[Any]]) -> Any:
+        return await run_request(request, priority=PRIORITY_BULK)
+
+    async def submit(self, payload: bytes) -> str:
+        client = get_async_client()
+        input_file = await self._request(
+            lambda: client.files.create(file=("requests.jsonl", payload), purpose="batch")
+        )
+        batch = await self._request(
+            lambda: client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=CHAT_COMPLETIONS_URL,
+                completion_window="24h",
+            )
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        client = get_async_client()
+        batch = await self._request(lambda: client.batches.retrieve(batch_id))
+        return batch.status
+
+    async def results(self, batch_id: str) -> bytes:
+        client = get_async_client()
+        batch = await self._request(lambda: client.batches.retrieve(batch_id))
+        output = b""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self._request(lambda: client.files.content(file_id))
+                output += content.read()
+        return output
+
+
+class LocalBatchBackend:
+    """
+    A file-based stand-in for the Batch API.
+
+    Each job gets a directory under `directory` holding input.jsonl, status and
+    output.jsonl in the Batch API formats. The job runs when it is first polled:
+    every request body is passed to `responder`, an async callable returning the
+    message content. Without a responder, requests go to the chat completions API
+    directly, which is handy for checking batch plumbing against the real model.
+    """
+
+    def __init__(
+        self,
+        directory: str = BATCH_DIR,
+        responder: Optional[Callable[[Dict[str, Any]], Awaitable[str]]] = None,
+    ):
+        self.directory = directory
+        self.responder = responder or self._chat_completion
+
+    @staticmethod
+    async def _chat_completion(body: Dict[str, Any]) -> str:
+        response = await run_request(
+            lambda: get_async_client().chat.completions.create(**body),
+            estimate_tokens(body["messages"]),
+            PRIORITY_BULK,
+        )
+        return response.choices[0].message.content
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.directory, batch_id, name)
+
+    async def submit(self, payload: bytes) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex}"
+        os.makedirs(os.path.join(self.directory, batch_id))
+        with open(self._path(batch_id, "input.jsonl"), "wb") as f:
+            f.write(payload)
+        with open(self._path(batch_id, "status"), "w") as f:
+            f.write("validating")
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        with open(self._path(batch_id, "status")) as f:
+            status = f.read().strip()
+        if status == "validating":
+            await self._run(batch_id)
+            status = "completed"
+        return status
+
+    async def _run(self, batch_id: str) -> None:
+        with open(self._path(batch_id, "input.jsonl"), "rb") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+
+        async def respond(request: Dict[str, Any]) -> Dict[str, Any]:
+            record = {"id": f"req_{uuid.uuid4().hex}", "custom_id": request["custom_id"]}
+            try:
+                content = await self.responder(request["body"])
+            except Exception as e:
+                record["response"] = None
+                record["error"] = {"code": "responder_error", "message": str(e)}
+                return record
+            record["response"] = {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+            }
+            record["error"] = None
+            return record
+
+        records = await asyncio.gather(*(respond(request) for request in requests))
+        with open(self._path(batch_id, "output.jsonl"), "w") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+        with open(self._path(batch_id, "status"), "w") as f:
+            f.write("completed")
+
+    async def results(self, batch_id: str) -> bytes:
+        with open(self._path(batch_id, "output.jsonl"), "rb") as f:
+            return f.read()
+
+
+_backend: Optional[Any] = None
+
+
+def get_batch_backend() -> Any:
+    """Returns the backend selected by BATCH_BACKEND ("openai" or "local")."""
+    global _backend
+    if _backend is None:
+        _backend = LocalBatchBackend() if BATCH_BACKEND == "local" else OpenAIBatchBackend()
+    return _backend
+
+
+def set_batch_backend(backend: Optional[Any]) -> None:
+    """Replaces the default backend, e.g. with a LocalBatchBackend and a fake responder."""
+    global _backend
+    _backend = backend
+
+
+async def run_batch(
+    requests: List[BatchRequest],
+    backend: Optional[Any] = None,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    timeout: float = BATCH_TIMEOUT,
+) -> Dict[str, Any]:
+    """
+    Submits chat completion requests as one batch job and waits for the results.
+
+    Parameters:
+        requests (list): BatchRequest tuples with unique custom_ids.
+        backend: Any object with async submit(payload) -> id, status(id) -> str and
+            results(id) -> bytes methods. Defaults to get_batch_backend().
+        poll_interval (float): Seconds between status checks.
+        timeout (float): Give up after this many seconds.
+
+    Returns:
+        dict: custom_id -> message content, or a BatchError for failed requests.
+              Requests missing from the output are reported as BatchErrors too.
+
+    Raises:
+        BatchError: If the job fails, expires, is cancelled or times out.
+    """
+    if not requests:
+        return {}
+    backend = backend or get_batch_backend()
+    batch_id = await backend.submit(to_jsonl(requests))
+    logger.info(f"Submitted batch {batch_id} with {len(requests)} requests")
+
+    deadline = time.monotonic() + timeout
+    while True:
+        status = await backend.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            break
+        if time.monotonic() > deadline:
+            raise BatchError(f"Batch {batch_id} did not finish within {timeout}s")
+        await asyncio.sleep(poll_interval)
+    if status != "completed":
+        raise BatchError(f"Batch {batch_id} ended with status {status}")
+
+    results = parse_results(await backend.results(batch_id))
+    for request in requests:
+        results.setdefault(
+            request.custom_id, BatchError("No result returned for this request")
+        )
+    return results
+
+
+async def complete_batch(
+    requests: List[BatchRequest], backend: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Like run_batch, but a job that fails as a whole is reported per request.
+
+    Returns:
+        dict: custom_id -> message content, or the exception for that request.
+    """
+    try:
+        return await run_batch(requests, backend)
+    except Exception as e:
+        logger.warning(f"Batch job failed: {e}")
+        return {request.custom_id: e for request in requests}
+
+
+def batch_content(results: Dict[str, Any], custom_id: str) -> str:
+    """Returns one request's message content, raising its error if it failed."""
+    content = results[custom_id]
+    if isinstance(content, Exception):
+        raise content
+    return content
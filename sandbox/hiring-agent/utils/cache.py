@@ -0,0 +1,528 @@
+# utils/cache.py
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from utils.metrics import metrics
+
+CACHE_PATH = os.getenv(
+    "HIRING_AGENT_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "hiring-agent", "cache.sqlite3"),
+)
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "10000"))
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+JD_CACHE_TTL = float(os.getenv("JD_CACHE_TTL", str(7 * 24 * 60 * 60)))
+JD_CACHE_MAX_ENTRIES = int(os.getenv("JD_CACHE_MAX_ENTRIES", "2000"))
+SCORE_CACHE_TTL = float(os.getenv("SCORE_CACHE_TTL", str(30 * 24 * 60 * 60)))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "100000"))
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", "3600"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "256"))
+# Scrapes are network-bound, so many can wait at once; the default executor only
+# has a handful of threads and would run a batch of postings a few at a time.
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "32"))
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "128"))
+
+
+def sha256_hex(data: Union[bytes, memoryview]) -> str:
+    """Returns the hex SHA-256 digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def schema_version(model: Type[BaseModel]) -> str:
+    """
+    Returns a short fingerprint of a Pydantic model's JSON schema.
+
+    Any change to the model's fields or descriptions changes the fingerprint, so cache
+    entries produced under an older schema are never served for the new one.
+    """
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return sha256_hex(schema.encode("utf-8"))[:12]
+
+
+class DiskCache:
+    """
+    A small persistent key/value cache backed by SQLite.
+
+    Values are stored as JSON. Entries are evicted least-recently-used first once the
+    namespace exceeds `max_entries` or `max_bytes`, and entries older than `ttl`
+    seconds are treated as misses. Hit and miss counts are kept per instance for
+    monitoring. Several namespaces (and processes) can share one file.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        path: str = CACHE_PATH,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_lru"
+                " ON cache_entries (namespace, accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, stage: Optional[str] = None) -> Optional[Any]:
+        """
+        Returns the cached value for `key`, or None on a miss.
+
+        The lookup is counted against `stage`, or the current stage if there is one
+        (see metrics.record_cache).
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            now = time.time()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                metrics.record_cache(False, stage)
+                return None
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            conn.commit()
+            self.hits += 1
+            metrics.record_cache(True, stage)
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores `value` under `key` and evicts old entries if over budget."""
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries"
+                " (namespace, key, value, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, len(payload), now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    async def aget(self, key: str, stage: Optional[str] = None) -> Optional[Any]:
+        """get() in a worker thread, for callers on the event loop."""
+        return await asyncio.to_thread(self.get, key, stage)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """set() in a worker thread, for callers on the event loop."""
+        await asyncio.to_thread(self.set, key, value)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        over_entries = self.max_entries is not None and count > self.max_entries
+        over_bytes = self.max_bytes is not None and total > self.max_bytes
+        if not over_entries and not over_bytes:
+            return
+
+        # Walk entries oldest-access first until both budgets are satisfied.
+        doomed = []
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at",
+            (self.namespace,),
+        )
+        for key, size in rows:
+            if (self.max_entries is None or count <= self.max_entries) and (
+                self.max_bytes is None or total <= self.max_bytes
+            ):
+                break
+            doomed.append((self.namespace, key))
+            count -= 1
+            total -= size
+        conn.executemany(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", doomed
+        )
+
+    def clear(self) -> None:
+        """Removes every entry in this namespace."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            )
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current size of this namespace."""
+        with self._lock:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+
+# Extracted PDF text, keyed by the SHA-256 of the PDF bytes.
+pdf_text_cache = DiskCache(
+    "pdf_text", max_entries=RESUME_CACHE_MAX_ENTRIES, max_bytes=RESUME_CACHE_MAX_BYTES
+)
+
+# Parsed Resume records, keyed by content hash + Resume schema version + model name.
+resume_cache = DiskCache(
+    "parsed_resumes",
+    max_entries=RESUME_CACHE_MAX_ENTRIES,
+    max_bytes=RESUME_CACHE_MAX_BYTES,
+)
+
+
+def resume_cache_key(content_hash: str, model: Type[BaseModel], model_name: str) -> str:
+    """Builds the parsed-resume cache key for a content hash, schema and LLM model."""
+    return f"{content_hash}:{schema_version(model)}:{model_name}"
+
+
+# Structured JobDescription results, keyed by the normalized job text.
+job_description_cache = DiskCache(
+    "job_descriptions", max_entries=JD_CACHE_MAX_ENTRIES, ttl=JD_CACHE_TTL
+)
+
+
+def job_description_cache_key(
+    job_text: str, model: Type[BaseModel], model_name: str
+) -> str:
+    """
+    Builds the job-description cache key.
+
+    Whitespace is collapsed before hashing, so re-scraping a posting whose only change
+    is layout still hits the cache.
+    """
+    normalized = " ".join(job_text.split())
+    return f"{sha256_hex(normalized.encode('utf-8'))}:{schema_version(model)}:{model_name}"
+
+
+# CandidateScore records, keyed by job description + parsed resume + schema + model.
+score_cache = DiskCache(
+    "candidate_scores", max_entries=SCORE_CACHE_MAX_ENTRIES, ttl=SCORE_CACHE_TTL
+)
+
+
+def score_cache_key(
+    job_description_text: str,
+    candidate: Dict[str, Any],
+    model: Type[BaseModel],
+    model_name: str,
+) -> str:
+    """
+    Builds the candidate-score cache key.
+
+    Both inputs are hashed separately, so an edited job description misses for every
+    candidate while the parsed resumes (cached under their own keys) stay valid.
+    """
+    job_hash = sha256_hex(job_description_text.encode("utf-8"))
+    candidate_hash = sha256_hex(json.dumps(candidate, sort_keys=True).encode("utf-8"))
+    return f"{job_hash}:{candidate_hash}:{schema_version(model)}:{model_name}"
+
+
+# Shared accept/reject email skeletons, keyed by job description + email kind + model.
+email_skeleton_cache = DiskCache(
+    "email_skeletons", max_entries=JD_CACHE_MAX_ENTRIES, ttl=JD_CACHE_TTL
+)
+
+
+class ScrapeCache:
+    """
+    An in-memory cache for job-posting scrapes, keyed by URL and scrape params.
+
+    Results are kept for `ttl` seconds and the least-recently-used entry is dropped
+    once more than `max_entries` are stored. Concurrent requests for the same URL and
+    params share a single in-flight scrape instead of each calling the scraper. The
+    scraper is a plain blocking callable (e.g. `FirecrawlApp.scrape_url`) and runs in
+    the cache's own pool of `max_workers` threads so it never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "scrapes",
+        ttl: float = SCRAPE_CACHE_TTL,
+        max_entries: int = SCRAPE_CACHE_MAX_ENTRIES,
+        max_workers: int = SCRAPE_MAX_WORKERS,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(
+        self,
+        url: str,
+        scrape: Callable[..., Any],
+        params: Optional[Dict[str, Any]] = None,
+        refresh: bool = False,
+    ) -> Any:
+        """
+        Returns the scrape result for `url`, fetching it with `scrape` only when needed.
+
+        Parameters:
+            url (str): The URL to scrape.
+            scrape (Callable): Blocking function called as `scrape(url)`, or
+                `scrape(url, params=params)` when `params` is given.
+            params (dict): Scrape options (e.g. output formats); results fetched with
+                different params are cached separately.
+            refresh (bool): Ignore any cached result and re-fetch.
+
+        Returns:
+            Any: Whatever `scrape` returned. Failed scrapes are not cached.
+        """
+        key = url if params is None else f"{url} {json.dumps(params, sort_keys=True)}"
+        entry = self._entries.get(key)
+        if entry is not None and not refresh and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.record_cache(True)
+            return entry[1]
+
+        task = self._inflight.get(key)
+        metrics.record_cache(task is not None)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            fetch = scrape if params is None else functools.partial(scrape, params=params)
+            task = asyncio.ensure_future(self._fetch(key, url, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller does not cancel the scrape for the others.
+        return await asyncio.shield(task)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.namespace
+            )
+        return self._executor
+
+    async def _fetch(self, key: str, url: str, scrape: Callable[[str], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._get_executor(), scrape, url)
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Drops every cached scrape."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/coalescing counters and the number of cached scrapes."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+# Job posting scrapes, keyed by URL and scrape params.
+scrape_cache = ScrapeCache()
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an idempotency key is reused with a different request body."""
+
+
+def request_fingerprint(path: str, body: Any) -> str:
+    """Hashes an endpoint path and its JSON body, ignoring key order and whitespace."""
+    payload = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return sha256_hex(f"{path}\n{payload}".encode("utf-8"))
+
+
+class IdempotencyCache:
+    """
+    Deduplicates identical API requests.
+
+    While a request is running, duplicates wait on the same task instead of starting
+    their own; once it finishes, its response is replayed for `ttl` seconds. Requests
+    are matched by an explicit idempotency key when the client sends one, otherwise by
+    a fingerprint of the endpoint and body. Failed requests are not cached, so a
+    retry after an error runs again. Every caller gets its own copy of the response,
+    so one handler mutating its result cannot change what later replays return.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "idempotency",
+        ttl: float = IDEMPOTENCY_TTL,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # key -> (expiry, fingerprint, response)
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+    async def run(
+        self,
+        path: str,
+        body: Any,
+        compute: Callable[[], Awaitable[Any]],
+        idempotency_key: Optional[str] = None,
+    ) -> Any:
+        """
+        Returns the response for a request, running `compute` only for the first copy.
+
+        Parameters:
+            path (str): The endpoint path; keys and fingerprints are scoped to it.
+            body (Any): The JSON request body.
+            compute (Callable): Zero-argument coroutine function producing the response.
+            idempotency_key (str): The client's Idempotency-Key header, if any.
+
+        Returns:
+            Any: The response of the first request with this key.
+
+        Raises:
+            IdempotencyConflict: If `idempotency_key` was already used with another body.
+        """
+        fingerprint = request_fingerprint(path, body)
+        key = f"{path}:key:{idempotency_key}" if idempotency_key else fingerprint
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            self._check(entry[1], fingerprint, idempotency_key)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[2])
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._check(inflight[0], fingerprint, idempotency_key)
+            self.coalesced += 1
+            task = inflight[1]
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(key, fingerprint, compute))
+            self._inflight[key] = (fingerprint, task)
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a disconnecting client does not cancel the work others wait on.
+        return copy.deepcopy(await asyncio.shield(task))
+
+    @staticmethod
+    def _check(stored: str, fingerprint: str, idempotency_key: Optional[str]) -> None:
+        if stored != fingerprint:
+            raise IdempotencyConflict(
+                f"Idempotency-Key {idempotency_key!r} was already used for a different request"
+            )
+
+    async def _compute(
+        self, key: str, fingerprint: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        response = await compute()
+        self._entries[key] = (time.monotonic() + self.ttl, fingerprint, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return response
+
+    def clear(self) -> None:
+        """Drops every stored response."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns replay/coalescing counters and the number of stored responses."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+
+# Responses of the expensive backend endpoints, for duplicate submissions.
+idempotency_cache = IdempotencyCache()
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns hit/miss statistics for every shared cache, keyed by namespace."""
+    caches = [
+        pdf_text_cache,
+        resume_cache,
+        job_description_cache,
+        score_cache,
+        email_skeleton_cache,
+        scrape_cache,
+        idempotency_cache,
+    ]
+    return {cache.namespace: cache.stats() for cache in caches}
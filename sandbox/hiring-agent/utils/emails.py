@@ -0,0 +1,319 @@
+# utils/emails.py
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from utils.batch import LLM_EXECUTION, BatchRequest, batch_content, complete_batch
+from utils.cache import email_skeleton_cache, sha256_hex
+from utils.llm import LLM_MODEL, call_llm
+from utils.metrics import metrics
+from utils.prompts import compact_json, shared_prefix
+
+logger = logging.getLogger(__name__)
+
+# "bespoke" writes every email from scratch with its own LLM call; "skeleton" writes
+# one shared email per (job, accept/reject) and personalizes it in batched calls.
+EMAIL_MODE = os.getenv("EMAIL_MODE", "bespoke")
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_CONCURRENCY = int(os.getenv("EMAIL_MAX_CONCURRENCY", "8"))
+
+NAME_PLACEHOLDER = "{candidate_name}"
+PERSONALIZATION_PLACEHOLDER = "{personalization}"
+
+EMAIL_INSTRUCTIONS = {
+    "accept": (
+        "Please create an invitation email inviting the candidate for a quick call. "
+        "The email should be friendly, professional, and include a scheduling request."
+    ),
+    "reject": (
+        "Please create a polite rejection email. Include constructive feedback and key "
+        "suggestions for improvement based on the candidate's evaluation."
+    ),
+}
+
+PERSONALIZATION_INSTRUCTIONS = {
+    "accept": "what stood out about them for this role",
+    "reject": "constructive feedback and one or two concrete suggestions for improvement",
+}
+
+# The candidate fields that matter for an email; the full resume is left out.
+CANDIDATE_EMAIL_FIELDS = ("name", "relevance", "experience", "skills", "overall", "comment")
+
+
+class EmailPersonalization(BaseModel):
+    candidate: int = Field(..., description="Index of the candidate in the request")
+    personalization: str = Field(
+        ..., description="One or two sentences written for this candidate"
+    )
+
+
+class EmailPersonalizations(BaseModel):
+    items: List[EmailPersonalization]
+
+
+def email_candidate(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of a candidate evaluation that an email is based on."""
+    return {key: candidate[key] for key in CANDIDATE_EMAIL_FIELDS if key in candidate}
+
+
+def build_email_messages(
+    job_description: Dict[str, Any], candidate: Dict[str, Any], kind: str
+) -> List[Dict[str, str]]:
+    """
+    Builds the messages for one fully bespoke accept or reject email.
+
+    The system prompt and job description are the same for every candidate of the
+    job (see utils.prompts.shared_prefix); the candidate and email kind follow.
+    """
+    system_prompt = (
+        "You are an unbiased HR professional. Your task is to craft clear, concise, "
+        "and professional email responses to candidates based on the job description, "
+        "the candidate's resume details, and evaluation scores. "
+        "Return only the email body as plain text."
+    )
+    prefix = shared_prefix(
+        system_prompt, compact_json(job_description), "Job Description (structured)"
+    )
+    return prefix + [
+        {
+            "role": "user",
+            "content": f"Candidate Evaluation (structured):\n{compact_json(candidate)}",
+        },
+        {"role": "assistant", "content": EMAIL_INSTRUCTIONS[kind]},
+    ]
+
+
+async def generate_bespoke_email(
+    job_description: Dict[str, Any], candidate: Dict[str, Any], kind: str
+) -> str:
+    """Writes one email from scratch with its own LLM call."""
+    return await call_llm(build_email_messages(job_description, candidate, kind))
+
+
+async def get_email_skeleton(job_description: Dict[str, Any], kind: str) -> str:
+    """
+    Returns the shared accept or reject email for a job, generating it on first use.
+
+    The skeleton contains NAME_PLACEHOLDER and PERSONALIZATION_PLACEHOLDER, which
+    fill_skeleton replaces for each candidate. Skeletons are cached per job
+    description, email kind and model.
+    """
+    cache_key = f"{sha256_hex(compact_json(job_description).encode('utf-8'))}:{kind}:{LLM_MODEL}"
+    skeleton = await email_skeleton_cache.aget(cache_key)
+    if skeleton is not None:
+        return skeleton
+
+    system_prompt = (
+        "You are an unbiased HR professional writing a reusable email template "
+        "that will be sent to many candidates for the same job. "
+        "Return only the email body as plain text."
+    )
+    messages = shared_prefix(
+        system_prompt, compact_json(job_description), "Job Description (structured)"
+    ) + [
+        {
+            "role": "user",
+            "content": (
+                f"{EMAIL_INSTRUCTIONS[kind]}\n"
+                f"Address the candidate as {NAME_PLACEHOLDER} and put the placeholder "
+                f"{PERSONALIZATION_PLACEHOLDER} on its own line where a paragraph about "
+                f"{PERSONALIZATION_INSTRUCTIONS[kind]} belongs. Do not mention any "
+                "specific candidate's details."
+            ),
+        },
+    ]
+    skeleton = await call_llm(messages)
+    if PERSONALIZATION_PLACEHOLDER not in skeleton:
+        # Keep the sign-off last: slot the paragraph in before the final one.
+        paragraphs = skeleton.rstrip().split("\n\n")
+        paragraphs.insert(max(1, len(paragraphs) - 1), PERSONALIZATION_PLACEHOLDER)
+        skeleton = "\n\n".join(paragraphs)
+    await email_skeleton_cache.aset(cache_key, skeleton)
+    return skeleton
+
+
+def fill_skeleton(skeleton: str, candidate: Dict[str, Any], personalization: str) -> str:
+    """Fills a skeleton's placeholders for one candidate."""
+    email = skeleton.replace(NAME_PLACEHOLDER, candidate.get("name", "Candidate"))
+    email = email.replace(PERSONALIZATION_PLACEHOLDER, personalization.strip())
+    # An empty personalization would otherwise leave a gap between paragraphs.
+    return re.sub(r"\n{3,}", "\n\n", email)
+
+
+def build_personalization_messages(
+    job_description: Dict[str, Any], candidates: List[Dict[str, Any]], kind: str
+) -> List[Dict[str, str]]:
+    """
+    Builds the messages that personalize several candidates' emails in one call.
+
+    The system prompt and job description are shared by every batch of the job,
+    accept and reject alike (see utils.prompts.shared_prefix); the email kind and
+    the candidates follow.
+    """
+    candidate_lines = "\n".join(
+        f"{index}: {compact_json(email_candidate(candidate))}"
+        for index, candidate in enumerate(candidates)
+    )
+    system_prompt = (
+        "You are an unbiased HR professional writing a short personalized paragraph "
+        "for each candidate's email about the following job. Address the candidate "
+        "directly and do not add a greeting or sign-off."
+    )
+    prefix = shared_prefix(
+        system_prompt, compact_json(job_description), "Job Description (structured)"
+    )
+    return prefix + [
+        {
+            "role": "user",
+            "content": (
+                "For each candidate, write one or two sentences of "
+                f"{PERSONALIZATION_INSTRUCTIONS[kind]}, based on their evaluation.\n\n"
+                f"Candidates (index: evaluation):\n{candidate_lines}"
+            ),
+        },
+    ]
+
+
+def read_personalizations(llm_response: str, count: int) -> List[str]:
+    """
+    Returns one paragraph per candidate, in order, from an EmailPersonalizations reply.
+
+    Candidates the model skipped get an empty paragraph, which leaves the shared
+    skeleton text on its own.
+    """
+    paragraphs = [""] * count
+    for item in json.loads(llm_response)["items"]:
+        if 0 <= item["candidate"] < count:
+            paragraphs[item["candidate"]] = item["personalization"]
+    return paragraphs
+
+
+async def personalize_batch(
+    job_description: Dict[str, Any], candidates: List[Dict[str, Any]], kind: str
+) -> List[str]:
+    """Writes the personalized paragraph for several candidates in one LLM call."""
+    messages = build_personalization_messages(job_description, candidates, kind)
+    llm_response = await call_llm(messages, response_format=EmailPersonalizations)
+    return read_personalizations(llm_response, len(candidates))
+
+
+async def generate_emails(
+    job_description: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+    kind: str,
+    mode: str = EMAIL_MODE,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    batch_size: int = EMAIL_BATCH_SIZE,
+    execution: str = LLM_EXECUTION,
+) -> List[str]:
+    """
+    Writes an accept or reject email for every candidate, concurrently.
+
+    With `execution="batch"` the per-candidate calls (bespoke emails, or the
+    personalization calls in skeleton mode) go out as one Batch API job; the shared
+    skeleton itself is still written in real time.
+
+    Parameters:
+        job_description (dict): The structured job description.
+        candidates (list): Candidate evaluation dictionaries.
+        kind (str): "accept" or "reject".
+        mode (str): "skeleton" (one shared template, personalized in batches of
+            `batch_size` candidates per call) or "bespoke" (one call per candidate).
+        semaphore (asyncio.Semaphore): Bounds the LLM calls in flight.
+        batch_size (int): Candidates personalized per call in skeleton mode.
+        execution (str): "realtime" or "batch" (see utils.batch).
+
+    Returns:
+        list: One email body per candidate, in order. A failed call yields an
+              "Error generating email: ..." body for the affected candidates. In
+              skeleton mode a batch whose personalization fails is written bespoke
+              instead.
+    """
+    if not candidates:
+        return []
+    semaphore = semaphore or asyncio.Semaphore(EMAIL_MAX_CONCURRENCY)
+
+    async def write_bespoke(candidate: Dict[str, Any]) -> str:
+        async with metrics.queued(semaphore):
+            try:
+                return await generate_bespoke_email(job_description, candidate, kind)
+            except Exception as e:
+                metrics.mark_error()
+                return f"Error generating email: {e}"
+
+    if mode == "bespoke":
+        if execution == "batch":
+            results = await complete_batch(
+                [
+                    BatchRequest(str(index), build_email_messages(job_description, c, kind))
+                    for index, c in enumerate(candidates)
+                ]
+            )
+            emails = []
+            for index in range(len(candidates)):
+                try:
+                    emails.append(batch_content(results, str(index)))
+                except Exception as e:
+                    emails.append(f"Error generating email: {e}")
+            return emails
+
+        write = metrics.timed("email")(write_bespoke)
+        return list(await asyncio.gather(*(write(c) for c in candidates)))
+
+    try:
+        with metrics.stage("email"):
+            async with metrics.queued(semaphore):
+                skeleton = await get_email_skeleton(job_description, kind)
+    except Exception as e:
+        return [f"Error generating email: {e}"] * len(candidates)
+
+    batches = [
+        candidates[start : start + max(1, batch_size)]
+        for start in range(0, len(candidates), max(1, batch_size))
+    ]
+    batch_results = None
+    if execution == "batch":
+        batch_results = await complete_batch(
+            [
+                BatchRequest(
+                    str(index),
+                    build_personalization_messages(job_description, batch, kind),
+                    EmailPersonalizations,
+                )
+                for index, batch in enumerate(batches)
+            ]
+        )
+
+    @metrics.timed("email")
+    async def write_batch(index: int, batch: List[Dict[str, Any]]) -> List[str]:
+        try:
+            if batch_results is not None:
+                paragraphs = read_personalizations(
+                    batch_content(batch_results, str(index)), len(batch)
+                )
+            else:
+                async with metrics.queued(semaphore):
+                    paragraphs = await personalize_batch(job_description, batch, kind)
+        except Exception as e:
+            # Sending the bare template would look personalized but say nothing about
+            # the candidate, so these candidates get bespoke emails instead.
+            metrics.mark_error()
+            logger.warning(
+                f"Email personalization failed for {len(batch)} candidates, "
+                f"writing bespoke emails instead: {e}"
+            )
+            return list(await asyncio.gather(*(write_bespoke(c) for c in batch)))
+        return [
+            fill_skeleton(skeleton, candidate, paragraph)
+            for candidate, paragraph in zip(batch, paragraphs)
+        ]
+
+    results = await asyncio.gather(
+        *(write_batch(index, batch) for index, batch in enumerate(batches))
+    )
+    return [email for batch in results for email in batch]
@@ -0,0 +1,499 @@
+# utils/index.py
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the index is then only safe within one process.
+    fcntl = None
+
+from utils.ranking import top_k
+from utils.ratelimit import bulk_priority
+from utils.retrieval import get_default_embedder, job_description_text, resume_text
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_INDEX_PATH = os.getenv(
+    "CANDIDATE_INDEX_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "hiring-agent", "candidate-index"),
+)
+# Off by default: indexing embeds every parsed resume, which costs an embedding
+# call per resume with the OpenAI embedder.
+CANDIDATE_INDEX_ENABLED = os.getenv("CANDIDATE_INDEX_ENABLED", "0") == "1"
+# Below this many stored resumes an exact scan is fast enough and IVF is skipped.
+# An exact scan of 100k 1024-dim vectors takes around 10ms on a laptop.
+IVF_MIN_ROWS = int(os.getenv("IVF_MIN_ROWS", "250000"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "32"))
+
+KEY_WIDTH = 64  # a hex SHA-256 content hash
+
+
+def _kmeans(
+    vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means: returns `clusters` unit-length centroids for unit `vectors`."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed empty clusters from random points so every list is used.
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class CandidateIndex:
+    """
+    A persistent, append-only index of parsed resumes and their embeddings.
+
+    Everything lives in one directory:
+
+        meta.json       embedder name and vector size
+        vectors.f32     one float32 row per resume, memory-mapped for search
+        keys.bin        the content hash of each row, fixed width
+        records.jsonl   the parsed Resume of each row, one JSON document per line
+        offsets.u64     end offset of each row in records.jsonl
+        tombstones.txt  row numbers of deleted resumes, one per line
+        ivf.npz         IVF centroids and list assignments, once trained
+        lock            held (flock) by whichever process is writing
+
+    Rows are only ever appended; deleting a resume writes a tombstone and re-adding it
+    appends a fresh row. offsets.u64 is written last, so a crash mid-insert leaves a
+    partial row that is discarded before the next write.
+
+    Several processes (the Streamlit app, uvicorn workers) can share one directory.
+    Writes hold an exclusive file lock and first catch up with rows and tombstones
+    other processes have written; reads catch up without the lock, since a row is
+    only visible once its offset is complete.
+
+    Search is either an exact scan over the memory-mapped vectors or, once there are
+    `ivf_min_rows` rows, an inverted-file (IVF) search that only scans the `nprobe`
+    k-means lists closest to the query. The IVF is retrained when the index has
+    doubled in size since it was last trained.
+    """
+
+    def __init__(self, path: str = CANDIDATE_INDEX_PATH, ivf_min_rows: int = IVF_MIN_ROWS):
+        self.path = path
+        self.ivf_min_rows = ivf_min_rows
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Holds an exclusive lock on the index directory across processes."""
+        os.makedirs(self.path, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self._file("lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self.dim: Optional[int] = None
+        self.embedder_name: Optional[str] = None
+        self._offsets = np.zeros(0, dtype=np.uint64)
+        self._keys: List[str] = []
+        self._deleted = np.zeros(0, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._tombstones_read = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._vectors = None
+        with self._file_lock():
+            self._discard_partial_row()
+            self._refresh()
+        if os.path.exists(self._file("ivf.npz")):
+            ivf = np.load(self._file("ivf.npz"))
+            self._centroids = ivf["centroids"]
+            self._assignments = ivf["assignments"][: len(self._keys)]
+        self._trained_rows = len(self._assignments)
+        self._loaded = True
+        self._assign_new_rows()
+
+    def _committed_rows(self) -> int:
+        path = self._file("offsets.u64")
+        return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+    def _discard_partial_row(self) -> None:
+        """Drops anything written after the last complete row. Needs the file lock."""
+        count = self._committed_rows()
+        self._truncate("offsets.u64", count * 8)
+        if not count:
+            end = 0
+        else:
+            with open(self._file("offsets.u64"), "rb") as f:
+                f.seek((count - 1) * 8)
+                end = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        self._truncate("records.jsonl", end)
+        self._truncate("keys.bin", count * KEY_WIDTH)
+        if self.dim is not None or self._read_meta():
+            self._truncate("vectors.f32", count * self.dim * 4)
+
+    def _read_meta(self) -> bool:
+        if self.embedder_name is None and os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+            self.dim, self.embedder_name = meta["dim"], meta["embedder"]
+        return self.embedder_name is not None
+
+    def _refresh(self) -> None:
+        """Catches up with rows and tombstones written since the last look."""
+        self._read_meta()
+        known = len(self._offsets)
+        count = self._committed_rows()
+        if count > known:
+            with open(self._file("offsets.u64"), "rb") as f:
+                f.seek(known * 8)
+                new_offsets = np.frombuffer(f.read((count - known) * 8), dtype=np.uint64)
+            with open(self._file("keys.bin"), "rb") as f:
+                f.seek(known * KEY_WIDTH)
+                raw = f.read((count - known) * KEY_WIDTH)
+            self._offsets = np.concatenate([self._offsets, new_offsets])
+            self._deleted = np.concatenate([self._deleted, np.zeros(count - known, dtype=bool)])
+            for row in range(known, count):
+                start = (row - known) * KEY_WIDTH
+                key = raw[start : start + KEY_WIDTH].decode("ascii").rstrip()
+                self._keys.append(key)
+                self._rows[key] = row
+
+        path = self._file("tombstones.txt")
+        if os.path.exists(path) and os.path.getsize(path) > self._tombstones_read:
+            with open(path, "rb") as f:
+                f.seek(self._tombstones_read)
+                data = f.read()
+            for line in data.splitlines(keepends=True):
+                # Stop at a half-written line or a row appended after we read offsets.
+                if not line.endswith(b"\n") or (line.strip() and int(line) >= count):
+                    break
+                self._tombstones_read += len(line)
+                if not line.strip():
+                    continue
+                row = int(line)
+                self._deleted[row] = True
+                if self._rows.get(self._keys[row]) == row:
+                    del self._rows[self._keys[row]]
+        if self._loaded:
+            self._assign_new_rows()
+
+    def _truncate(self, name: str, size: int) -> None:
+        path = self._file(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    def _matrix(self) -> np.ndarray:
+        """The memory-mapped vectors, re-mapped whenever rows have been appended."""
+        count = len(self._keys)
+        if count == 0:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        if self._vectors is None or len(self._vectors) != count:
+            self._vectors = np.memmap(
+                self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(count, self.dim)
+            )
+        return self._vectors
+
+    def _assign_new_rows(self) -> None:
+        """Puts rows appended since the IVF was trained into their nearest list."""
+        if self._centroids is None or len(self._assignments) == len(self._keys):
+            return
+        new_rows = np.asarray(self._matrix()[len(self._assignments) :])
+        nearest = np.argmax(new_rows @ self._centroids.T, axis=1).astype(np.int32)
+        self._assignments = np.concatenate([self._assignments, nearest])
+
+    def _check_embedder(self, name: str, dim: int) -> None:
+        if self.embedder_name is None:
+            self.dim, self.embedder_name = dim, name
+            # Readers do not take the file lock, so never expose a half-written file.
+            with open(self._file("meta.json.tmp"), "w") as f:
+                json.dump({"dim": dim, "embedder": name}, f)
+            os.replace(self._file("meta.json.tmp"), self._file("meta.json"))
+        elif self.embedder_name != name or self.dim != dim:
+            raise ValueError(
+                f"Candidate index at {self.path} was built with {self.embedder_name} "
+                f"({self.dim} dims), not {name} ({dim} dims)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            self._refresh()
+            return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._load()
+            self._refresh()
+            return key in self._rows
+
+    def add(
+        self,
+        keys: Sequence[str],
+        resumes: Sequence[Dict[str, Any]],
+        vectors: np.ndarray,
+        embedder_name: str,
+    ) -> int:
+        """
+        Appends resumes and their embeddings to the index.
+
+        Parameters:
+            keys (list): Content hash of each resume; keys already present are skipped.
+            resumes (list): Parsed resume dictionaries.
+            vectors (np.ndarray): One unit-length embedding per resume.
+            embedder_name (str): Name of the embedder that produced `vectors`.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._load()
+            with self._file_lock():
+                # Another process may have appended since we last looked; always write
+                # after its rows, never over them.
+                self._discard_partial_row()
+                self._refresh()
+                self._check_embedder(embedder_name, vectors.shape[1])
+                fresh = {}
+                for key, resume, vector in zip(keys, resumes, vectors):
+                    if len(key) > KEY_WIDTH:
+                        raise ValueError(
+                            f"Index keys are at most {KEY_WIDTH} characters"
+                        )
+                    if key not in self._rows and key not in fresh:
+                        fresh[key] = (resume, vector)
+                if not fresh:
+                    return 0
+
+                end = int(self._offsets[-1]) if len(self._offsets) else 0
+                offsets = []
+                lines = []
+                for resume, _ in fresh.values():
+                    line = (json.dumps(resume) + "\n").encode("utf-8")
+                    lines.append(line)
+                    end += len(line)
+                    offsets.append(end)
+                with open(self._file("records.jsonl"), "ab") as f:
+                    f.write(b"".join(lines))
+                with open(self._file("vectors.f32"), "ab") as f:
+                    f.write(np.stack([vector for _, vector in fresh.values()]).tobytes())
+                with open(self._file("keys.bin"), "ab") as f:
+                    f.write("".join(key.ljust(KEY_WIDTH) for key in fresh).encode("ascii"))
+                with open(self._file("offsets.u64"), "ab") as f:
+                    f.write(np.asarray(offsets, dtype=np.uint64).tobytes())
+                self._refresh()
+                return len(fresh)
+
+    def delete(self, key: str) -> bool:
+        """Tombstones the resume stored under `key`. Returns False if it is not indexed."""
+        with self._lock:
+            self._load()
+            with self._file_lock():
+                self._refresh()
+                row = self._rows.get(key)
+                if row is None:
+                    return False
+                with open(self._file("tombstones.txt"), "a") as f:
+                    f.write(f"{row}\n")
+                self._refresh()
+                return True
+
+    def train(self, clusters: Optional[int] = None, sample_size: int = 50000) -> None:
+        """
+        (Re)builds the IVF lists with k-means over a sample of the stored vectors.
+
+        Parameters:
+            clusters (int): Number of lists; defaults to the square root of the row count.
+            sample_size (int): Maximum number of vectors used to fit the centroids.
+        """
+        with self._lock:
+            self._load()
+            self._train(clusters, sample_size)
+
+    def _train(self, clusters: Optional[int], sample_size: int) -> None:
+        matrix = self._matrix()
+        count = len(matrix)
+        if count == 0:
+            return
+        clusters = min(count, clusters or max(1, int(np.sqrt(count))))
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(count, min(count, sample_size), replace=False))
+        centroids = _kmeans(np.asarray(matrix[sample]), clusters)
+        assignments = np.empty(count, dtype=np.int32)
+        for start in range(0, count, 8192):
+            block = np.asarray(matrix[start : start + 8192])
+            assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        with self._file_lock():
+            np.savez(self._file("ivf.npz"), centroids=centroids, assignments=assignments)
+        self._centroids, self._assignments = centroids, assignments
+        self._trained_rows = count
+        logger.info(f"Trained candidate index IVF with {clusters} lists over {count} rows")
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exact: bool = False,
+        nprobe: int = IVF_NPROBE,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Returns the `k` stored resumes most similar to `query`, best first.
+
+        Parameters:
+            query (np.ndarray): A unit-length embedding from the index's embedder.
+            k (int): Number of results.
+            exact (bool): Scan every vector instead of only the nearest IVF lists.
+            nprobe (int): Number of IVF lists to scan in approximate mode.
+
+        Returns:
+            list: (key, cosine similarity, parsed resume) tuples.
+        """
+        with self._lock:
+            self._load()
+            self._refresh()
+            count = len(self._keys)
+            if count == 0 or not self._rows:
+                return []
+            query = np.asarray(query, dtype=np.float32)
+            matrix = self._matrix()
+
+            if not exact and count >= self.ivf_min_rows:
+                if self._centroids is None or count >= 2 * self._trained_rows:
+                    self._train(None, 50000)
+                probe = top_k(self._centroids @ query, nprobe)
+                rows = np.flatnonzero(np.isin(self._assignments, probe) & ~self._deleted)
+                scores = np.asarray(matrix[rows]) @ query
+            else:
+                rows = np.flatnonzero(~self._deleted)
+                scores = (matrix @ query)[rows]
+
+            best = rows[top_k(scores, k)]
+            best_scores = np.asarray(matrix[best]) @ query
+            return [
+                (self._keys[row], float(score), self._record(row))
+                for row, score in zip(best, best_scores)
+            ]
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        start = int(self._offsets[row - 1]) if row else 0
+        end = int(self._offsets[row])
+        with open(self._file("records.jsonl"), "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of live and deleted rows and the IVF state."""
+        with self._lock:
+            self._load()
+            self._refresh()
+            return {
+                "path": self.path,
+                "embedder": self.embedder_name,
+                "dim": self.dim,
+                "rows": len(self._keys),
+                "live": len(self._rows),
+                "deleted": int(self._deleted.sum()),
+                "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+                "ivf_trained_rows": self._trained_rows,
+            }
+
+
+candidate_index = CandidateIndex()
+
+
+async def index_resumes(
+    items: Sequence[Tuple[str, Dict[str, Any]]],
+    index: CandidateIndex = candidate_index,
+    embedder: Optional[Any] = None,
+) -> int:
+    """
+    Embeds and appends newly parsed resumes to the candidate index.
+
+    Resumes whose content hash is already indexed, and parse errors, are skipped
+    without an embedding call. Failures are logged rather than raised so indexing
+    never breaks the screening pipeline.
+
+    Parameters:
+        items (list): (content hash, parsed resume) pairs.
+        index (CandidateIndex): The index to append to.
+        embedder: Embedding provider (see utils.retrieval).
+
+    Returns:
+        int: The number of resumes added.
+    """
+    if not CANDIDATE_INDEX_ENABLED:
+        return 0
+    try:
+        # Membership checks take the index lock and may read from disk.
+        fresh = await asyncio.to_thread(
+            lambda: [
+                (key, resume)
+                for key, resume in items
+                if key and "error" not in resume and key not in index
+            ]
+        )
+        if not fresh:
+            return 0
+        embedder = embedder or get_default_embedder()
+        # Indexing is background work; interactive LLM calls go first.
+        with bulk_priority():
+            vectors = await embedder.embed([resume_text(resume) for _, resume in fresh])
+        keys = [key for key, _ in fresh]
+        resumes = [resume for _, resume in fresh]
+        return await asyncio.to_thread(index.add, keys, resumes, vectors, embedder.name)
+    except Exception as e:
+        logger.warning(f"Failed to add resumes to the candidate index: {e}")
+        return 0
+
+
+async def search_candidates(
+    parsed_requirements: Dict[str, Any],
+    k: int = 10,
+    exact: bool = False,
+    index: CandidateIndex = candidate_index,
+    embedder: Optional[Any] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Finds the stored candidates that best fit a structured job description.
+
+    Parameters:
+        parsed_requirements (dict): The structured job description.
+        k (int): Number of candidates to return.
+        exact (bool): Use an exact scan instead of the IVF lists.
+        index (CandidateIndex): The index to search.
+        embedder: Embedding provider; must match the one the index was built with.
+
+    Returns:
+        list: {"content_hash", "similarity", "resume"} dictionaries, best first.
+    """
+    embedder = embedder or get_default_embedder()
+    query = (await embedder.embed([job_description_text(parsed_requirements)]))[0]
+    stats = await asyncio.to_thread(index.stats)
+    if stats["embedder"] not in (None, embedder.name):
+        raise ValueError(
+            f"Candidate index was built with {stats['embedder']}, not {embedder.name}"
+        )
+    results = await asyncio.to_thread(index.search, query, k, exact)
+    return [
+        {"content_hash": key, "similarity": similarity, "resume": resume}
+        for key, similarity, resume in results
+    ]
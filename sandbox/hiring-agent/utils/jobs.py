@@ -0,0 +1,431 @@
+# utils/jobs.py
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.ratelimit import bulk_priority
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_PATH = os.getenv(
+    "JOB_QUEUE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "hiring-agent", "jobs.sqlite3"),
+)
+# Worker tasks per server process; 0 makes a process submit-only.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+# A running job whose worker has not checked in for this long is handed to another.
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 60 * 60)))
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobQueue:
+    """
+    A persistent job queue backed by SQLite.
+
+    Jobs move queued -> running -> completed / failed / cancelled. Each job keeps
+    per-stage progress counters and, in a separate table, the partial results
+    reported so far, so clients can poll a long job and read finished items before
+    the whole job is done.
+
+    Any number of processes can share one file: a worker claims a job with a
+    conditional UPDATE, so only one of them wins it, and keeps it alive with
+    heartbeats. Jobs whose worker stops heartbeating are re-queued (and their
+    partial results discarded) up to `max_attempts` times.
+    """
+
+    def __init__(
+        self,
+        path: str = JOB_QUEUE_PATH,
+        stale_after: float = JOB_STALE_AFTER,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retention: float = JOB_RETENTION,
+    ):
+        self.path = path
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " progress TEXT NOT NULL DEFAULT '{}',"
+                " result TEXT,"
+                " error TEXT,"
+                " worker TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " heartbeat_at REAL,"
+                " finished_at REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_results ("
+                " job_id TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " item INTEGER NOT NULL,"
+                " value TEXT NOT NULL,"
+                " PRIMARY KEY (job_id, stage, item))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def submit(self, kind: str, payload: Any) -> str:
+        """Queues a job and returns its id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at)"
+                " VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), time.time()),
+            )
+            conn.commit()
+        return job_id
+
+    def claim(self, worker: str, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Marks the oldest queued job of one of `kinds` as running for `worker`.
+
+        Returns:
+            dict: {"id", "kind", "payload"} of the claimed job, or None if none is queued.
+        """
+        self.requeue_stale()
+        placeholders = ",".join("?" * len(kinds))
+        with self._lock:
+            conn = self._connect()
+            while True:
+                row = conn.execute(
+                    f"SELECT id, kind, payload FROM jobs WHERE status = 'queued'"
+                    f" AND kind IN ({placeholders}) ORDER BY created_at LIMIT 1",
+                    kinds,
+                ).fetchone()
+                if row is None:
+                    conn.commit()
+                    return None
+                now = time.time()
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,"
+                    " started_at = ?, heartbeat_at = ?, progress = '{}'"
+                    " WHERE id = ? AND status = 'queued'",
+                    (worker, now, now, row[0]),
+                ).rowcount
+                if claimed:
+                    # Partial results of an earlier, abandoned attempt.
+                    conn.execute("DELETE FROM job_results WHERE job_id = ?", (row[0],))
+                    conn.commit()
+                    return {"id": row[0], "kind": row[1], "payload": json.loads(row[2])}
+                # Another process claimed it between the SELECT and the UPDATE.
+                conn.commit()
+
+    def requeue_stale(self) -> None:
+        """Re-queues (or fails) running jobs whose worker stopped heartbeating."""
+        cutoff = time.time() - self.stale_after
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker lost', finished_at = ?"
+                " WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                (time.time(), cutoff, self.max_attempts),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL"
+                " WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,),
+            )
+            conn.commit()
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """
+        Records that `worker` is still running the job.
+
+        Returns:
+            bool: False if the job is no longer this worker's to run (it was
+                  cancelled, or re-queued after a missed heartbeat).
+        """
+        with self._lock:
+            conn = self._connect()
+            updated = conn.execute(
+                "UPDATE jobs SET heartbeat_at = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            ).rowcount
+            conn.commit()
+        return bool(updated)
+
+    def set_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET progress = ? WHERE id = ?",
+                (json.dumps(progress), job_id),
+            )
+            conn.commit()
+
+    def add_result(self, job_id: str, stage: str, item: int, value: Any) -> None:
+        """Stores one partial result of a running job."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO job_results (job_id, stage, item, value)"
+                " VALUES (?, ?, ?, ?)",
+                (job_id, stage, item, json.dumps(value)),
+            )
+            conn.commit()
+
+    def _finish(
+        self, job_id: str, worker: str, status: str, result: Any, error: Optional[str]
+    ) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (
+                    status,
+                    None if result is None else json.dumps(result),
+                    error,
+                    time.time(),
+                    job_id,
+                    worker,
+                ),
+            )
+            conn.commit()
+
+    def complete(self, job_id: str, worker: str, result: Any) -> None:
+        self._finish(job_id, worker, "completed", result, None)
+
+    def fail(self, job_id: str, worker: str, error: str) -> None:
+        self._finish(job_id, worker, "failed", None, error)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job; returns False if it had already finished."""
+        with self._lock:
+            conn = self._connect()
+            cancelled = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?"
+                " WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            ).rowcount
+            conn.commit()
+        return bool(cancelled)
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """Returns a job's status, progress and (once completed) result, or None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, kind, status, progress, result, error, attempts,"
+                " created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": json.loads(row[3]),
+            "error": row[5],
+            "attempts": row[6],
+            "created_at": row[7],
+            "started_at": row[8],
+            "finished_at": row[9],
+        }
+        if include_result:
+            job["result"] = None if row[4] is None else json.loads(row[4])
+        return job
+
+    def results(
+        self, job_id: str, stage: str, offset: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Returns partial results of one stage as [{"index", "value"}], by index."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT item, value FROM job_results WHERE job_id = ? AND stage = ?"
+                " ORDER BY item LIMIT ? OFFSET ?",
+                (job_id, stage, limit, offset),
+            ).fetchall()
+        return [{"index": item, "value": json.loads(value)} for item, value in rows]
+
+    def prune(self) -> int:
+        """Deletes finished jobs older than `retention` seconds; returns how many."""
+        cutoff = time.time() - self.retention
+        placeholders = ",".join("?" * len(FINISHED_STATUSES))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs"
+                f" WHERE status IN ({placeholders}) AND finished_at < ?)",
+                (*FINISHED_STATUSES, cutoff),
+            )
+            deleted = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*FINISHED_STATUSES, cutoff),
+            ).rowcount
+            conn.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of jobs in each status."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {"path": self.path, "jobs": dict(rows)}
+
+
+class JobContext:
+    """
+    What a job handler uses to report progress and partial results.
+
+    The sqlite writes run in a worker thread so they do not block the event loop.
+    """
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.progress: Dict[str, Dict[str, int]] = {}
+        # Keeps progress writes in order, so an older snapshot never lands last.
+        self._progress_lock = asyncio.Lock()
+
+    def _stage(self, stage: str) -> Dict[str, int]:
+        return self.progress.setdefault(stage, {"done": 0, "skipped": 0, "total": 0})
+
+    async def _save_progress(self) -> None:
+        async with self._progress_lock:
+            snapshot = {stage: dict(counts) for stage, counts in self.progress.items()}
+            await asyncio.to_thread(self.queue.set_progress, self.job_id, snapshot)
+
+    async def set_total(self, stage: str, total: int) -> None:
+        """Declares how many items `stage` will process."""
+        self._stage(stage)["total"] = total
+        await self._save_progress()
+
+    async def add_result(self, stage: str, index: int, value: Any) -> None:
+        """Stores item `index` of `stage` and counts it as done."""
+        await asyncio.to_thread(self.queue.add_result, self.job_id, stage, index, value)
+        self._stage(stage)["done"] += 1
+        await self._save_progress()
+
+    async def skip(self, stage: str) -> None:
+        """Counts an item that `stage` will not process (e.g. an earlier stage failed)."""
+        self._stage(stage)["skipped"] += 1
+        await self._save_progress()
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Awaitable[Any]]
+
+
+async def run_job(
+    queue: JobQueue,
+    job: Dict[str, Any],
+    handler: JobHandler,
+    worker: str,
+    heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL,
+) -> None:
+    """Runs one claimed job to completion, heartbeating while it runs."""
+    task = asyncio.ensure_future(handler(job["payload"], JobContext(queue, job["id"])))
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=heartbeat_interval)
+            if done:
+                break
+            try:
+                ours = await asyncio.to_thread(queue.heartbeat, job["id"], worker)
+            except sqlite3.Error as e:
+                # Keep working; if the queue stays unavailable the job goes stale.
+                logger.warning(f"Heartbeat for job {job['id']} failed: {e}")
+                continue
+            if not ours:
+                # Cancelled, or already handed to another worker: stop spending on it.
+                logger.info(f"Job {job['id']} is no longer ours, stopping it")
+                return
+    finally:
+        # On shutdown the job stays "running" and is re-queued once it goes stale.
+        if not task.done():
+            task.cancel()
+    try:
+        result = task.result()
+    except Exception as e:
+        logger.warning(f"Job {job['id']} ({job['kind']}) failed: {e}")
+        finish, outcome = queue.fail, str(e)
+    else:
+        finish, outcome = queue.complete, result
+    try:
+        await asyncio.to_thread(finish, job["id"], worker, outcome)
+    except sqlite3.Error as e:
+        # The job stays "running" and is re-queued once it goes stale.
+        logger.warning(f"Could not record the outcome of job {job['id']}: {e}")
+
+
+async def job_worker(
+    queue: JobQueue,
+    handlers: Dict[str, JobHandler],
+    worker: str,
+    poll_interval: float = JOB_POLL_INTERVAL,
+) -> None:
+    """Claims and runs jobs forever; cancel the task to stop it."""
+    last_prune = 0.0
+    # Queued jobs are background work; interactive requests go first.
+    with bulk_priority():
+        while True:
+            try:
+                job = await asyncio.to_thread(queue.claim, worker, list(handlers))
+            except sqlite3.Error as e:
+                logger.warning(f"Job queue unavailable: {e}")
+                job = None
+            if job is None:
+                if time.monotonic() - last_prune > 3600:
+                    last_prune = time.monotonic()
+                    try:
+                        await asyncio.to_thread(queue.prune)
+                    except sqlite3.Error as e:
+                        logger.warning(f"Pruning old jobs failed: {e}")
+                await asyncio.sleep(poll_interval)
+                continue
+            logger.info(f"Worker {worker} running job {job['id']} ({job['kind']})")
+            try:
+                await run_job(queue, job, handlers[job["kind"]], worker)
+            except Exception:
+                # One bad job must not take the worker down with it.
+                logger.exception(f"Worker {worker} failed running job {job['id']}")
+
+
+def start_job_workers(
+    queue: JobQueue, handlers: Dict[str, JobHandler], count: int = JOB_WORKERS
+) -> List[asyncio.Task]:
+    """Starts `count` worker tasks on the running event loop."""
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    return [
+        asyncio.create_task(job_worker(queue, handlers, f"{prefix}:{number}"))
+        for number in range(count)
+    ]
+
+
+job_queue = JobQueue()
@@ -0,0 +1,161 @@
+# utils/llm.py
+import asyncio
+import os
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from utils.metrics import metrics
+from utils.ratelimit import estimate_tokens, llm_scheduler
+
+load_dotenv()
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-2024-08-06")
+
+# Connection pool tuning for the shared HTTP client.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# One client per event loop: pooled connections cannot move between loops.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+T = TypeVar("T")
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Returns the AsyncOpenAI client of the running event loop, creating it on first use.
+
+    The client owns a pooled httpx connection pool, so every LLM call made from the
+    same event loop reuses warm keep-alive connections. Pooled connections cannot
+    move between event loops, so each loop gets its own client; close it with
+    close_async_client() before the loop ends (run_async does this for you).
+
+    Returns:
+        AsyncOpenAI: The running loop's client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=LLM_TIMEOUT,
+        )
+        # Retries are handled by the shared LLMScheduler, not the SDK.
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client() -> None:
+    """Closes the running loop's client and its connection pool, if one was created."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Runs a coroutine on a new event loop, like asyncio.run(), and closes the loop's
+    LLM client before the loop goes away so its sockets are not leaked.
+
+    For callers that start a loop per step, such as the Streamlit app.
+    """
+
+    async def main() -> T:
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+
+    return asyncio.run(main())
+
+
+async def run_request(
+    request: Callable[[], Awaitable[Any]],
+    estimated_tokens: float = 0,
+    priority: Optional[int] = None,
+) -> Any:
+    """
+    Sends one OpenAI API request through the shared LLMScheduler and records it.
+
+    Every call to the API goes through here (chat completions via call_llm,
+    embeddings, batch files and jobs), so all of them share the rate limits, retries
+    and priorities, and show up in the metrics of the current pipeline stage.
+
+    Parameters:
+        request (Callable): Zero-argument coroutine function making the API call.
+        estimated_tokens (float): Tokens to reserve against LLM_TPM; 0 for calls
+            that do not count against the token limit (files, batch jobs).
+        priority (int): PRIORITY_INTERACTIVE or PRIORITY_BULK; defaults to the
+            current llm_priority context.
+
+    Returns:
+        Whatever `request` returns.
+    """
+    called = time.perf_counter()
+    attempt_started = called
+
+    async def attempt() -> Any:
+        nonlocal attempt_started
+        attempt_started = time.perf_counter()
+        return await request()
+
+    try:
+        response = await llm_scheduler.run(attempt, estimated_tokens, priority)
+    except Exception:
+        metrics.record_llm(time.perf_counter() - attempt_started, error=True)
+        raise
+    finished = time.perf_counter()
+    metrics.record_wait(attempt_started - called)
+    usage = getattr(response, "usage", None)
+    # Set when the request's prefix hit the provider's prompt cache (see utils.prompts).
+    details = getattr(usage, "prompt_tokens_details", None)
+    metrics.record_llm(
+        finished - attempt_started,
+        getattr(usage, "prompt_tokens", None) or 0,
+        getattr(usage, "completion_tokens", None) or 0,
+        cached_tokens=getattr(details, "cached_tokens", None) or 0,
+    )
+    return response
+
+
+async def call_llm(messages: list, response_format: Any = None) -> str:
+    """
+    Calls the OpenAI model with the provided messages and returns the response text.
+
+    The call goes through the shared LLMScheduler, which enforces the configured
+    request and token rate limits and retries rate-limit and transient errors.
+    Latency, token usage and time spent waiting for admission (including backoff)
+    are recorded against the current pipeline stage (see utils.metrics).
+
+    Parameters:
+        messages (list): The chat messages to send to the LLM.
+        response_format: Optional Pydantic model describing the structured output.
+
+    Returns:
+        str: The LLM's response.
+    """
+    params = {"model": LLM_MODEL, "messages": messages}
+    if response_format:
+        params["response_format"] = response_format
+
+    response = await run_request(
+        lambda: get_async_client().beta.chat.completions.parse(**params),
+        estimate_tokens(messages),
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,324 @@
+# utils/metrics.py
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Percentiles are computed over each stage's most recent METRICS_WINDOW samples;
+# sums and counts cover the whole process lifetime, as in a Prometheus summary.
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "4096"))
+
+STAGES = ("ingest", "pdf_extract", "jd_parse", "resume_parse", "score", "rank", "email")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageItem:
+    """One timed unit of work within a stage (one resume, one email batch, ...)."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.wait = 0.0
+        self.error = False
+
+
+_current_item: contextvars.ContextVar[Optional[StageItem]] = contextvars.ContextVar(
+    "current_stage_item", default=None
+)
+# Queue wait measured before a stage started, e.g. a semaphore acquired around the
+# call of a function decorated with Metrics.timed; the next stage picks it up.
+_pending_wait: contextvars.ContextVar[float] = contextvars.ContextVar(
+    "pending_queue_wait", default=0.0
+)
+
+
+class Samples:
+    """A running count and sum plus a window of recent values for percentiles."""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def quantiles(self) -> List[float]:
+        if not self.recent:
+            return [0.0] * len(QUANTILES)
+        return np.quantile(np.fromiter(self.recent, dtype=float), QUANTILES).tolist()
+
+
+class StageMetrics:
+    def __init__(self, window: int):
+        self.duration = Samples(window)
+        self.queue_wait = Samples(window)
+        self.llm_latency = Samples(window)
+        self.errors = 0
+        self.llm_errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class Metrics:
+    """
+    Per-stage latency, queueing, token and cache counters for the screening pipeline.
+
+    Wrap each unit of work in `stage(name)`. Everything recorded while it runs, in
+    the same task or tasks started from it, is attributed to that stage: LLM calls
+    (via record_llm, called from utils.llm.call_llm), semaphore waits (via
+    `queued`), cache lookups and errors.
+
+    Counters are per process; with several uvicorn workers each one reports its own.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageMetrics] = {}
+
+    def _stage(self, name: str) -> StageMetrics:
+        if name not in self._stages:
+            self._stages[name] = StageMetrics(self.window)
+        return self._stages[name]
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[StageItem]:
+        """Times one unit of work in stage `name`; an exception counts as an error."""
+        item = StageItem(name)
+        item.wait = _pending_wait.get()
+        token = _current_item.set(item)
+        wait_token = _pending_wait.set(0.0)
+        started = time.perf_counter()
+        try:
+            yield item
+        except BaseException:
+            item.error = True
+            raise
+        finally:
+            _pending_wait.reset(wait_token)
+            _current_item.reset(token)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self._stage(name)
+                stats.duration.add(elapsed)
+                stats.queue_wait.add(item.wait)
+                stats.errors += item.error
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator that runs each call of a (sync or async) function as `stage(name)`."""
+
+        def decorator(func: Callable) -> Callable:
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    with self.stage(name):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.stage(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @contextlib.asynccontextmanager
+    async def queued(self, semaphore: asyncio.Semaphore) -> AsyncIterator[None]:
+        """
+        `async with semaphore`, counting the time spent waiting as queue wait.
+
+        Inside a stage the wait goes to the current work item; outside one it goes to
+        the first stage started within the block.
+        """
+        started = time.perf_counter()
+        async with semaphore:
+            waited = time.perf_counter() - started
+            if _current_item.get() is not None:
+                self.record_wait(waited)
+                yield
+                return
+            token = _pending_wait.set(waited)
+            try:
+                yield
+            finally:
+                _pending_wait.reset(token)
+
+    def record_wait(self, seconds: float) -> None:
+        """Adds queueing time (semaphores, rate limits) to the current work item."""
+        item = _current_item.get()
+        if item is not None:
+            item.wait += seconds
+
+    def mark_error(self) -> None:
+        """Counts the current work item as failed without raising."""
+        item = _current_item.get()
+        if item is not None:
+            item.error = True
+
+    def record_llm(
+        self,
+        latency: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: bool = False,
+        cached_tokens: int = 0,
+    ) -> None:
+        """
+        Records one LLM call against the current stage ("other" outside one).
+
+        `cached_tokens` is the part of `prompt_tokens` the provider served from its
+        prompt cache.
+        """
+        item = _current_item.get()
+        with self._lock:
+            stats = self._stage(item.stage if item else "other")
+            stats.llm_latency.add(latency)
+            stats.llm_errors += error
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cached_tokens += cached_tokens
+
+    def record_cache(self, hit: bool, stage: Optional[str] = None) -> None:
+        """
+        Records a cache lookup against `stage`, or the current stage if there is one.
+
+        DiskCache and ScrapeCache call this on every lookup; lookups made outside a
+        stage (and without an explicit `stage`) are not counted.
+        """
+        if stage is None:
+            item = _current_item.get()
+            if item is None:
+                return
+            stage = item.stage
+        with self._lock:
+            stats = self._stage(stage)
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+    def reset(self) -> None:
+        """Drops every recorded sample and counter."""
+        with self._lock:
+            self._stages.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns per-stage statistics, pipeline stages first.
+
+        Times are in milliseconds; percentiles cover the recent window.
+        """
+        with self._lock:
+            names = [s for s in STAGES if s in self._stages]
+            names += sorted(set(self._stages) - set(STAGES))
+            result = {}
+            for name in names:
+                stats = self._stages[name]
+                p50, p95, p99 = stats.duration.quantiles()
+                w50, w95, w99 = stats.queue_wait.quantiles()
+                l50, l95, _ = stats.llm_latency.quantiles()
+                lookups = stats.cache_hits + stats.cache_misses
+                result[name] = {
+                    "count": stats.duration.count,
+                    "errors": stats.errors,
+                    "wall_ms_total": round(stats.duration.total * 1000, 1),
+                    "p50_ms": round(p50 * 1000, 1),
+                    "p95_ms": round(p95 * 1000, 1),
+                    "p99_ms": round(p99 * 1000, 1),
+                    "queue_wait_p50_ms": round(w50 * 1000, 1),
+                    "queue_wait_p95_ms": round(w95 * 1000, 1),
+                    "queue_wait_p99_ms": round(w99 * 1000, 1),
+                    "llm_calls": stats.llm_latency.count,
+                    "llm_errors": stats.llm_errors,
+                    "llm_p50_ms": round(l50 * 1000, 1),
+                    "llm_p95_ms": round(l95 * 1000, 1),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cached_tokens": stats.cached_tokens,
+                    "cached_token_ratio": (
+                        stats.cached_tokens / stats.prompt_tokens
+                        if stats.prompt_tokens
+                        else None
+                    ),
+                    "cache_hit_rate": stats.cache_hits / lookups if lookups else None,
+                }
+        return result
+
+    def prometheus(self, prefix: str = "hiring_agent") -> str:
+        """Renders every counter in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def summary(name: str, help_text: str, attribute: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} summary")
+            for stage, stats in self._stages.items():
+                samples = getattr(stats, attribute)
+                for q, value in zip(QUANTILES, samples.quantiles()):
+                    lines.append(
+                        f'{prefix}_{name}{{stage="{stage}",quantile="{q}"}} {value:.6f}'
+                    )
+                lines.append(f'{prefix}_{name}_sum{{stage="{stage}"}} {samples.total:.6f}')
+                lines.append(f'{prefix}_{name}_count{{stage="{stage}"}} {samples.count}')
+
+        def counter(name: str, help_text: str, values: Dict[str, float]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in values.items():
+                lines.append(f"{prefix}_{name}{{{labels}}} {value}")
+
+        with self._lock:
+            stages = self._stages.items()
+            summary("stage_duration_seconds", "Wall time per unit of work.", "duration")
+            summary(
+                "stage_queue_wait_seconds",
+                "Time spent waiting on concurrency and rate limits.",
+                "queue_wait",
+            )
+            summary("llm_latency_seconds", "Latency of LLM calls.", "llm_latency")
+            counter(
+                "stage_errors_total",
+                "Failed units of work.",
+                {f'stage="{stage}"': stats.errors for stage, stats in stages},
+            )
+            counter(
+                "llm_errors_total",
+                "Failed LLM calls.",
+                {f'stage="{stage}"': stats.llm_errors for stage, stats in stages},
+            )
+            tokens = {}
+            cached = {}
+            cache = {}
+            for stage, stats in stages:
+                tokens[f'stage="{stage}",type="prompt"'] = stats.prompt_tokens
+                tokens[f'stage="{stage}",type="completion"'] = stats.completion_tokens
+                cached[f'stage="{stage}"'] = stats.cached_tokens
+                cache[f'stage="{stage}",result="hit"'] = stats.cache_hits
+                cache[f'stage="{stage}",result="miss"'] = stats.cache_misses
+            counter("llm_tokens_total", "LLM tokens used.", tokens)
+            counter(
+                "llm_cached_prompt_tokens_total",
+                "Prompt tokens served from the provider's prompt cache.",
+                cached,
+            )
+            counter("cache_lookups_total", "Cache lookups by result.", cache)
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
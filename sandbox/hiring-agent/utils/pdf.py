@@ -0,0 +1,151 @@
+# utils/pdf.py
+import asyncio
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterator, Optional
+
+import PyPDF2
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "30"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+
+# Form feed between pages, as pdftotext does, so later stages can tell pages apart.
+PAGE_BREAK = "\f"
+
+_executor: Optional[ProcessPoolExecutor] = None
+# One slot per worker process, so a file's timeout only starts once a worker is free.
+_slots: Optional[asyncio.Semaphore] = None
+_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def iter_pdf_pages(source: Any, max_pages: int = PDF_MAX_PAGES) -> Iterator[str]:
+    """
+    Yields the text of a PDF one page at a time, entirely in memory.
+
+    Parameters:
+        source: The PDF as bytes, a memoryview, or a seekable binary file object
+            (such as a Streamlit upload). File objects are read in place, without
+            copying the upload into a new buffer or writing it to disk.
+        max_pages (int): Stop after this many pages.
+
+    Yields:
+        str: The text of each page (empty for pages without extractable text).
+    """
+    if hasattr(source, "read"):
+        source.seek(0)
+        stream = source
+    else:
+        stream = io.BytesIO(source)
+    pdf_reader = PyPDF2.PdfReader(stream)
+    for page in islice(pdf_reader.pages, max_pages):
+        yield page.extract_text() or ""
+
+
+def extract_pdf_text(
+    source: Any, max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS
+) -> str:
+    """
+    Extracts the text of a PDF held in memory.
+
+    Pages are pulled lazily, so reading stops as soon as `max_chars` characters have
+    been collected instead of materialising the whole document first.
+
+    Parameters:
+        source: The PDF as bytes, a memoryview, or a seekable binary file object.
+        max_pages (int): Only the first `max_pages` pages are read.
+        max_chars (int): Stop reading pages once this many characters are collected.
+
+    Returns:
+        str: The text of each page joined by PAGE_BREAK.
+    """
+    pages = []
+    total = 0
+    for page_text in iter_pdf_pages(source, max_pages):
+        pages.append(page_text)
+        total += len(page_text) + 1
+        if total >= max_chars:
+            break
+    return PAGE_BREAK.join(pages)[:max_chars]
+
+
+def upload_buffer(upload: Any) -> memoryview:
+    """Returns a zero-copy view over an uploaded file's bytes."""
+    if hasattr(upload, "getbuffer"):
+        return upload.getbuffer()
+    return memoryview(upload.read())
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Returns the shared process pool used for PDF extraction, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS))
+    return _executor
+
+
+def shutdown_pdf_executor() -> None:
+    """Shuts down the shared PDF process pool, if one was created."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+
+
+def _get_slots() -> asyncio.Semaphore:
+    # asyncio primitives belong to one event loop; Streamlit starts a new loop per
+    # run, so the semaphore is rebuilt when the loop changes.
+    global _slots, _slots_loop
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots_loop is not loop:
+        _slots = asyncio.Semaphore(max(1, PDF_WORKERS))
+        _slots_loop = loop
+    return _slots
+
+
+async def extract_pdf_text_async(
+    pdf_bytes: bytes,
+    timeout: float = PDF_EXTRACT_TIMEOUT,
+    max_pages: int = PDF_MAX_PAGES,
+) -> str:
+    """
+    Extracts PDF text in the shared process pool without blocking the event loop.
+
+    PDF parsing is CPU-bound, so running it in worker processes lets a batch of
+    resumes use every core. Files are handed to the pool only as workers free up,
+    and `timeout` counts from then, so files waiting behind a large batch never
+    time out before they start. A file that takes longer than `timeout` seconds
+    raises asyncio.TimeoutError; its worker finishes the file in the background
+    and keeps its slot until then.
+
+    Parameters:
+        pdf_bytes (bytes): The raw PDF file contents.
+        timeout (float): Seconds to wait for this file before giving up.
+        max_pages (int): Only the first `max_pages` pages are read.
+
+    Returns:
+        str: The extracted text.
+    """
+    slots = _get_slots()
+    await slots.acquire()
+    try:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            get_pdf_executor(), extract_pdf_text, pdf_bytes, max_pages
+        )
+    except BaseException:
+        slots.release()
+        raise
+
+    def release(done: asyncio.Future) -> None:
+        slots.release()
+        # Nobody awaits a file that timed out; retrieve its outcome here.
+        if not done.cancelled():
+            done.exception()
+
+    future.add_done_callback(release)
+    # Shield so a timeout abandons the file without cancelling it mid-extraction.
+    return await asyncio.wait_for(asyncio.shield(future), timeout)
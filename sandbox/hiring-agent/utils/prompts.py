@@ -0,0 +1,36 @@
+# utils/prompts.py
+import json
+from typing import Any, Dict, List
+
+
+def compact_json(value: Any) -> str:
+    """Serializes `value` without indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"))
+
+
+def shared_prefix(
+    system_prompt: str, job_description_text: str, label: str = "Job Description"
+) -> List[Dict[str, str]]:
+    """
+    Returns the leading messages of every per-candidate call for one job.
+
+    The messages are the fixed system prompt, then the job description as a message
+    of its own. Per-candidate content must only follow them. Providers cache
+    repeated prompt prefixes: OpenAI does it automatically for prompts of 1024+
+    tokens, in 128-token steps. So when these messages are byte-identical across a
+    batch, every call after the first pays less, in latency and input cost, for
+    the shared part. Build `job_description_text` with compact_json, once per
+    batch.
+
+    Parameters:
+        system_prompt (str): Instructions that do not depend on the candidate.
+        job_description_text (str): The serialized structured job description.
+        label (str): The heading placed before the job description.
+
+    Returns:
+        list: The system and job description messages.
+    """
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{label}:\n{job_description_text}"},
+    ]
@@ -0,0 +1,145 @@
+# utils/ranking.py
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+SCORE_DIMENSIONS = ("relevance", "experience", "skills", "overall")
+# Comma-separated dimension=weight pairs; dimensions left out get weight 0.
+RANKING_WEIGHTS = os.getenv(
+    "RANKING_WEIGHTS", "relevance=1,experience=1,skills=1,overall=1"
+)
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parses "relevance=2,skills=1" into {"relevance": 2.0, "skills": 1.0}."""
+    weights = {}
+    for pair in spec.split(","):
+        if not pair.strip():
+            continue
+        name, _, value = pair.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+DEFAULT_WEIGHTS = parse_weights(RANKING_WEIGHTS)
+
+
+def weight_vector(weights: Optional[Mapping[str, float]] = None) -> np.ndarray:
+    """
+    Returns the weights as an array aligned with SCORE_DIMENSIONS, summing to 1.
+
+    Normalizing keeps the weighted score on the same 0-100 scale as the inputs.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    unknown = set(weights) - set(SCORE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown score dimensions: {sorted(unknown)}")
+    vector = np.array([float(weights.get(d, 0)) for d in SCORE_DIMENSIONS])
+    if (vector < 0).any() or vector.sum() <= 0:
+        raise ValueError("Weights must be non-negative and not all zero")
+    return vector / vector.sum()
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the indices of the `k` highest scores, best first.
+
+    Uses argpartition so the cost is linear in the number of scores; ties are broken
+    by the lower index so the result is deterministic.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        # argpartition picks arbitrarily among scores tied at the boundary, so take
+        # every index at or above the k-th best score and let the sort decide.
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+def score_matrix(candidate_scores: Sequence[Mapping[str, Any]]) -> np.ndarray:
+    """Loads the score columns of candidate dicts into an (n, 4) float array."""
+    count = len(candidate_scores)
+    matrix = np.empty((count, len(SCORE_DIMENSIONS)))
+    for column, dimension in enumerate(SCORE_DIMENSIONS):
+        matrix[:, column] = np.fromiter(
+            (candidate.get(dimension) or 0 for candidate in candidate_scores),
+            dtype=float,
+            count=count,
+        )
+    return matrix
+
+
+def rank_scores(
+    matrix: np.ndarray,
+    weights: Optional[Mapping[str, float]] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ranks rows of a score matrix by their weighted score.
+
+    Only the rows up to `offset + limit` are selected and sorted, so asking for one
+    page of a large score set costs O(n) rather than O(n log n). Equal scores keep
+    their input order.
+
+    Parameters:
+        matrix (np.ndarray): (n, 4) scores in SCORE_DIMENSIONS order.
+        weights (dict): Per-dimension weights; defaults to RANKING_WEIGHTS.
+        offset (int): Number of top-ranked rows to skip.
+        limit (int): Maximum number of rows to return; None returns the rest.
+
+    Returns:
+        tuple: (row indices for the requested page, best first; weighted score of
+               every row).
+
+    Raises:
+        ValueError: If `offset` is negative or `limit` is not positive.
+    """
+    if offset < 0:
+        raise ValueError("offset must be non-negative")
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be positive")
+    weighted = np.nan_to_num(matrix) @ weight_vector(weights)
+    end = len(weighted) if limit is None else min(len(weighted), offset + limit)
+    return top_k(weighted, end)[offset:], weighted
+
+
+def weighted_score(
+    candidate: Mapping[str, Any], weights: Optional[Mapping[str, float]] = None
+) -> float:
+    """Returns one candidate's weighted score, as stored in "avg_score"."""
+    return float(score_matrix([candidate])[0] @ weight_vector(weights))
+
+
+def rank_candidate_scores(
+    candidate_scores: List[Dict[str, Any]],
+    weights: Optional[Mapping[str, float]] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ranks candidate score dictionaries by their weighted score.
+
+    Parameters:
+        candidate_scores (list): Candidate score dictionaries.
+        weights (dict): Per-dimension weights; defaults to RANKING_WEIGHTS, which
+            weights all four dimensions equally.
+        offset (int): Number of top-ranked candidates to skip.
+        limit (int): Maximum number of candidates to return; None returns the rest.
+
+    Returns:
+        list: The requested page of candidates, best first, each with "avg_score" set.
+    """
+    order, weighted = rank_scores(score_matrix(candidate_scores), weights, offset, limit)
+    page = []
+    for row in order.tolist():
+        candidate = candidate_scores[row]
+        candidate["avg_score"] = float(weighted[row])
+        page.append(candidate)
+    return page
@@ -0,0 +1,281 @@
+# utils/ratelimit.py
+import asyncio
+import contextlib
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Client-side limits; 0 leaves that dimension unlimited (429s are still retried).
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+# How many seconds' worth of budget may be spent in one burst.
+LLM_BURST_SECONDS = float(os.getenv("LLM_BURST_SECONDS", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+# Completion tokens reserved per request until the real usage is known.
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "500"))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+llm_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "llm_priority", default=PRIORITY_INTERACTIVE
+)
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+@contextlib.contextmanager
+def bulk_priority() -> Iterator[None]:
+    """
+    Marks LLM calls made inside the block (and tasks started from it) as bulk work.
+
+    Interactive calls, the default, are admitted ahead of any waiting bulk calls.
+    """
+    token = llm_priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        llm_priority.reset(token)
+
+
+def bulk(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Decorator that runs an async function under bulk_priority()."""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        with bulk_priority():
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough request size: ~4 characters per prompt token plus the completion reserve."""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + LLM_COMPLETION_TOKEN_ESTIMATE
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Returns the server's requested delay in seconds, if the error carries one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:  # an HTTP date; fall back to exponential backoff
+        pass
+    return None
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute` units per minute, holding at most `burst_seconds` worth.
+
+    Providers enforce per-minute limits over shorter windows, so letting a whole
+    minute's budget out at once still draws 429s.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = LLM_BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they already are)."""
+        missing = amount - self.level
+        return max(0.0, missing / self.rate)
+
+
+class LLMScheduler:
+    """
+    Admits LLM requests under requests-per-minute and tokens-per-minute budgets.
+
+    Every request waits for one unit from the request bucket and its estimated token
+    count from the token bucket; the estimate is corrected once the response reports
+    its real usage. Waiting requests are admitted in priority order (interactive
+    before bulk), first come first served within a priority.
+
+    Rate-limit (429), connection and 5xx errors are retried with jittered exponential
+    backoff, never sooner than the server's Retry-After. A 429 also pauses admission
+    for everyone, so a burst backs off together instead of hammering the provider.
+    """
+
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        burst_seconds: float = LLM_BURST_SECONDS,
+    ):
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm > 0 else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.paused_until = 0.0
+        self.counters = {"requests": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+        self.wait_seconds = 0.0
+        self._sequence = itertools.count()
+        self._waiters: List[Tuple[int, int]] = []
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio primitives belong to one event loop; Streamlit starts a new loop per
+        # step, so the wait queue is rebuilt when the loop changes.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._waiters = []
+            self._loop = loop
+        return self._condition
+
+    def _wait_time(self, tokens: float) -> float:
+        now = time.monotonic()
+        wait = max(0.0, self.paused_until - now)
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+        return wait
+
+    async def acquire(self, tokens: float, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Waits until a request of about `tokens` tokens may be sent."""
+        if self.tokens is not None:
+            # A request larger than the whole bucket would otherwise wait forever.
+            tokens = min(tokens, self.tokens.capacity)
+        condition = self._get_condition()
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        async with condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] == entry:
+                        timeout = self._wait_time(tokens)
+                        if timeout == 0:
+                            if self.requests is not None:
+                                self.requests.level -= 1
+                            if self.tokens is not None:
+                                self.tokens.level -= tokens
+                            return
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                condition.notify_all()
+                self.wait_seconds += time.monotonic() - started
+
+    def settle(self, estimated: float, actual: Optional[int]) -> None:
+        """Returns over-reserved tokens to the bucket (or charges the shortfall)."""
+        if self.tokens is not None and actual is not None:
+            self.tokens.level = min(
+                self.tokens.capacity, self.tokens.level + estimated - actual
+            )
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        return delay
+
+    async def run(
+        self,
+        request: Callable[[], Awaitable[T]],
+        estimated_tokens: float = 0,
+        priority: Optional[int] = None,
+    ) -> T:
+        """
+        Sends `request` once the budgets allow it, retrying transient failures.
+
+        Parameters:
+            request (Callable): Zero-argument coroutine function making the API call.
+            estimated_tokens (float): Prompt plus expected completion tokens.
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BULK; defaults to the
+                current llm_priority context.
+
+        Returns:
+            Whatever `request` returns.
+
+        Raises:
+            The last error once `max_retries` retries are used up, or any
+            non-retryable error straight away.
+        """
+        priority = llm_priority.get() if priority is None else priority
+        if self.tokens is not None:
+            estimated_tokens = min(estimated_tokens, self.tokens.capacity)
+        attempt = 0
+        while True:
+            await self.acquire(estimated_tokens, priority)
+            self.counters["requests"] += 1
+            try:
+                response = await request()
+            except RETRYABLE_ERRORS as e:
+                # The provider did not process the request, so give the tokens back.
+                self.settle(estimated_tokens, 0)
+                if attempt >= self.max_retries:
+                    self.counters["failed"] += 1
+                    raise
+                delay = self.backoff(attempt, e)
+                if isinstance(e, openai.RateLimitError):
+                    self.counters["rate_limited"] += 1
+                    self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                self.counters["retries"] += 1
+                attempt += 1
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}), retry {attempt}/"
+                    f"{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            if estimated_tokens:
+                # Requests that reserved no tokens (files, batch jobs) are not charged.
+                usage = getattr(response, "usage", None)
+                self.settle(estimated_tokens, getattr(usage, "total_tokens", None))
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns request, retry and wait counters."""
+        return {
+            **self.counters,
+            "rpm_limit": self.requests.rate * 60 if self.requests else None,
+            "tpm_limit": self.tokens.rate * 60 if self.tokens else None,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,133 @@
+# utils/retrieval.py
+import hashlib
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.llm import get_async_client, run_request
+from utils.ranking import top_k
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "1024"))
+# 0 disables the pre-filter and every candidate is scored by the LLM.
+SHORTLIST_SIZE = int(os.getenv("SHORTLIST_SIZE", "0"))
+
+_token = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+
+class HashingEmbedder:
+    """
+    A deterministic, dependency-free embedder based on feature hashing.
+
+    Word unigrams and bigrams are hashed into `dim` signed buckets and the vector is
+    L2-normalized. It needs no network access, so it suits offline tests and
+    benchmarks, and it does reasonably well at keyword overlap between skills and
+    requirements.
+    """
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = _token.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 matrix of unit vectors."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._embed_one(text) for text in texts])
+
+
+class OpenAIEmbedder:
+    """
+    Embeds text with the OpenAI embeddings API, in batches, on the shared client.
+
+    Requests go through the shared LLM scheduler at the caller's priority.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, batch_size: int = 256):
+        self.model = model
+        self.name = model
+        self.batch_size = batch_size
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 matrix of unit vectors."""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text or " " for text in texts[start : start + self.batch_size]]
+            response = await run_request(
+                lambda: get_async_client().embeddings.create(
+                    model=self.model, input=batch
+                ),
+                sum(len(text) for text in batch) // 4,
+            )
+            vectors.extend(item.embedding for item in response.data)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+def get_default_embedder() -> Any:
+    """Returns the embedder selected by EMBEDDING_PROVIDER ("openai" or "hashing")."""
+    if EMBEDDING_PROVIDER == "hashing":
+        return HashingEmbedder()
+    return OpenAIEmbedder()
+
+
+def job_description_text(parsed_requirements: Dict[str, Any]) -> str:
+    """The parts of a structured job description that describe the ideal candidate."""
+    parts = [parsed_requirements.get("title", "")]
+    parts += parsed_requirements.get("requirements", []) or []
+    parts += parsed_requirements.get("responsibilities", []) or []
+    return "\n".join(str(part) for part in parts if part)
+
+
+def resume_text(resume: Dict[str, Any]) -> str:
+    """The parts of a parsed resume that are compared against the job description."""
+    parts = list(resume.get("skills", []) or [])
+    parts += resume.get("work_experiences", []) or []
+    if resume.get("summary"):
+        parts.append(resume["summary"])
+    return "\n".join(str(part) for part in parts if part)
+
+
+async def shortlist(
+    parsed_requirements: Dict[str, Any],
+    resumes: List[Dict[str, Any]],
+    k: int,
+    embedder: Optional[Any] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Picks the `k` resumes most similar to the job description by embedding cosine.
+
+    Parameters:
+        parsed_requirements (dict): The structured job description.
+        resumes (list): Parsed resume dictionaries.
+        k (int): Number of resumes to keep.
+        embedder: Any object with a `name` and an async `embed(texts) -> np.ndarray`
+            method that returns unit vectors. Defaults to get_default_embedder().
+
+    Returns:
+        tuple: (indices of the shortlisted resumes, best first; cosine similarity of
+               every resume to the job description).
+    """
+    embedder = embedder or get_default_embedder()
+    vectors = await embedder.embed(
+        [job_description_text(parsed_requirements)]
+        + [resume_text(resume) for resume in resumes]
+    )
+    query, matrix = vectors[0], vectors[1:]
+    similarities = matrix @ query
+    return top_k(similarities, k), similarities
@@ -0,0 +1,240 @@
+# utils/sessions.py
+import asyncio
+import contextlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from utils.cache import CACHE_PATH, sha256_hex
+from utils.ranking import rank_candidate_scores
+
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", CACHE_PATH)
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(30 * 24 * 60 * 60)))
+# Times an update is re-applied when another process saved the session first.
+SESSION_SAVE_ATTEMPTS = int(os.getenv("SESSION_SAVE_ATTEMPTS", "3"))
+
+
+class SessionConflict(Exception):
+    """Raised when a session was saved by someone else since it was loaded."""
+
+
+class SessionStore:
+    """
+    Screening sessions in their own SQLite table.
+
+    Unlike the caches, sessions are never evicted to make room: a session is only
+    deleted once it has been idle for `ttl` seconds. Every row carries a version
+    that each save bumps, and a save only succeeds if the version is still the one
+    that was loaded, so concurrent updates from several processes cannot silently
+    overwrite each other.
+    """
+
+    def __init__(self, path: str = SESSION_STORE_PATH, ttl: float = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS screening_sessions ("
+                " id TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " value TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS screening_sessions_updated"
+                " ON screening_sessions (updated_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a session with its current "version", or None if there is none."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT version, value FROM screening_sessions"
+                " WHERE id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        session = json.loads(row[1])
+        session["version"] = row[0]
+        return session
+
+    def save(self, session: Dict[str, Any]) -> None:
+        """
+        Stores a session and bumps its "version".
+
+        Raises:
+            SessionConflict: If the stored session is no longer the version that
+                `session` was loaded from (or, for a new session, already exists).
+        """
+        version = session.get("version", 0)
+        updated_at = time.time()
+        stored = {key: value for key, value in session.items() if key != "version"}
+        stored["updated_at"] = updated_at
+        value = json.dumps(stored)
+        with self._lock:
+            conn = self._connect()
+            if version == 0:
+                saved = conn.execute(
+                    "INSERT OR IGNORE INTO screening_sessions"
+                    " (id, version, value, updated_at) VALUES (?, 1, ?, ?)",
+                    (session["session_id"], value, updated_at),
+                ).rowcount
+            else:
+                saved = conn.execute(
+                    "UPDATE screening_sessions SET version = version + 1, value = ?,"
+                    " updated_at = ? WHERE id = ? AND version = ?",
+                    (value, updated_at, session["session_id"], version),
+                ).rowcount
+            conn.commit()
+        if not saved:
+            raise SessionConflict(
+                f"Session {session['session_id']} was changed by another request"
+            )
+        session["version"] = version + 1
+        session["updated_at"] = updated_at
+
+    def prune(self) -> int:
+        """Deletes sessions idle for longer than `ttl` seconds; returns how many."""
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute(
+                "DELETE FROM screening_sessions WHERE updated_at < ?",
+                (time.time() - self.ttl,),
+            ).rowcount
+            conn.commit()
+        return deleted
+
+
+session_store = SessionStore()
+
+# Updates to one session in this process wait for each other instead of conflicting;
+# a lock is dropped once nobody holds or waits for it.
+_locks: Dict[str, asyncio.Lock] = {}
+_lock_users: Dict[str, int] = {}
+
+
+@contextlib.asynccontextmanager
+async def session_lock(session_id: str) -> AsyncIterator[None]:
+    """Serializes updates to one session within this process."""
+    lock = _locks.setdefault(session_id, asyncio.Lock())
+    _lock_users[session_id] = _lock_users.get(session_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _lock_users[session_id] -= 1
+        if not _lock_users[session_id]:
+            del _lock_users[session_id], _locks[session_id]
+
+
+def new_session() -> Dict[str, Any]:
+    """
+    Returns an empty screening session.
+
+    A session holds one job description and the candidates screened against it:
+
+        job_description  the structured job description (None until one is set)
+        job_key          hash of the structured job description the scores belong to
+        candidates       content_hash -> the candidate's score record, which also
+                         carries its "filename", "content_hash" and parsed "resume"
+        ranking          content hashes, best weighted score first
+        unscored         content_hash -> {"filename", "resume"} of parsed candidates
+                         whose scoring failed; retried on the next update
+        errors           filename -> why that resume could not be screened
+    """
+    now = time.time()
+    return {
+        "session_id": uuid.uuid4().hex,
+        "job_description": None,
+        "job_key": None,
+        "candidates": {},
+        "ranking": [],
+        "unscored": {},
+        "errors": {},
+        "created_at": now,
+        "updated_at": now,
+        # Not stored yet; SessionStore.save bumps it on every save.
+        "version": 0,
+    }
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    return session_store.get(session_id)
+
+
+def save_session(session: Dict[str, Any]) -> None:
+    """Stores a session; raises SessionConflict if it changed since it was loaded."""
+    session_store.save(session)
+
+
+def job_key(parsed_requirements: Dict[str, Any]) -> str:
+    """Hashes a structured job description; scores are valid only for one key."""
+    return sha256_hex(json.dumps(parsed_requirements, sort_keys=True).encode("utf-8"))
+
+
+def merge_ranking(
+    ranking: List[str], candidates: Dict[str, Dict[str, Any]], rescored: List[str]
+) -> List[str]:
+    """
+    Merges newly scored candidates into an existing ranking.
+
+    The untouched part of `ranking` is already in order, so only the `rescored`
+    candidates are ranked, and the two sorted runs are merged in one linear pass
+    instead of re-sorting everything. Candidates no longer in `candidates` drop out.
+
+    Parameters:
+        ranking (list): Content hashes, best first, from the previous run.
+        candidates (dict): content_hash -> score record with "avg_score" set.
+        rescored (list): Content hashes whose score is new or changed.
+
+    Returns:
+        list: Content hashes of every scored candidate, best first.
+    """
+    changed = set(rescored)
+    kept = [key for key in ranking if key in candidates and key not in changed]
+    scores = [candidates[key] for key in rescored if key in candidates]
+    ranked_new = [score["content_hash"] for score in rank_candidate_scores(scores)]
+    # heapq.merge is stable, so on ties existing candidates stay ahead of new ones.
+    return list(
+        heapq.merge(
+            kept, ranked_new, key=lambda key: -candidates[key]["avg_score"]
+        )
+    )
+
+
+def session_view(
+    session: Dict[str, Any], offset: int = 0, limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """Returns a session's job description and one page of its ranked candidates."""
+    end = None if limit is None else offset + limit
+    return {
+        "session_id": session["session_id"],
+        "job_description": session["job_description"],
+        "total": len(session["ranking"]),
+        "candidates": [
+            session["candidates"][key] for key in session["ranking"][offset:end]
+        ],
+        "errors": [
+            {"filename": filename, "error": error}
+            for filename, error in session["errors"].items()
+        ],
+        "created_at": session["created_at"],
+        "updated_at": session["updated_at"],
+    }
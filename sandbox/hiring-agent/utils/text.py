@@ -0,0 +1,263 @@
+# utils/text.py
+import functools
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from utils.pdf import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "4000"))
+
+# Resume section headings and how much they matter for parsing and scoring.
+# Lower-priority sections are dropped first when a resume is over budget.
+SECTION_PRIORITIES = {
+    "summary": 3,
+    "profile": 3,
+    "objective": 3,
+    "experience": 3,
+    "work experience": 3,
+    "professional experience": 3,
+    "employment": 3,
+    "work history": 3,
+    "skills": 3,
+    "technical skills": 3,
+    "education": 2,
+    "certifications": 2,
+    "licenses": 2,
+    "languages": 2,
+    "projects": 1,
+    "awards": 1,
+    "publications": 1,
+    "volunteer": 0,
+    "volunteering": 0,
+    "interests": 0,
+    "hobbies": 0,
+    "references": 0,
+}
+PREAMBLE_PRIORITY = 3
+UNKNOWN_SECTION_PRIORITY = 1
+
+# Number of non-empty lines at the top and bottom of a page searched for page
+# numbers and running headers/footers.
+EDGE_LINES = 3
+
+_page_label = re.compile(r"^page\s*\d+(\s*(of|/)\s*\d+)?$")
+_page_fraction = re.compile(r"^([1-9]\d*)\s*(of|/)\s*([1-9]\d{0,2})$")
+_page_reference = re.compile(r"\bpage\s*\d+(\s*(of|/)\s*\d+)?\b")
+
+
+class CompactedText(NamedTuple):
+    text: str
+    original_tokens: int
+    tokens: int
+
+
+_totals = {"documents": 0, "original_tokens": 0, "tokens": 0}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding() -> Optional[Any]:
+    # Loaded on first use, not at import: tiktoken downloads the encoding the first
+    # time it is needed.
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # tiktoken is optional; fall back to a character estimate.
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when available, otherwise estimates ~4 chars/token."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _line_key(line: str) -> str:
+    # Only page numbers are normalized, so "Jane Doe - Page 2" and "Jane Doe - Page 3"
+    # share a key while dates and years keep theirs.
+    return _page_reference.sub("page #", re.sub(r"\s+", " ", line.lower())).strip()
+
+
+def _is_page_number(line: str, at_boundary: bool, page_count: int) -> bool:
+    text = line.lower()
+    if _page_label.match(text):
+        return True
+    match = _page_fraction.match(text)
+    if match:
+        return int(match.group(1)) <= int(match.group(3))
+    # A bare number is only a page number on the first or last line of a page, and
+    # only if it could be one; "2019" is a year.
+    return at_boundary and text.isdigit() and 1 <= int(text) <= page_count
+
+
+def _edge_slots(lines: List[str]) -> Dict[int, str]:
+    """Maps the index of each line in the edge window to its position from that edge."""
+    content = [index for index, line in enumerate(lines) if line]
+    slots = {}
+    for position, index in enumerate(reversed(content[-EDGE_LINES:])):
+        slots[index] = f"bottom {position}"
+    for position, index in enumerate(content[:EDGE_LINES]):
+        slots[index] = f"top {position}"
+    return slots
+
+
+def _normalize_lines(page: str) -> List[str]:
+    lines = []
+    for line in page.splitlines():
+        line = re.sub(r"[ \t\u00a0]+", " ", line).strip()
+        # Drop lines made only of bullets, rules and other punctuation.
+        if line and not re.search(r"\w", line):
+            continue
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _strip_headers_and_footers(pages: List[List[str]]) -> List[List[str]]:
+    """
+    Removes page numbers and running headers/footers from the edges of each page.
+
+    Only the first and last EDGE_LINES non-empty lines of a page are looked at. A
+    line there is a running header or footer if the same text sits at the same
+    position on most pages; section headings are never treated as one.
+    """
+    without_numbers = []
+    for lines in pages:
+        content = [index for index, line in enumerate(lines) if line]
+        boundary = {content[0], content[-1]} if content else set()
+        edges = set(content[:EDGE_LINES] + content[-EDGE_LINES:])
+        without_numbers.append(
+            [
+                line
+                for index, line in enumerate(lines)
+                if index not in edges
+                or not _is_page_number(line, index in boundary, len(pages))
+            ]
+        )
+
+    edge_keys = Counter()
+    for lines in without_numbers:
+        for index, slot in _edge_slots(lines).items():
+            line = lines[index]
+            if re.search(r"[^\W\d_]", line) and _section_priority(line) < 0:
+                edge_keys[(slot, _line_key(line))] += 1
+    threshold = max(2, math.ceil(len(pages) / 2))
+    repeated = {key for key, count in edge_keys.items() if count >= threshold}
+
+    seen = set()
+    result = []
+    for lines in without_numbers:
+        slots = _edge_slots(lines)
+        kept = []
+        for index, line in enumerate(lines):
+            key = _line_key(line)
+            if index in slots and (slots[index], key) in repeated:
+                # Keep the first copy: a running header is usually the candidate's name.
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        result.append(kept)
+    return result
+
+
+def _section_priority(line: str) -> int:
+    heading = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if len(line) > 40 or not heading:
+        return -1
+    return SECTION_PRIORITIES.get(heading, -1)
+
+
+def _split_sections(lines: List[str]) -> List[List[str]]:
+    sections = [[]]
+    for line in lines:
+        if _section_priority(line) >= 0 and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return [section for section in sections if section]
+
+
+def compact_resume_text(
+    text: str, token_budget: int = RESUME_TOKEN_BUDGET
+) -> CompactedText:
+    """
+    Shrinks raw resume text before it is sent to an LLM, without changing its meaning.
+
+    The text is normalized (repeated whitespace, empty bullets and blank-line runs
+    removed), page numbers and headers/footers repeated across pages are dropped, and
+    if the result is still over `token_budget` whole sections are removed starting
+    from the least informative (references, hobbies, ...) until it fits. A section
+    that does not fit in what is left is cut line by line, and any smaller section
+    after it that still fits is kept. Remaining sections keep their original order.
+
+    Parameters:
+        text (str): Extracted resume text; pages separated by PAGE_BREAK.
+        token_budget (int): Maximum number of tokens to keep.
+
+    Returns:
+        CompactedText: The compacted text plus token counts before and after.
+    """
+    original_tokens = count_tokens(text)
+    pages = [_normalize_lines(page) for page in text.split(PAGE_BREAK)]
+    if len(pages) > 1:
+        pages = _strip_headers_and_footers(pages)
+    lines = [line for page in pages for line in page]
+
+    compacted = "\n".join(lines)
+    if count_tokens(compacted) > token_budget:
+        sections = _split_sections(lines)
+        priorities = []
+        for index, section in enumerate(sections):
+            priority = _section_priority(section[0])
+            if priority < 0:
+                priority = PREAMBLE_PRIORITY if index == 0 else UNKNOWN_SECTION_PRIORITY
+            priorities.append(priority)
+
+        kept = {}
+        remaining = token_budget
+        for index in sorted(range(len(sections)), key=lambda i: (-priorities[i], i)):
+            section_tokens = count_tokens("\n".join(sections[index]))
+            if section_tokens <= remaining:
+                kept[index] = sections[index]
+                remaining -= section_tokens
+                continue
+            partial = []
+            for line in sections[index]:
+                line_tokens = count_tokens(line) + 1
+                if line_tokens > remaining:
+                    break
+                partial.append(line)
+                remaining -= line_tokens
+            if partial:
+                kept[index] = partial
+        compacted = "\n".join(line for i in sorted(kept) for line in kept[i])
+
+    tokens = count_tokens(compacted)
+    _totals["documents"] += 1
+    _totals["original_tokens"] += original_tokens
+    _totals["tokens"] += tokens
+    logger.info(
+        f"Compacted resume text from {original_tokens} to {tokens} tokens "
+        f"({original_tokens - tokens} saved)"
+    )
+    return CompactedText(compacted, original_tokens, tokens)
+
+
+def compaction_stats() -> Dict[str, int]:
+    """Returns running totals of tokens before and after compaction in this process."""
+    return {
+        "documents": _totals["documents"],
+        "original_tokens": _totals["original_tokens"],
+        "compacted_tokens": _totals["tokens"],
+        "tokens_saved": _totals["original_tokens"] - _totals["tokens"],
+    }
@@ -4,19 +4,38 @@ from typing import List, Dict, Any
 from firecrawl import FirecrawlApp
 from dotenv import load_dotenv
 import json
-from openai import OpenAI
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import asyncio
 
 load_dotenv()
-import tempfile
-import PyPDF2
+from utils.llm import LLM_MODEL, call_llm
+from utils.metrics import metrics
+from utils.ratelimit import bulk
+from utils.pdf import PDF_EXTRACT_TIMEOUT, extract_pdf_text_async, upload_buffer
+from utils.prompts import compact_json, shared_prefix
+from utils.text import compact_resume_text
+from utils.retrieval import SHORTLIST_SIZE, shortlist
+from utils.index import index_resumes
+from utils.ranking import rank_candidate_scores
+from utils.emails import EMAIL_MAX_CONCURRENCY, EMAIL_MODE, generate_emails
+from utils.batch import LLM_EXECUTION, BatchRequest, batch_content, complete_batch
+from utils.cache import (
+    job_description_cache,
+    job_description_cache_key,
+    resume_cache,
+    resume_cache_key,
+    score_cache,
+    score_cache_key,
+    scrape_cache,
+    sha256_hex,
+)
 
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
-openai_api_key = os.environ.get("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=openai_api_key)
+
+# Maximum number of candidate scoring calls allowed in flight at once.
+SCORING_MAX_CONCURRENCY = int(os.getenv("SCORING_MAX_CONCURRENCY", "8"))
 
 
 class CandidateScore(BaseModel):
@@ -60,6 +79,14 @@ class JobDescription(BaseModel):
     responsibilities: list[str]
 
 
+class CandidateEvaluation(BaseModel):
+    resume: Resume = Field(..., description="Details extracted from the candidate's resume")
+    score: CandidateScore = Field(
+        ..., description="The candidate's scores against the job description"
+    )
+
+
+@metrics.timed("ingest")
 async def ingest_inputs(
     job_description: str, resume_files: List[Any]
 ) -> Dict[str, Any]:
@@ -78,7 +105,9 @@ async def ingest_inputs(
     # Determine if job_description is a URL.
     if job_description.startswith("http"):
         try:
-            result = app.scrape_url(job_description, params={"formats": ["markdown"]})
+            result = await scrape_cache.get(
+                job_description, app.scrape_url, params={"formats": ["markdown"]}
+            )
             # Check if markdown data is present in the result.
             if not result or "markdown" not in result:
                 raise ValueError("Scraping did not return markdown data.")
@@ -91,27 +120,7 @@ async def ingest_inputs(
     return {"job_description": job_desc_text, "resumes": resumes}
 
 
-def call_llm(messages: list, response_fromat: None) -> str:
-    """
-    Calls the OpenAI GPT-4 model with the provided prompt and returns the response text.
-
-    Parameters:
-        prompt (str): The prompt to send to the LLM.
-
-    Returns:
-        str: The LLM's response.
-    """
-
-    params = {"model": "gpt-4o-2024-08-06", "messages": messages}
-
-    if response_fromat:
-        params["response_format"] = response_fromat
-
-    response = openai_client.beta.chat.completions.parse(**params)
-
-    return response.choices[0].message.content
-
-
+@metrics.timed("jd_parse")
 async def parse_job_description(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Parses the job description to extract key requirements in a structured format.
@@ -134,6 +143,12 @@ async def parse_job_description(data: Dict[str, Any]) -> Dict[str, Any]:
     if not job_text:
         raise ValueError("No job description text provided.")
 
+    # Re-screening the same posting reuses the structured result without an LLM call.
+    cache_key = job_description_cache_key(job_text, JobDescription, LLM_MODEL)
+    cached_jd = await job_description_cache.aget(cache_key)
+    if cached_jd is not None:
+        return cached_jd
+
     # Build the prompt for the LLM
     prompt = (
         "Extract the key job information from the text below. Return only valid JSON "
@@ -155,16 +170,50 @@ async def parse_job_description(data: Dict[str, Any]) -> Dict[str, Any]:
     ]
 
     try:
-        llm_output = call_llm(messages, response_fromat=JobDescription)
+        llm_output = await call_llm(messages, response_format=JobDescription)
         # Parse the JSON returned by the LLM
         structured_jd = json.loads(llm_output)
     except Exception as e:
         raise Exception(f"Error parsing job description: {e}")
 
+    await job_description_cache.aset(cache_key, structured_jd)
+
     return structured_jd
 
 
-async def parse_resumes(resume_files: List[Any]) -> Dict[str, Any]:
+async def read_resume_text(resume: Any) -> str:
+    """
+    Extracts an uploaded resume's text, trimmed to the resume token budget.
+
+    Extraction runs in the shared PDF process pool and compaction in a worker thread,
+    so resumes processed concurrently neither block the event loop nor wait on each
+    other.
+
+    Parameters:
+        resume (Any): An uploaded resume file object (e.g., from Streamlit's file uploader).
+
+    Returns:
+        str: The compacted resume text.
+
+    Raises:
+        Exception: If the PDF cannot be read or extraction times out.
+    """
+    with upload_buffer(resume) as pdf_buffer:
+        pdf_bytes = bytes(pdf_buffer)
+    with metrics.stage("pdf_extract"):
+        try:
+            pdf_text = await extract_pdf_text_async(pdf_bytes)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"PDF extraction timed out after {PDF_EXTRACT_TIMEOUT}s")
+    return (await asyncio.to_thread(compact_resume_text, pdf_text)).text
+
+
+@bulk
+async def parse_resumes(
+    resume_files: List[Any],
+    execution: str = LLM_EXECUTION,
+    max_concurrency: int = SCORING_MAX_CONCURRENCY,
+) -> Dict[str, Any]:
     """
     Parses resume files to extract candidate information.
 
@@ -183,8 +232,15 @@ async def parse_resumes(resume_files: List[Any]) -> Dict[str, Any]:
             "languages": list[string] (optional)
         }
 
+    Newly parsed resumes are also appended to the persistent candidate index (see
+    utils.index) so later postings can search them without re-parsing. Uncached
+    resumes are parsed concurrently, at most `max_concurrency` LLM calls at a time;
+    with `execution="batch"` they are parsed in one Batch API job instead.
+
     Parameters:
         resume_files (List[Any]): List of uploaded resume file objects (e.g., from Streamlit's file uploader).
+        execution (str): "realtime" or "batch" (see utils.batch).
+        max_concurrency (int): Maximum number of parsing calls in flight at once.
 
     Returns:
         dict: A dictionary with a key "parsed_resumes" that is a list of parsed resume details.
@@ -192,17 +248,23 @@ async def parse_resumes(resume_files: List[Any]) -> Dict[str, Any]:
     Raises:
         Exception: If any LLM call or JSON parsing fails.
     """
-    parsed_resumes = []
-    for resume in resume_files:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(resume.read())
-            temp_path = temp_file.name
-
-        # Extract text from PDF
-        with open(temp_path, "rb") as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            pdf_text = " ".join(page.extract_text() for page in pdf_reader.pages)
+    async def prepare(resume: Any) -> tuple:
+        # Hash straight from the upload buffer; nothing is copied or written to disk.
+        with upload_buffer(resume) as pdf_buffer:
+            content_hash = sha256_hex(pdf_buffer)
+
+        # Identical PDFs parsed before under the same schema and model are served
+        # from the cache, skipping both text extraction and the LLM call.
+        cache_key = resume_cache_key(content_hash, Resume, LLM_MODEL)
+        cached_resume = await resume_cache.aget(cache_key, "resume_parse")
+        if cached_resume is not None:
+            return content_hash, cache_key, cached_resume, None
+
+        # Extract text from PDF, trimmed to the resume token budget
+        try:
+            pdf_text = await read_resume_text(resume)
+        except Exception as e:
+            return content_hash, cache_key, {"error": f"Failed to read resume PDF: {e}"}, None
         # Build messages for the LLM.
         messages = [
             {
@@ -217,184 +279,384 @@ async def parse_resumes(resume_files: List[Any]) -> Dict[str, Any]:
                 "content": f"Extract resume details from the following resume text:\n\n{pdf_text}",
             },
         ]
-
+        return content_hash, cache_key, None, messages
+
+    # Resumes are hashed, looked up and extracted concurrently.
+    prepared = await asyncio.gather(*(prepare(resume) for resume in resume_files))
+    parsed_resumes: List[Optional[Dict[str, Any]]] = []
+    indexable = []
+    pending = []
+    for index, (content_hash, cache_key, result, messages) in enumerate(prepared):
+        parsed_resumes.append(result)
+        if result is None:
+            pending.append((index, content_hash, cache_key, messages))
+        elif "error" not in result:
+            indexable.append((content_hash, result))
+
+    batch_results = None
+    if execution == "batch":
+        batch_results = await complete_batch(
+            [BatchRequest(str(index), messages, Resume) for index, _, _, messages in pending]
+        )
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    @metrics.timed("resume_parse")
+    async def parse_one(index: int, cache_key: str, messages: List[Dict[str, str]]):
         try:
-            # Call the LLM to process the resume text.
-            # Pass the JSON schema (as a string) to instruct the LLM on the expected format.
-            llm_response = call_llm(messages, response_fromat=Resume)
+            if batch_results is not None:
+                llm_response = batch_content(batch_results, str(index))
+            else:
+                # Call the LLM to process the resume text.
+                # Pass the JSON schema (as a string) to instruct the LLM on the expected format.
+                async with metrics.queued(semaphore):
+                    llm_response = await call_llm(messages, response_format=Resume)
             # Parse the JSON response from the LLM.
             parsed_resume = json.loads(llm_response)
+            await resume_cache.aset(cache_key, parsed_resume)
+            return parsed_resume
         except Exception as e:
-            parsed_resume = {"error": f"Failed to parse resume using LLM: {e}"}
+            metrics.mark_error()
+            return {"error": f"Failed to parse resume using LLM: {e}"}
+
+    results = await asyncio.gather(
+        *(
+            parse_one(index, cache_key, messages)
+            for index, _, cache_key, messages in pending
+        )
+    )
+    for (index, content_hash, _, _), parsed_resume in zip(pending, results):
+        parsed_resumes[index] = parsed_resume
+        if "error" not in parsed_resume:
+            indexable.append((content_hash, parsed_resume))
 
-        parsed_resumes.append(parsed_resume)
+    await index_resumes(indexable)
     return {"parsed_resumes": parsed_resumes}
 
 
+SCORING_SYSTEM_PROMPT = (
+    "You are an unbiased hiring manager. Compare the following job description with the candidate's resume and provide "
+    "scores (0-100) for relevance, experience, and skills. Also compute an overall score that reflects the candidate's fit "
+    "and provide a comment explaining your evaluation. Return only valid JSON using the following schema: "
+)
+
+
+def build_scoring_messages(
+    job_description_text: str, candidate: Dict[str, Any]
+) -> List[Dict[str, str]]:
+    """
+    Builds the LLM messages that score one parsed resume against a job description.
+
+    The system prompt and job description form a prefix shared by every candidate
+    of the job (see utils.prompts.shared_prefix), so providers can serve it from
+    their prompt cache; only the last message is per candidate.
+
+    Parameters:
+        job_description_text (str): The compact_json-serialized structured job description.
+        candidate (dict): The parsed resume details.
+
+    Returns:
+        list: Chat messages for call_llm.
+    """
+    return shared_prefix(SCORING_SYSTEM_PROMPT, job_description_text) + [
+        {"role": "user", "content": f"Candidate Resume:\n{compact_json(candidate)}"},
+    ]
+
+
+def failed_score(candidate: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    """Returns the zero-score record used when a candidate cannot be evaluated."""
+    return {
+        "name": candidate.get("name", "Unknown"),
+        "relevance": 0,
+        "experience": 0,
+        "skills": 0,
+        "overall": 0,
+        "comment": f"Error during evaluation: {error}",
+    }
+
+
+@bulk
 async def score_candidates(
-    parsed_requirements: Dict[str, Any], parsed_resumes: Dict[str, Any]
+    parsed_requirements: Dict[str, Any],
+    parsed_resumes: Dict[str, Any],
+    max_concurrency: int = SCORING_MAX_CONCURRENCY,
+    shortlist_size: int = SHORTLIST_SIZE,
+    embedder: Optional[Any] = None,
+    execution: str = LLM_EXECUTION,
 ) -> List[Dict[str, Any]]:
     """
     Scores candidates based on the parsed job description and resume data.
+
+    Candidates are scored concurrently, with at most `max_concurrency` LLM calls in
+    flight at any time. Results are returned in the same order as the input resumes.
+
+    When `shortlist_size` is set and there are more resumes than that, an embedding
+    pre-filter picks the `shortlist_size` resumes closest to the job description and
+    only those are sent to the LLM. The rest get a zero score explaining that they
+    were not shortlisted.
+
+    With `execution="batch"` the scoring requests are submitted as one Batch API
+    job (see utils.batch) instead of real-time calls.
+
     Parameters:
         parsed_requirements (dict): Parsed job description data.
             Expected to have a key "parsed_requirements" with the job description details.
         parsed_resumes (dict): Parsed resume data.
             Expected to have a key "parsed_resumes" which is a list of candidate details.
+        max_concurrency (int): Maximum number of scoring calls in flight at once.
+        shortlist_size (int): Number of resumes to score with the LLM; 0 scores all.
+        embedder: Embedding provider for the pre-filter (see utils.retrieval).
+        execution (str): "realtime" or "batch".
 
     Returns:
         list: A list of dictionaries with candidate scores as per the CandidateScore model.
+    """
+    job_description_text = compact_json(parsed_requirements)
+    resume_list = parsed_resumes.get("parsed_resumes", [])
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    shortlisted = set(range(len(resume_list)))
+    similarities = None
+    if shortlist_size and len(resume_list) > shortlist_size:
+        indices, similarities = await shortlist(
+            parsed_requirements, resume_list, shortlist_size, embedder
+        )
+        shortlisted = set(indices.tolist())
+
+    # Candidates already scored against this job description skip the LLM.
+    cache_keys = [
+        score_cache_key(job_description_text, candidate, CandidateScore, LLM_MODEL)
+        for candidate in resume_list
+    ]
+    lookups = await asyncio.gather(
+        *(score_cache.aget(cache_keys[index], "score") for index in shortlisted)
+    )
+    cached_scores = {
+        index: cached_score
+        for index, cached_score in zip(shortlisted, lookups)
+        if cached_score is not None
+    }
+
+    batch_results = None
+    if execution == "batch":
+        batch_results = await complete_batch(
+            [
+                BatchRequest(
+                    str(index),
+                    build_scoring_messages(job_description_text, resume_list[index]),
+                    CandidateScore,
+                )
+                for index in sorted(shortlisted - set(cached_scores))
+            ]
+        )
+
+    async def score_candidate(index: int, candidate: Dict[str, Any]) -> Dict[str, Any]:
+        if index not in shortlisted:
+            score_data = failed_score(candidate, None)
+            score_data["comment"] = (
+                "Not shortlisted for detailed evaluation "
+                f"(similarity {similarities[index]:.2f} to the job description)."
+            )
+            score_data["resume"] = candidate
+            return score_data
+        if index in cached_scores:
+            return {**cached_scores[index], "resume": candidate}
+
+        messages = build_scoring_messages(job_description_text, candidate)
+
+        with metrics.stage("score"):
+            try:
+                if batch_results is not None:
+                    llm_response = batch_content(batch_results, str(index))
+                else:
+                    async with metrics.queued(semaphore):
+                        llm_response = await call_llm(
+                            messages, response_format=CandidateScore
+                        )
+                score_data = json.loads(llm_response)
+                await score_cache.aset(cache_keys[index], score_data)
+                score_data["resume"] = candidate
+            except Exception as e:
+                # In case of an error, record a default score with error comment.
+                metrics.mark_error()
+                score_data = failed_score(candidate, e)
+        return score_data
+
+    # gather() keeps results in input order regardless of completion order.
+    candidate_scores = await asyncio.gather(
+        *(score_candidate(index, candidate) for index, candidate in enumerate(resume_list))
+    )
+    return list(candidate_scores)
 
-    Raises:
-        Exception: If any LLM call or JSON parsing fails.
+
+FUSED_SYSTEM_PROMPT = (
+    "You are an unbiased hiring manager. First extract the candidate's resume details "
+    "(name, work experiences, location, skills, education, and optionally summary, "
+    "certifications and languages). Then compare the resume with the job description and "
+    "provide scores (0-100) for relevance, experience, and skills, an overall score that "
+    "reflects the candidate's fit, and a comment explaining your evaluation. "
+    "Return only valid JSON following the provided schema."
+)
+
+
+@bulk
+async def parse_and_score_candidates(
+    parsed_requirements: Dict[str, Any],
+    resume_files: List[Any],
+    max_concurrency: int = SCORING_MAX_CONCURRENCY,
+) -> Dict[str, Any]:
     """
-    candidate_scores = []
+    Parses and scores resumes with a single LLM call per candidate.
 
-    job_description_text = json.dumps(parsed_requirements)
-    resume_list = parsed_resumes.get("parsed_resumes", [])
-    for candidate in resume_list:
-        # Build messages for the LLM.
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are an unbiased hiring manager. Compare the following job description with the candidate's resume and provide "
-                    "scores (0-100) for relevance, experience, and skills. Also compute an overall score that reflects the candidate's fit "
-                    "and provide a comment explaining your evaluation. Return only valid JSON using the following schema: "
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Job Description:\n{job_description_text}\n\n"
-                    f"Candidate Resume:\n{json.dumps(candidate)}"
-                ),
-            },
-        ]
+    This is the fused alternative to calling parse_resumes and then score_candidates.
+    The LLM extracts the Resume fields and produces the CandidateScore in the same
+    structured-output call (the CandidateEvaluation schema), so the resume is never
+    re-sent for scoring. Resumes already in the parsed-resume cache only need the
+    scoring call. Candidates run concurrently, at most `max_concurrency` at a time.
 
-        try:
-            llm_response = call_llm(messages, response_fromat=CandidateScore)
-            score_data = json.loads(llm_response)
-            score_data["resume"] = candidate
-        except Exception as e:
-            # In case of an error, record a default score with error comment.
-            score_data = {
-                "name": candidate.get("name", "Unknown"),
-                "relevance": 0,
-                "experience": 0,
-                "skills": 0,
-                "overall": 0,
-                "comment": f"Error during evaluation: {e}",
-            }
+    Parameters:
+        parsed_requirements (dict): The structured job description.
+        resume_files (List[Any]): List of uploaded resume file objects.
+        max_concurrency (int): Maximum number of LLM calls in flight at once.
 
-        candidate_scores.append(score_data)
+    Returns:
+        dict: A dictionary with two keys, both in input order and in the same shapes
+              as the two-step flow:
+              - "parsed_resumes": The parse_resumes output ({"parsed_resumes": [...]}).
+              - "candidate_scores": The score_candidates output.
+    """
+    job_description_text = compact_json(parsed_requirements)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    @metrics.timed("parse_and_score")
+    async def evaluate(resume: Any) -> Dict[str, Any]:
+        with upload_buffer(resume) as pdf_buffer:
+            content_hash = sha256_hex(pdf_buffer)
+        cache_key = resume_cache_key(content_hash, Resume, LLM_MODEL)
+        parsed_resume = await resume_cache.aget(cache_key)
 
-    return candidate_scores
+        try:
+            if parsed_resume is not None:
+                # Already parsed once: only the scoring half is needed.
+                messages = build_scoring_messages(job_description_text, parsed_resume)
+                async with metrics.queued(semaphore):
+                    llm_response = await call_llm(
+                        messages, response_format=CandidateScore
+                    )
+                score_data = json.loads(llm_response)
+            else:
+                pdf_text = await read_resume_text(resume)
+                # Shared system + job description prefix, then this candidate's text.
+                messages = shared_prefix(FUSED_SYSTEM_PROMPT, job_description_text) + [
+                    {"role": "user", "content": f"Candidate Resume Text:\n{pdf_text}"},
+                ]
+                async with metrics.queued(semaphore):
+                    llm_response = await call_llm(
+                        messages, response_format=CandidateEvaluation
+                    )
+                evaluation = json.loads(llm_response)
+                parsed_resume = evaluation["resume"]
+                score_data = evaluation["score"]
+                await resume_cache.aset(cache_key, parsed_resume)
+            score_data["resume"] = parsed_resume
+        except Exception as e:
+            metrics.mark_error()
+            if parsed_resume is None:
+                parsed_resume = {"error": f"Failed to parse resume using LLM: {e}"}
+            score_data = failed_score(parsed_resume, e)
+
+        return {"resume": parsed_resume, "score": score_data}
+
+    # gather() keeps results in input order regardless of completion order.
+    evaluations = await asyncio.gather(*(evaluate(resume) for resume in resume_files))
+    return {
+        "parsed_resumes": {
+            "parsed_resumes": [evaluation["resume"] for evaluation in evaluations]
+        },
+        "candidate_scores": [evaluation["score"] for evaluation in evaluations],
+    }
 
 
-def rank_candidates(candidate_scores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+@metrics.timed("rank")
+def rank_candidates(
+    candidate_scores: List[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
-    Ranks candidates based on the average of their overall scores.
+    Ranks candidates based on a weighted average of their scores.
 
-    For each candidate, this function calculates the average score from the keys:
-    "relevance", "experience", "skills", and "overall". It adds a new key "avg_score"
-    to each candidate's dictionary and then returns the sorted list in descending order.
+    For each candidate, this function calculates the weighted average of the keys
+    "relevance", "experience", "skills", and "overall" (equal weights unless
+    RANKING_WEIGHTS or `weights` say otherwise), stores it under "avg_score" and
+    returns the candidates in descending order. Candidates with equal scores keep
+    their input order. Only the requested page is sorted (see utils.ranking).
 
     Parameters:
         candidate_scores (list): List of candidate score dictionaries.
+        weights (dict): Optional per-dimension weights, e.g. {"skills": 2, "overall": 1}.
+        offset (int): Number of top-ranked candidates to skip.
+        limit (int): Maximum number of candidates to return; None returns all.
 
     Returns:
         list: Sorted list of candidate scores in descending order based on avg_score.
     """
-    for candidate in candidate_scores:
-        # Compute the average of the relevant scores.
-        relevance = candidate.get("relevance", 0)
-        experience = candidate.get("experience", 0)
-        skills = candidate.get("skills", 0)
-        overall = candidate.get("overall", 0)
-        candidate["avg_score"] = (relevance + experience + skills + overall) / 4.0
-
-    # Return the sorted list of candidates based on avg_score.
-    return sorted(
-        candidate_scores, key=lambda candidate: candidate["avg_score"], reverse=True
-    )
+    return rank_candidate_scores(candidate_scores, weights, offset, limit)
 
 
+@bulk
 async def generate_email_templates(
-    ranked_candidates: List[Dict[str, Any]], job_description: Dict[str, Any], top_x: int
+    ranked_candidates: List[Dict[str, Any]],
+    job_description: Dict[str, Any],
+    top_x: int,
+    mode: str = EMAIL_MODE,
+    max_concurrency: int = EMAIL_MAX_CONCURRENCY,
+    execution: str = LLM_EXECUTION,
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Generates custom email templates using an LLM for each candidate.
+
+    In "bespoke" mode (the default, see EMAIL_MODE) every email is written from
+    scratch. In "skeleton" mode one shared invitation and one shared rejection are
+    written per job, and the per-candidate paragraph is filled in by batched calls
+    covering EMAIL_BATCH_SIZE candidates each. Either way at most `max_concurrency`
+    LLM calls are in flight, or with `execution="batch"` the per-candidate calls are
+    submitted as Batch API jobs instead.
+
     Parameters:
         ranked_candidates (list): List of candidate score dictionaries.
         job_description (dict): The structured job description.
         top_x (int): Number of top candidates to invite for a call.
+        mode (str): "skeleton" or "bespoke".
+        max_concurrency (int): Maximum number of email LLM calls in flight at once.
+        execution (str): "realtime" or "batch" (see utils.batch).
 
     Returns:
         dict: A dictionary with two keys:
               - "invitations": A list of dictionaries with candidate "name" and "email_body" for invitations.
               - "rejections": A list of dictionaries with candidate "name" and "email_body" for rejections.
-
-    Raises:
-        Exception: If the LLM call fails for any candidate.
     """
-    invitations = []
-    rejections = []
-
-    for idx, candidate in enumerate(ranked_candidates):
-        candidate_name = candidate.get("name", "Candidate")
-
-        # Build the base messages for the LLM.
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are an unbiased HR professional. Your task is to craft clear, concise, "
-                    "and professional email responses to candidates based on the job description, "
-                    "the candidate's resume details, and evaluation scores. "
-                    "Return only the email body as plain text."
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Job Description (structured):\n{json.dumps(job_description, indent=2)}\n\n"
-                    f"Candidate Evaluation (structured):\n{json.dumps(candidate, indent=2)}\n\n"
-                ),
-            },
-        ]
-
-        # Append specific instructions based on candidate ranking.
-        if idx < top_x:
-            messages.append(
-                {
-                    "role": "assistant",
-                    "content": (
-                        "Please create an invitation email inviting the candidate for a quick call. "
-                        "The email should be friendly, professional, and include a scheduling request."
-                    ),
-                }
-            )
-        else:
-            messages.append(
-                {
-                    "role": "assistant",
-                    "content": (
-                        "Please create a polite rejection email. Include constructive feedback and key "
-                        "suggestions for improvement based on the candidate's evaluation."
-                    ),
-                }
-            )
-
-        try:
-            email_body = call_llm(messages, response_fromat=None)
-        except Exception as e:
-            email_body = f"Error generating email: {e}"
-
-        email_template = {"name": candidate_name, "email_body": email_body}
-        if idx < top_x:
-            invitations.append(email_template)
-        else:
-            rejections.append(email_template)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    invited = ranked_candidates[:top_x]
+    rejected = ranked_candidates[top_x:]
+
+    invitation_bodies, rejection_bodies = await asyncio.gather(
+        generate_emails(
+            job_description, invited, "accept", mode, semaphore, execution=execution
+        ),
+        generate_emails(
+            job_description, rejected, "reject", mode, semaphore, execution=execution
+        ),
+    )
 
-    return {"invitations": invitations, "rejections": rejections}
+    return {
+        "invitations": [
+            {"name": candidate.get("name", "Candidate"), "email_body": body}
+            for candidate, body in zip(invited, invitation_bodies)
+        ],
+        "rejections": [
+            {"name": candidate.get("name", "Candidate"), "email_body": body}
+            for candidate, body in zip(rejected, rejection_bodies)
+        ],
+    }